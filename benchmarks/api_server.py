@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# Local Twitter Ads API stand-in server for load testing
+# Serves the endpoints used by the tap from benchmarks/fixtures.py (FakeTwitterAdsApi routes): cursor pagination,
+#   stats/jobs/accounts/{account_id} POST/GET w/ async job state transitions, gzip async result downloads,
+#   active_entities and targeting_criteria/*; w/ configurable latency, max page size, rate-limit headers
+#   and 429/5xx injection. Requests are handled concurrently (one thread per connection, keep-alive).
+# The tap is pointed at the server by setting twitter_ads.http.Request._DEFAULT_DOMAIN to its url
+#   (see serve_in_thread and bench_sync.py --http); async result urls already use the server's url.
+# Usage: python benchmarks/api_server.py [--port 8080] [--latency-ms 50] [--page-size 100] [--error-rate-429 0.01]
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+from fixtures import Fixtures
+from fake_api import FakeTwitterAdsApi
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.handle_api_request('get')
+
+    def do_POST(self):
+        self.handle_api_request('post')
+
+    def get_params(self, url):
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        # POST params may also be sent as a form body
+        length = int(self.headers.get('content-length') or 0)
+        if length:
+            body = self.rfile.read(length).decode('utf-8')
+            if 'application/x-www-form-urlencoded' in (self.headers.get('content-type') or ''):
+                params.update(parse_qsl(body, keep_blank_values=True))
+        return params
+
+    def handle_api_request(self, method):
+        server = self.server
+        url = urlparse(self.path)
+        params = self.get_params(url)
+        if server.page_size and 'count' in params:
+            params['count'] = str(min(int(params['count']), server.page_size))
+
+        server.sleep_latency()
+        status, headers, body = server.get_injected_error()
+        if status is None:
+            status, headers, body = server.api.handle(method, None, url.path, params)
+        server.count_response(status)
+
+        self.send_response(status)
+        for key, val in headers.items():
+            self.send_header(key, val)
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # latency_ms (+ up to latency_jitter_ms): delay of each response
+    # page_size: max count of a page (requests w/ a larger count get smaller pages)
+    # error_rate_429, error_rate_5xx: share of requests answered w/ 429 (rate limit) or 503
+    # rate_limit_reset_seconds: x-rate-limit-reset of injected 429s (the SDK sleeps until the reset + 5 seconds)
+    def __init__(self, address, fixtures, job_polls=1, rate_limit=2000, latency_ms=0, latency_jitter_ms=0, \
+        page_size=None, error_rate_429=0.0, error_rate_5xx=0.0, rate_limit_reset_seconds=0, seed=1, verbose=False):
+        super().__init__(address, ApiRequestHandler)
+        self.url = 'http://{}:{}'.format(*self.server_address[:2])
+        self.api = FakeTwitterAdsApi(fixtures, job_polls=job_polls, rate_limit=rate_limit, \
+            async_results_domain=self.url)
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.page_size = page_size
+        self.error_rate_429 = error_rate_429
+        self.error_rate_5xx = error_rate_5xx
+        self.rate_limit_reset_seconds = rate_limit_reset_seconds
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.responses = {}
+
+    def sleep_latency(self):
+        if self.latency_ms or self.latency_jitter_ms:
+            with self.lock:
+                jitter_ms = self.random.random() * self.latency_jitter_ms
+            time.sleep((self.latency_ms + jitter_ms) / 1000.0)
+
+    # Injected error response (status, headers, body) or (None, None, None)
+    def get_injected_error(self):
+        with self.lock:
+            draw = self.random.random()
+        if draw < self.error_rate_429:
+            headers = {
+                'content-type': 'application/json;charset=utf-8',
+                'x-rate-limit-limit': str(self.api.rate_limit),
+                'x-rate-limit-remaining': '0',
+                'x-rate-limit-reset': str(int(time.time()) + self.rate_limit_reset_seconds)
+            }
+            return FakeTwitterAdsApi.json_response(429, headers, \
+                {'errors': [{'code': 'TOO_MANY_REQUESTS', 'message': 'Rate limit exceeded'}]})
+        if draw < self.error_rate_429 + self.error_rate_5xx:
+            return FakeTwitterAdsApi.json_response(503, {'content-type': 'application/json;charset=utf-8'}, \
+                {'errors': [{'code': 'SERVICE_UNAVAILABLE', 'message': 'Service Unavailable'}]})
+        return None, None, None
+
+    def count_response(self, status):
+        with self.lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+
+# Start a server (port 0: any free port) in a daemon thread, return the server (server.url, server.shutdown())
+def serve_in_thread(fixtures, host='127.0.0.1', port=0, **kwargs):
+    server = ApiServer((host, port), fixtures, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def add_server_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--latency-jitter-ms', type=float, default=0)
+    parser.add_argument('--page-size', type=int, help='max records per page')
+    parser.add_argument('--rate-limit', type=int, default=2000, help='x-rate-limit-limit header value')
+    parser.add_argument('--rate-limit-reset-seconds', type=int, default=0, help='x-rate-limit-reset of 429s')
+    parser.add_argument('--error-rate-429', type=float, default=0.0, help='share of requests answered w/ 429')
+    parser.add_argument('--error-rate-5xx', type=float, default=0.0, help='share of requests answered w/ 503')
+
+
+def get_server_options(args):
+    return {
+        'latency_ms': args.latency_ms,
+        'latency_jitter_ms': args.latency_jitter_ms,
+        'page_size': args.page_size,
+        'rate_limit': args.rate_limit,
+        'rate_limit_reset_seconds': args.rate_limit_reset_seconds,
+        'error_rate_429': args.error_rate_429,
+        'error_rate_5xx': args.error_rate_5xx,
+        'job_polls': args.job_polls,
+        'seed': args.seed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies the fixture record counts')
+    parser.add_argument('--job-polls', type=int, default=2, help='job status GETs before a job is SUCCESS')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true', help='log each request')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    fixtures = Fixtures(seed=args.seed, scale=args.scale)
+    server = ApiServer((args.host, args.port), fixtures, verbose=args.verbose, **get_server_options(args))
+    print('Serving Twitter Ads API stand-in on {} (account_id: {})'.format(server.url, fixtures.account_id))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps({'requests': server.api.requests, 'responses': server.responses}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
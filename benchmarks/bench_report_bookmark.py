@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# Microbenchmark: max bookmark evaluation in the sync_report output loop
+# Compares parsing end_time and the running max_bookmark_value (strptime_to_utc, twice per record)
+#   with comparing the epoch seconds carried by transform_report records.
+# Usage: python benchmarks/bench_report_bookmark.py [--records 100000]
+import argparse
+import timeit
+from datetime import datetime, timedelta
+import pytz
+from singer.utils import strptime_to_utc, strftime
+from tap_twitter_ads.transform import END_TIME_EPOCH_KEY
+
+
+def get_records(record_count):
+    start_dttm = datetime(2022, 1, 1, tzinfo=pytz.utc)
+    records = []
+    for i in range(record_count):
+        end_dttm = start_dttm + timedelta(hours=i % (24 * 85))
+        records.append({'end_time': strftime(end_dttm), END_TIME_EPOCH_KEY: int(end_dttm.timestamp())})
+    return records
+
+
+def max_bookmark_strptime(records, max_bookmark_value):
+    for record in records:
+        end_time = record.get('end_time')
+        end_dttm = strptime_to_utc(end_time)
+        max_bookmark_dttm = strptime_to_utc(max_bookmark_value)
+        if end_dttm > max_bookmark_dttm:
+            max_bookmark_value = end_time
+    return max_bookmark_value
+
+
+def max_bookmark_epoch(records, max_bookmark_value):
+    max_bookmark_epoch_value = strptime_to_utc(max_bookmark_value).timestamp()
+    for record in records:
+        end_epoch = record.get(END_TIME_EPOCH_KEY)
+        if end_epoch > max_bookmark_epoch_value:
+            max_bookmark_epoch_value = end_epoch
+    return strftime(datetime.fromtimestamp(max_bookmark_epoch_value, pytz.utc))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    records = get_records(args.records)
+    start_bookmark = '2021-12-01T00:00:00.000000Z'
+    assert max_bookmark_strptime(records, start_bookmark) == max_bookmark_epoch(records, start_bookmark)
+
+    for name, function in [('strptime', max_bookmark_strptime), ('epoch', max_bookmark_epoch)]:
+        seconds = min(timeit.repeat(lambda: function(records, start_bookmark), number=1, repeat=args.repeat))
+        print('{:<10}{:>10.3f} s{:>14.0f} records/s'.format(name, seconds, args.records / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# Benchmark: zero-metric time slots requested by report async jobs
+# Compares one date window for every chunk of 20 entity_ids (API order) with
+#   entity_ids packed by activity window (Reports.pack_entity_id_chunks).
+# Entity activity is synthetic: a few long running entities and many short-lived ones.
+# Usage: python benchmarks/bench_report_job_packing.py [--entities 500] [--seed 1]
+import argparse
+import random
+from datetime import datetime, timedelta
+import pytz
+from tap_twitter_ads.streams import Reports
+
+DATE_WINDOW_DAYS = 85
+GRANULARITIES = ['HOUR', 'DAY', 'TOTAL']
+
+
+def get_entity_windows(entities, long_running_percent, window_start, window_end, seed):
+    rnd = random.Random(seed)
+    entity_windows = {}
+    for i in range(entities):
+        if rnd.random() * 100 < long_running_percent:
+            entity_start = window_start + timedelta(hours=rnd.randint(0, 24 * 5))
+            entity_end = window_end - timedelta(hours=rnd.randint(0, 24 * 5))
+        else:
+            entity_start = window_start + timedelta(hours=rnd.randint(0, 24 * (DATE_WINDOW_DAYS - 7)))
+            entity_end = entity_start + timedelta(hours=rnd.randint(1, 24 * 7))
+        entity_windows[str(1000 + i)] = (entity_start, entity_end)
+    return entity_windows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entities', type=int, default=500)
+    parser.add_argument('--long-running-percent', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    timezone = pytz.utc
+    window_start = datetime(2022, 1, 1, tzinfo=timezone)
+    window_end = window_start + timedelta(days=DATE_WINDOW_DAYS)
+    start_time = window_start.strftime('%Y-%m-%dT%H:%M:%S%z')
+    end_time = window_end.strftime('%Y-%m-%dT%H:%M:%S%z')
+
+    entity_windows = get_entity_windows(args.entities, args.long_running_percent, window_start, window_end, args.seed)
+    entity_ids = list(entity_windows.keys())
+
+    reports_obj = Reports()
+    print('{:<12}{:>8}{:>8}{:>16}{:>16}{:>12}'.format(
+        'granularity', 'jobs', 'packed', 'zero_slots', 'packed', 'reduction'))
+    for granularity in GRANULARITIES:
+        job_chunks = reports_obj.pack_entity_id_chunks(entity_ids, entity_windows, granularity, timezone, \
+            start_time, end_time)
+        unpacked_cost, packed_cost = reports_obj.log_job_cost('benchmark', 'ALL_ON_TWITTER', entity_ids, \
+            entity_windows, granularity, start_time, end_time, job_chunks)
+        reduction = 0
+        if unpacked_cost['zero_slots']:
+            reduction = 100 * (1 - packed_cost['zero_slots'] / unpacked_cost['zero_slots'])
+        print('{:<12}{:>8}{:>8}{:>16}{:>16}{:>11.1f}%'.format(
+            granularity, unpacked_cost['jobs'], packed_cost['jobs'],
+            unpacked_cost['zero_slots'], packed_cost['zero_slots'], reduction))
+
+
+if __name__ == '__main__':
+    main()
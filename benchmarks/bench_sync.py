@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# Benchmark: full sync pipeline (sync.sync) against synthetic API fixtures
+# twitter_ads.http.Request.perform is patched to answer from benchmarks/fixtures.py via the FakeTwitterAdsApi
+#   router (pagination, active_entities, async jobs, gzip async results), time.sleep (async job polling) is
+#   patched out and Singer messages are written to a counting sink instead of stdout.
+# Measures, per stage (each top-level stream and report): records, records/s, wall and CPU time, peak RSS;
+#   and cumulative (inclusive) time of the pipeline functions. fake_api is the fixture generation time,
+#   included in the stages and in get_resource/get_async_data.
+# --http: sync over real HTTP against the api_server.py stand-in (w/ --latency-ms, --page-size, error injection).
+# Results are written as JSON, compare two runs with benchmarks/compare.py.
+# Usage: python benchmarks/bench_sync.py [--scale 1.0] [--report-days 7] [--http] [--output results.json]
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import threading
+import functools
+import subprocess
+from datetime import timedelta
+from unittest import mock
+from singer import Transformer
+from twitter_ads.client import Client
+from twitter_ads.error import Error
+from twitter_ads.http import Request, Response
+import tap_twitter_ads.streams as streams
+from tap_twitter_ads.discover import discover
+from tap_twitter_ads.streams import TwitterAds, Reports
+from tap_twitter_ads.sync import sync
+from fixtures import Fixtures
+from fake_api import FakeTwitterAdsApi
+from api_server import serve_in_thread, add_server_arguments, get_server_options
+
+DEFAULT_STREAMS = ['campaigns', 'line_items', 'targeting_criteria', 'promoted_tweets', 'tweets']
+DEFAULT_REPORTS = [
+    {'name': 'line_items_gender_hourly_report', 'entity': 'LINE_ITEM', 'segment': 'GENDER', 'granularity': 'HOUR'},
+    {'name': 'promoted_tweets_platforms_daily_report', 'entity': 'PROMOTED_TWEET', 'segment': 'PLATFORMS', \
+        'granularity': 'DAY'}
+]
+
+
+# Counts Singer messages (lines) and bytes written to stdout
+class MessageSink:
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def write(self, data):
+        self.messages = self.messages + data.count('\n')
+        self.bytes = self.bytes + len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+# Current RSS of the process (bytes), sampled in a thread to get the peak RSS of each stage
+def get_rss():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # ru_maxrss: KB on Linux, bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+class StageProfiler:
+    def __init__(self, sample_seconds=0.01):
+        self.stages = {}
+        self.functions = {}
+        self.records = {}
+        self.current_stage = None
+        self.sample_seconds = sample_seconds
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample_rss, daemon=True)
+
+    def sample_rss(self):
+        while not self.stopped.wait(self.sample_seconds):
+            stage = self.stages.get(self.current_stage)
+            if stage is not None:
+                stage['peak_rss_bytes'] = max(stage['peak_rss_bytes'], get_rss())
+
+    def start(self):
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    # Wrapper for a top-level stage: records written, wall/CPU time and peak RSS during the call
+    def stage(self, name_getter, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            name = name_getter(*args, **kwargs)
+            if name is None or self.current_stage is not None:
+                return function(*args, **kwargs)
+            self.current_stage = name
+            stage = self.stages.setdefault(name, {'records': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, \
+                'peak_rss_bytes': get_rss()})
+            records_before = sum(self.records.values())
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stage['wall_seconds'] = stage['wall_seconds'] + time.perf_counter() - wall_start
+                stage['cpu_seconds'] = stage['cpu_seconds'] + time.process_time() - cpu_start
+                stage['records'] = stage['records'] + sum(self.records.values()) - records_before
+                stage['peak_rss_bytes'] = max(stage['peak_rss_bytes'], get_rss())
+                self.current_stage = None
+        return wrapper
+
+    # Wrapper for a pipeline function: calls, wall and thread CPU time (inclusive)
+    def function(self, name, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats = self.functions.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+                stats['calls'] = stats['calls'] + 1
+                stats['wall_seconds'] = stats['wall_seconds'] + time.perf_counter() - wall_start
+                stats['cpu_seconds'] = stats['cpu_seconds'] + time.thread_time() - cpu_start
+        return wrapper
+
+    def count_record(self, function):
+        @functools.wraps(function)
+        def wrapper(stream_obj, stream_name, record, time_extracted):
+            self.records[stream_name] = self.records.get(stream_name, 0) + 1
+            return function(stream_obj, stream_name, record, time_extracted)
+        return wrapper
+
+    def results(self):
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = dict(stage)
+            stages[name]['records_per_second'] = stage['records'] / stage['wall_seconds'] \
+                if stage['wall_seconds'] else 0
+            stages[name]['peak_rss_mb'] = round(stage['peak_rss_bytes'] / 1048576, 1)
+        return {'stages': stages, 'functions': self.functions, 'records': self.records}
+
+
+# Request.perform answered by the fake API (same Response/Error handling as the SDK)
+def get_fake_perform(api):
+    def perform(request):
+        params = request.options.get('params')
+        status, headers, body = api.handle(request.method, request.options.get('domain'), request.resource, params)
+        raw_body = body if headers.get('content-type') == 'application/gzip' else body.decode('utf-8')
+        response = Response(status, headers, raw_body=raw_body)
+        if status > 399:
+            raise Error.from_response(response)
+        return response
+    return perform
+
+
+def get_catalog(stream_names, reports):
+    catalog = discover(reports)
+    for stream in catalog.streams:
+        if stream.tap_stream_id in stream_names:
+            for entry in stream.metadata:
+                if entry.get('breadcrumb') == ():
+                    entry['metadata']['selected'] = True
+    return catalog
+
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], \
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# time module of tap_twitter_ads.streams w/o the async job polling sleep (time.sleep itself is left alone for
+#   the stand-in server latency and the SDK rate limit handling)
+class NoSleepTime:
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(seconds):
+        pass
+
+
+def run(args, extra_config=None):
+    fixtures = Fixtures(seed=args.seed, scale=args.scale)
+    server = None
+    if args.http:
+        # Real HTTP requests to the stand-in server (Request.perform is timed as http_request)
+        server = serve_in_thread(fixtures, **get_server_options(args))
+        api = server.api
+    else:
+        api = FakeTwitterAdsApi(fixtures, job_polls=args.job_polls)
+    reports = DEFAULT_REPORTS if args.reports else []
+    stream_names = list(args.streams) + [report['name'] for report in reports]
+    config = {
+        'start_date': (fixtures.now - timedelta(days=args.report_days)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'account_ids': fixtures.account_id,
+        'country_codes': 'US',
+        'attribution_window': '0',
+        'reports': reports
+    }
+    config.update(extra_config or {})
+    catalog = get_catalog(stream_names, reports)
+    client = Client('consumer_key', 'consumer_secret', 'access_token', 'access_token_secret', \
+        options={'handle_rate_limit': True, 'retry_max': 0, 'timeout': 300})
+
+    profiler = StageProfiler()
+    sink = MessageSink()
+    if server:
+        request_patches = [
+            mock.patch.object(Request, '_DEFAULT_DOMAIN', server.url),
+            mock.patch.object(Request, 'perform', profiler.function('http_request', Request.perform))
+        ]
+    else:
+        request_patches = [mock.patch.object(Request, 'perform', profiler.function('fake_api', get_fake_perform(api)))]
+    patches = request_patches + [
+        mock.patch.object(streams, 'time', NoSleepTime()),
+        mock.patch('sys.stdout', sink),
+        mock.patch.object(TwitterAds, 'sync_endpoint', profiler.stage( \
+            lambda *a, **kw: kw.get('stream_name') if kw.get('parent_ids') is None else None, \
+            TwitterAds.sync_endpoint)),
+        mock.patch.object(Reports, 'sync_report', profiler.stage( \
+            lambda *a, **kw: kw.get('report_name'), Reports.sync_report)),
+        mock.patch.object(TwitterAds, 'write_record', profiler.count_record( \
+            profiler.function('write_record', TwitterAds.write_record))),
+        mock.patch.object(TwitterAds, 'get_resource', profiler.function('get_resource', TwitterAds.get_resource)),
+        mock.patch.object(Reports, 'get_async_data', profiler.function('get_async_data', Reports.get_async_data)),
+        mock.patch.object(streams, 'transform_report', profiler.function('transform_report', \
+            streams.transform_report)),
+        mock.patch.object(Transformer, 'transform', profiler.function('singer_transformer', Transformer.transform))
+    ]
+
+    state = {}
+    profiler.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for patch in patches:
+        patch.start()
+    try:
+        sync(client, config, catalog, state)
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+        profiler.stop()
+        if server:
+            server.shutdown()
+            server.server_close()
+    wall_seconds = time.perf_counter() - wall_start
+
+    results = profiler.results()
+    total_records = sum(results['records'].values())
+    results.update({
+        'commit': get_git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'args': vars(args),
+        'total': {
+            'records': total_records,
+            'messages': sink.messages,
+            'output_bytes': sink.bytes,
+            'wall_seconds': wall_seconds,
+            'cpu_seconds': time.process_time() - cpu_start,
+            'records_per_second': total_records / wall_seconds if wall_seconds else 0,
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        },
+        'api_requests': api.requests,
+        'api_responses': server.responses if server else None
+    })
+    return results
+
+
+def print_results(results):
+    print('{:<42}{:>10}{:>12}{:>10}{:>10}{:>10}'.format('stage', 'records', 'records/s', 'wall s', 'cpu s', 'rss MB'))
+    for name, stage in results['stages'].items():
+        print('{:<42}{:>10}{:>12.0f}{:>10.2f}{:>10.2f}{:>10.1f}'.format(name, stage['records'], \
+            stage['records_per_second'], stage['wall_seconds'], stage['cpu_seconds'], stage['peak_rss_mb']))
+    total = results['total']
+    print('{:<42}{:>10}{:>12.0f}{:>10.2f}{:>10.2f}{:>10.1f}'.format('TOTAL', total['records'], \
+        total['records_per_second'], total['wall_seconds'], total['cpu_seconds'], total['peak_rss_mb']))
+    print()
+    print('{:<42}{:>10}{:>12}{:>10}'.format('function (inclusive)', 'calls', 'wall s', 'cpu s'))
+    for name, function in sorted(results['functions'].items(), key=lambda item: -item[1]['wall_seconds']):
+        print('{:<42}{:>10}{:>12.2f}{:>10.2f}'.format(name, function['calls'], function['wall_seconds'], \
+            function['cpu_seconds']))
+
+
+def get_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies the fixture record counts')
+    parser.add_argument('--report-days', type=int, default=7)
+    parser.add_argument('--streams', nargs='*', default=DEFAULT_STREAMS)
+    parser.add_argument('--no-reports', dest='reports', action='store_false')
+    parser.add_argument('--job-polls', type=int, default=2, help='job status GETs before a job is SUCCESS')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--config', help='JSON file w/ extra tap config (e.g. report_download_workers)')
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--http', action='store_true', help='sync over HTTP against the api_server.py stand-in')
+    add_server_arguments(parser)
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/sync_<commit>.json)')
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+    # singer.get_logger() re-applies its logging config, so disable the levels below --log-level instead
+    logging.disable(logging.getLevelName(args.log_level.upper()) - 1)
+    extra_config = {}
+    if args.config:
+        with open(args.config) as file:
+            extra_config = json.load(file)
+
+    results = run(args, extra_config)
+    print_results(results)
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', \
+        'sync_{}.json'.format(results['commit'] or 'local'))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print('\nResults: {}'.format(output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Compare two benchmarks/bench_sync.py results (e.g. two commits): records/s, CPU time and peak RSS per stage
+# A stage is flagged as a regression when records/s drops or CPU time / peak RSS grow by more than --threshold %.
+# Usage: python benchmarks/compare.py base.json head.json [--threshold 10]
+import sys
+import json
+import argparse
+
+
+def get_change(base, head):
+    if not base:
+        return 0.0
+    return (head - base) * 100.0 / base
+
+
+def compare(base, head, threshold):
+    rows = []
+    regressions = []
+    stages = dict(head['stages'])
+    stages['TOTAL'] = head['total']
+    base_stages = dict(base['stages'])
+    base_stages['TOTAL'] = base['total']
+    for name, stage in stages.items():
+        base_stage = base_stages.get(name)
+        if not base_stage:
+            continue
+        changes = {
+            'records_per_second': get_change(base_stage['records_per_second'], stage['records_per_second']),
+            'cpu_seconds': get_change(base_stage['cpu_seconds'], stage['cpu_seconds']),
+            'peak_rss_mb': get_change(base_stage['peak_rss_mb'], stage['peak_rss_mb'])
+        }
+        regressed = changes['records_per_second'] < -threshold or changes['cpu_seconds'] > threshold \
+            or changes['peak_rss_mb'] > threshold
+        if regressed:
+            regressions.append(name)
+        rows.append((name, base_stage, stage, changes, regressed))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=10.0, help='regression threshold (%%)')
+    args = parser.parse_args()
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.head) as file:
+        head = json.load(file)
+
+    print('base: {} ({}), head: {} ({})'.format(args.base, base.get('commit'), args.head, head.get('commit')))
+    print('{:<42}{:>14}{:>10}{:>10}{:>10}{:>10}{:>10}'.format( \
+        'stage', 'records/s', 'change', 'cpu s', 'change', 'rss MB', 'change'))
+    rows, regressions = compare(base, head, args.threshold)
+    for name, base_stage, stage, changes, regressed in rows:
+        print('{:<42}{:>14.0f}{:>9.1f}%{:>10.2f}{:>9.1f}%{:>10.1f}{:>9.1f}%{}'.format(name, \
+            stage['records_per_second'], changes['records_per_second'], stage['cpu_seconds'], \
+            changes['cpu_seconds'], stage['peak_rss_mb'], changes['peak_rss_mb'], '  REGRESSION' if regressed else ''))
+    if base['total']['records'] != head['total']['records']:
+        print('WARNING: total records differ (base: {}, head: {}), check the fixture args'.format( \
+            base['total']['records'], head['total']['records']))
+    if regressions:
+        print('Regressions (> {}%): {}'.format(args.threshold, ', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
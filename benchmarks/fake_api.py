@@ -0,0 +1,138 @@
+# Twitter Ads API stand-in for benchmarks: routes a request (method, domain, resource, params) to a
+#   fixture response (status, headers, body bytes), w/ cursor pagination and async job state transitions.
+import re
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+ASYNC_RESULTS_DOMAIN = 'https://ton.twimg.com'
+ASYNC_RESULTS_PATH = '/advertiser-api-async-analytics/{}.json.gz'
+
+# GET /{version}/accounts/{account_id}/{stream_name}: paginated endpoint streams
+ENDPOINT_STREAMS = ['campaigns', 'line_items', 'promoted_tweets', 'tweets', 'targeting_criteria']
+# Parent id params of child endpoint streams
+PARENT_ID_PARAMS = {
+    'targeting_criteria': ('line_item_ids', 'line_item_id')
+}
+
+
+class FakeTwitterAdsApi:
+    # job_polls: number of job status GETs before a job is SUCCESS
+    # rate_limit: x-rate-limit-limit header value, x-rate-limit-remaining counts down per endpoint
+    # async_results_domain: domain of the async job result urls (the stand-in server's own url)
+    def __init__(self, fixtures, job_polls=1, rate_limit=2000, async_results_domain=ASYNC_RESULTS_DOMAIN):
+        self.fixtures = fixtures
+        self.job_polls = job_polls
+        self.rate_limit = rate_limit
+        self.async_results_domain = async_results_domain
+        self.jobs = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+        self.next_job_id = 1480000000000000000
+
+    def get_headers(self, endpoint):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            remaining = max(0, self.rate_limit - self.requests[endpoint])
+        return {
+            'content-type': 'application/json;charset=utf-8',
+            'x-rate-limit-limit': str(self.rate_limit),
+            'x-rate-limit-remaining': str(remaining),
+            'x-rate-limit-reset': str(int(time.time()) + 900)
+        }
+
+    @staticmethod
+    def json_response(status, headers, body):
+        return status, headers, json.dumps(body).encode('utf-8')
+
+    @staticmethod
+    def get_param(params, key):
+        val = (params or {}).get(key)
+        if isinstance(val, list):
+            return ','.join(map(str, val))
+        return val
+
+    # Cursor pagination: cursor is the offset of the next page
+    def get_page(self, endpoint, records, params):
+        count = int(self.get_param(params, 'count') or 200)
+        offset = int(self.get_param(params, 'cursor') or 0)
+        body = {
+            'request': {'params': {}},
+            'data': records[offset:offset + count],
+            'total_count': len(records),
+            'next_cursor': str(offset + count) if offset + count < len(records) else None
+        }
+        return self.json_response(200, self.get_headers(endpoint), body)
+
+    def handle(self, method, domain, resource, params=None):
+        path = urlparse(resource).path
+        if path.startswith(ASYNC_RESULTS_PATH.split('{')[0]):
+            return self.get_async_result(path)
+        path = re.sub(r'^/\d+/', '/', path)
+
+        match = re.match(r'^/stats/jobs/accounts/([^/]+)$', path)
+        if match and method == 'post':
+            return self.post_job(params)
+        if match:
+            return self.get_job_statuses(params)
+        match = re.match(r'^/stats/accounts/([^/]+)/active_entities$', path)
+        if match:
+            active_entities = self.fixtures.get_active_entities(self.get_param(params, 'entity'), \
+                self.get_param(params, 'start_time'), self.get_param(params, 'end_time'))
+            return self.json_response(200, self.get_headers('active_entities'), {'data': active_entities})
+        match = re.match(r'^/targeting_criteria/(\w+)$', path)
+        if match:
+            return self.get_page('targeting_criteria_values', self.fixtures.get_targeting_values(match.group(1)), params)
+        if path == '/accounts':
+            return self.get_page('accounts', [self.fixtures.get_account()], params)
+        match = re.match(r'^/accounts/([^/]+)$', path)
+        if match:
+            if match.group(1) != self.fixtures.account_id:
+                return self.json_response(404, self.get_headers('accounts'), \
+                    {'errors': [{'code': 'NOT_FOUND', 'message': 'Account not found'}]})
+            return self.json_response(200, self.get_headers('accounts'), {'data': self.fixtures.get_account()})
+        match = re.match(r'^/accounts/([^/]+)/(\w+)$', path)
+        if match and match.group(2) in ENDPOINT_STREAMS:
+            stream_name = match.group(2)
+            records = self.fixtures.get_records(stream_name)
+            if stream_name in PARENT_ID_PARAMS:
+                param, field = PARENT_ID_PARAMS[stream_name]
+                parent_ids = set((self.get_param(params, param) or '').split(','))
+                records = [record for record in records if record.get(field) in parent_ids]
+            return self.get_page(stream_name, records, params)
+        return self.json_response(404, self.get_headers('other'), \
+            {'errors': [{'code': 'ROUTE_NOT_FOUND', 'message': 'No route for {} {}'.format(method, path)}]})
+
+    def post_job(self, params):
+        with self.lock:
+            self.next_job_id = self.next_job_id + 1
+            job_id = str(self.next_job_id)
+            self.jobs[job_id] = {'params': dict(params or {}), 'polls': 0}
+        body = {'data': {'id': int(job_id), 'id_str': job_id, 'status': 'QUEUED'}}
+        return self.json_response(200, self.get_headers('jobs'), body)
+
+    # Jobs are PROCESSING for job_polls status GETs, then SUCCESS w/ the result url
+    def get_job_statuses(self, params):
+        statuses = []
+        for job_id in (self.get_param(params, 'job_ids') or '').split(','):
+            job = self.jobs.get(job_id)
+            if not job:
+                continue
+            with self.lock:
+                job['polls'] = job['polls'] + 1
+                finished = job['polls'] >= self.job_polls
+            statuses.append({
+                'id': int(job_id),
+                'id_str': job_id,
+                'status': 'SUCCESS' if finished else 'PROCESSING',
+                'url': self.async_results_domain + ASYNC_RESULTS_PATH.format(job_id) if finished else None
+            })
+        return self.json_response(200, self.get_headers('jobs'), {'data': statuses, 'next_cursor': None})
+
+    def get_async_result(self, path):
+        job_id = path.rsplit('/', 1)[-1].split('.')[0]
+        job = self.jobs.get(job_id)
+        if not job:
+            return self.json_response(404, {'content-type': 'application/json'}, {'errors': []})
+        return 200, {'content-type': 'application/gzip'}, self.fixtures.get_async_result_gzip(job_id, job['params'])
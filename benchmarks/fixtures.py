@@ -0,0 +1,260 @@
+# Synthetic, deterministic Twitter Ads API payloads for benchmarks
+# Endpoint records are generated from the tap's JSON schemas (so every field is populated like the API),
+#   report async results from the report metric schemas, w/ a configurable share of active time slots.
+import json
+import gzip
+import random
+from datetime import datetime, timedelta
+import pytz
+from tap_twitter_ads.schema import get_abs_path, load_shared_schema_refs
+
+TWEET_DATETIME_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+ISO_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Metric groups -> shared schema with the group's metrics
+METRIC_GROUP_SCHEMAS = {
+    'ENGAGEMENT': 'engagement_all.json',
+    'BILLING': 'billing.json',
+    'VIDEO': 'video.json',
+    'MEDIA': 'media.json',
+    'WEB_CONVERSION': 'web_conversion.json',
+    'MOBILE_CONVERSION': 'mobile_conversion.json'
+}
+
+# Number of segment values returned for a segmentation_type
+SEGMENT_VALUES = {
+    None: 1,
+    'GENDER': 3,
+    'AGE': 10,
+    'PLATFORMS': 5,
+    'DEVICES': 60,
+    'LANGUAGES': 30,
+    'LOCATIONS': 50,
+    'REGIONS': 50,
+    'METROS': 150,
+    'INTERESTS': 200
+}
+
+# Fixture sizes (benchmark --scale multiplies the counts)
+DEFAULT_SIZES = {
+    'campaigns': 200,
+    'line_items': 2000,
+    'promoted_tweets': 3000,
+    'tweets': 5000,
+    'targeting_criteria_per_line_item': 3,
+    'active_entity_percent': 40, # share of entities active in a report window
+    'active_slot_percent': 30 # share of an active entity's time slots w/ metrics
+}
+
+
+def get_schema(stream_name):
+    with open(get_abs_path('schemas/{}.json'.format(stream_name))) as file:
+        return json.load(file)
+
+
+def base36(number):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    value = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        value = digits[remainder] + value
+        if number == 0:
+            return value
+
+
+class Fixtures:
+    def __init__(self, account_id='18ce54d4x5t', seed=1, scale=1.0, now=None, sizes=None):
+        self.account_id = account_id
+        self.seed = seed
+        self.now = now or datetime.now(pytz.utc).replace(minute=0, second=0, microsecond=0)
+        self.sizes = dict(DEFAULT_SIZES)
+        self.sizes.update(sizes or {})
+        for key in ('campaigns', 'line_items', 'promoted_tweets', 'tweets'):
+            self.sizes[key] = max(1, int(self.sizes[key] * scale))
+        self.refs = load_shared_schema_refs()
+        self.collections = {}
+
+    def rnd(self, *keys):
+        return random.Random('{}-{}'.format(self.seed, '-'.join(map(str, keys))))
+
+    # Value for a JSON schema node
+    def value_from_schema(self, schema, rnd, depth=0):
+        if 'anyOf' in schema:
+            schemas = [sub_schema for sub_schema in schema['anyOf'] if sub_schema.get('type') != 'null']
+            return self.value_from_schema(schemas[0], rnd, depth) if schemas else None
+        json_types = schema.get('type', [])
+        if isinstance(json_types, str):
+            json_types = [json_types]
+        if 'object' in json_types:
+            if depth > 3:
+                return None
+            return {key: self.value_from_schema(val, rnd, depth + 1) \
+                for key, val in schema.get('properties', {}).items()}
+        if 'array' in json_types:
+            if depth > 3:
+                return []
+            return [self.value_from_schema(schema.get('items', {}), rnd, depth + 1) for _ in range(rnd.randint(0, 3))]
+        if 'integer' in json_types:
+            return rnd.randint(0, 10000000)
+        if 'number' in json_types:
+            return round(rnd.random() * 1000, 4)
+        if 'boolean' in json_types:
+            return rnd.random() < 0.5
+        if 'string' in json_types:
+            if schema.get('format') == 'date-time':
+                return (self.now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365))).strftime(ISO_DATETIME_FORMAT)
+            if 'enum' in schema:
+                return rnd.choice([val for val in schema['enum'] if val is not None])
+            return ''.join(rnd.choice('abcdefghijklmnopqrstuvwxyz ') for _ in range(rnd.randint(5, 40)))
+        return None
+
+    # Records of an endpoint stream (sorted like the API: updated_at/created_at desc)
+    def get_records(self, stream_name):
+        if stream_name in self.collections:
+            return self.collections[stream_name]
+        schema = get_schema(stream_name)
+        rnd = self.rnd(stream_name)
+        records = []
+        if stream_name == 'targeting_criteria':
+            for line_item in self.get_records('line_items'):
+                for i in range(self.sizes['targeting_criteria_per_line_item']):
+                    record = self.value_from_schema(schema, rnd)
+                    record.update({'id': '{}{}'.format(line_item['id'], i), 'line_item_id': line_item['id'], \
+                        'account_id': self.account_id})
+                    records.append(record)
+        else:
+            for i in range(self.sizes.get(stream_name, 10)):
+                record = self.value_from_schema(schema, rnd)
+                record['id'] = base36(36 ** 4 + i * 7919)
+                record['account_id'] = self.account_id
+                updated_dttm = self.now - timedelta(minutes=i * 17)
+                if 'updated_at' in record:
+                    record['updated_at'] = updated_dttm.strftime(ISO_DATETIME_FORMAT)
+                if stream_name == 'tweets':
+                    record['id'] = 1480000000000000000 + i
+                    record['id_str'] = str(record['id'])
+                    record['created_at'] = updated_dttm.strftime(TWEET_DATETIME_FORMAT)
+                if stream_name == 'line_items':
+                    record['campaign_id'] = base36(36 ** 4 + (i % self.sizes['campaigns']) * 7919)
+                records.append(record)
+        self.collections[stream_name] = records
+        return records
+
+    def get_account(self):
+        return {
+            'id': self.account_id,
+            'name': 'Benchmark Account',
+            'timezone': 'America/Los_Angeles',
+            'timezone_switch_at': '2019-01-01T08:00:00Z',
+            'business_id': None,
+            'business_name': None,
+            'approval_status': 'ACCEPTED',
+            'deleted': False,
+            'created_at': '2019-01-01T08:00:00Z',
+            'updated_at': self.now.strftime(ISO_DATETIME_FORMAT),
+            'salt': 'abc',
+            'industry_type': 'RETAIL'
+        }
+
+    def get_targeting_values(self, targeting_type):
+        count = 5 if targeting_type == 'platforms' else 1
+        return [{'name': '{}_{}'.format(targeting_type, i), 'targeting_type': targeting_type.upper(), \
+            'targeting_value': base36(1000 + i)} for i in range(count)]
+
+    # Active entities of a report entity type in a window: ids of the entity stream w/ activity windows
+    def get_active_entities(self, entity, start_time, end_time):
+        stream_name = {'CAMPAIGN': 'campaigns', 'LINE_ITEM': 'line_items', 'PROMOTED_TWEET': 'promoted_tweets', \
+            'FUNDING_INSTRUMENT': 'campaigns', 'MEDIA_CREATIVE': 'promoted_tweets', \
+            'PROMOTED_ACCOUNT': 'campaigns'}.get(entity, 'line_items')
+        rnd = self.rnd('active_entities', entity, start_time)
+        window_start = datetime.strptime(start_time[:19], '%Y-%m-%dT%H:%M:%S')
+        window_end = datetime.strptime(end_time[:19], '%Y-%m-%dT%H:%M:%S')
+        window_hours = max(1, int((window_end - window_start).total_seconds() / 3600))
+        active_entities = []
+        for record in self.get_records(stream_name):
+            if rnd.random() * 100 >= self.sizes['active_entity_percent']:
+                continue
+            activity_start = window_start + timedelta(hours=rnd.randint(0, window_hours - 1))
+            activity_end = activity_start + timedelta(hours=rnd.randint(1, window_hours))
+            if activity_end > window_end:
+                activity_end = window_end
+            placements = ['ALL_ON_TWITTER'] if rnd.random() < 0.8 else ['ALL_ON_TWITTER', 'PUBLISHER_NETWORK']
+            active_entities.append({
+                'entity_id': record['id'],
+                'activity_start_time': activity_start.strftime(ISO_DATETIME_FORMAT),
+                'activity_end_time': activity_end.strftime(ISO_DATETIME_FORMAT),
+                'placements': placements
+            })
+        return active_entities
+
+    def get_metric_names(self, metric_groups):
+        metric_names = []
+        for metric_group in metric_groups:
+            schema_file = METRIC_GROUP_SCHEMAS.get(metric_group)
+            if not schema_file:
+                continue
+            for key, val in self.refs[schema_file]['properties'].items():
+                sub_keys = None
+                if '$ref' in val:
+                    sub_keys = list(self.refs[val['$ref']]['properties'])
+                metric_names.append((key, sub_keys))
+        return metric_names
+
+    # Async job result for the job params (POST stats/jobs/accounts/{account_id})
+    def get_async_result(self, job_id, params):
+        granularity = params.get('granularity')
+        start_dttm = datetime.strptime(params.get('start_time')[:19], '%Y-%m-%dT%H:%M:%S')
+        end_dttm = datetime.strptime(params.get('end_time')[:19], '%Y-%m-%dT%H:%M:%S')
+        hours = max(1, int((end_dttm - start_dttm).total_seconds() / 3600))
+        if granularity == 'HOUR':
+            time_series_length = hours
+        elif granularity == 'DAY':
+            time_series_length = max(1, hours // 24)
+        else:
+            time_series_length = 1
+        segmentation_type = params.get('segmentation_type')
+        segment_count = SEGMENT_VALUES.get(segmentation_type, 20)
+        metric_names = self.get_metric_names((params.get('metric_groups') or 'ENGAGEMENT').split(','))
+        rnd = self.rnd('async_result', job_id)
+
+        data = []
+        for entity_id in (params.get('entity_ids') or '').split(','):
+            id_data = []
+            for segment_index in range(segment_count):
+                segment = None
+                if segmentation_type:
+                    segment = {'segment_name': '{}_{}'.format(segmentation_type.lower(), segment_index), \
+                        'segment_value': base36(segment_index)}
+                active = [rnd.random() * 100 < self.sizes['active_slot_percent'] for _ in range(time_series_length)]
+                metrics = {}
+                for key, sub_keys in metric_names:
+                    if sub_keys:
+                        metrics[key] = {sub_key: [rnd.randint(0, 5) if slot_active else None for slot_active in active] \
+                            for sub_key in sub_keys[:3]}
+                    else:
+                        metrics[key] = [rnd.randint(0, 500) if slot_active else None for slot_active in active]
+                id_data.append({'segment': segment, 'metrics': metrics})
+            data.append({'id': entity_id, 'id_data': id_data})
+
+        return {
+            'data_type': 'stats',
+            'time_series_length': time_series_length,
+            'data': data,
+            'request': {
+                'params': {
+                    'start_time': params.get('start_time'),
+                    'end_time': params.get('end_time'),
+                    'entity': params.get('entity'),
+                    'entity_ids': (params.get('entity_ids') or '').split(','),
+                    'granularity': granularity,
+                    'placement': params.get('placement'),
+                    'segmentation_type': segmentation_type,
+                    'country': params.get('country'),
+                    'platform': params.get('platform'),
+                    'metric_groups': (params.get('metric_groups') or '').split(',')
+                }
+            }
+        }
+
+    def get_async_result_gzip(self, job_id, params):
+        return gzip.compress(json.dumps(self.get_async_result(job_id, params)).encode('utf-8'), compresslevel=6)
@@ -19,6 +19,9 @@ setup(name='tap-twitter-ads',
               'pylint',
               'ipdb',
               'nose',
+          ],
+          'columnar': [
+              'pyarrow'
           ]
       },
       entry_points='''
@@ -3,16 +3,19 @@
 import sys
 import json
 import argparse
-from twitter_ads.client import Client
 import singer
 from singer import metadata, utils
 from tap_twitter_ads.discover import discover
-from tap_twitter_ads.sync import sync as _sync
-from tap_twitter_ads.streams import TwitterAds
+from tap_twitter_ads.exceptions import TwitterAdsClientError, TwitterAdsUnauthorizedError
+from tap_twitter_ads.credentials import get_credential_cache_ttl, get_credential_hash, is_validated, \
+    save_validation
 
+# The Twitter Ads SDK (requests, oauthlib), streams, sync and plan are imported by the code paths
+#   that use them, not when the package is imported (faster start of --discover and small syncs)
 
 LOGGER = singer.get_logger()
 REQUEST_TIMEOUT = 300 # 5 minutes default timeout
+ACCOUNT_IDS_LIMIT = 200 # max account_ids of a GET accounts request
 
 REQUIRED_CONFIG_KEYS = [
     'start_date',
@@ -23,39 +26,75 @@ REQUIRED_CONFIG_KEYS = [
     'account_ids'
 ]
 
+# tap_twitter_ads.Client (Twitter Ads SDK), imported on first use (see get_client)
+def __getattr__(name):
+    if name == 'Client':
+        from twitter_ads.client import Client # pylint: disable=import-outside-toplevel
+        return Client
+    raise AttributeError('module {} has no attribute {}'.format(__name__, name))
+
+
+# Ids of the accounts of the tokens among account_ids (one GET accounts request)
+def get_account_ids(client, twitter_ads_client, account_ids):
+    accounts_params = {
+        'account_ids': ','.join(account_ids),
+        'count': 1000,
+        'cursor': None
+    }
+    accounts = twitter_ads_client.get_resource('accounts', client, 'accounts', accounts_params)
+    return [twitter_ads_client.obj_to_dict(account).get('id') for account in accounts]
+
+
 def check_credentials(client, twitter_ads_client, account_ids):
     """
         Checking credentials for the discover mode
     """
-    # check whether tokens are valid or not
-    twitter_ads_client.get_resource('accounts', client, 'accounts')
-    invalid_account_ids = []
-    # check whether account ids are valid or not
-    for account_id in account_ids.replace(' ', '').split(','):
+    account_id_list = account_ids.replace(' ', '').split(',')
+    # check whether tokens and account ids are valid: the accounts of the tokens, requested by account_ids
+    #   (one request per ACCOUNT_IDS_LIMIT accounts, not one request per account)
+    valid_account_ids = set()
+    for chunk_start in range(0, len(account_id_list), ACCOUNT_IDS_LIMIT):
+        account_id_chunk = account_id_list[chunk_start:chunk_start + ACCOUNT_IDS_LIMIT]
         try:
-            client.accounts(account_id)
-        except Exception as e:
-            invalid_account_ids.append(account_id)
+            valid_account_ids.update(get_account_ids(client, twitter_ads_client, account_id_chunk))
+        except TwitterAdsUnauthorizedError:
+            raise
+        except TwitterAdsClientError as err:
+            # The batch is rejected (e.g. w/ an invalid or unauthorized account id):
+            #   each account is checked, to name the invalid ones
+            LOGGER.warning('Accounts request failed, checking each account: {}'.format(err))
+            for account_id in account_id_chunk:
+                try:
+                    valid_account_ids.update(get_account_ids(client, twitter_ads_client, [account_id]))
+                except TwitterAdsUnauthorizedError:
+                    raise
+                except TwitterAdsClientError:
+                    pass
+    invalid_account_ids = [account_id for account_id in account_id_list if account_id not in valid_account_ids]
 
     if invalid_account_ids:
         error_message = 'Invalid Twitter Ads accounts provided during the configuration:{}'.format(invalid_account_ids)
         raise Exception(error_message) from None
 
 
-def do_discover(reports, client, account_ids):
+# client: None if the credentials and accounts were validated in the last credential_cache_ttl seconds
+#   (see main, the SDK and streams are then not imported); else validated and cached by credential_hash
+def do_discover(reports, client, account_ids, credential_cache_ttl=0, credential_hash=None):
     LOGGER.info('Starting discover')
-    check_credentials(client, TwitterAds(), account_ids) # validating credentials
+    if client is None:
+        LOGGER.info('Credentials and accounts validated in the last {} seconds'.format(credential_cache_ttl))
+    else:
+        from tap_twitter_ads.streams import TwitterAds # pylint: disable=import-outside-toplevel
+        check_credentials(client, TwitterAds(), account_ids) # validating credentials
+        if credential_cache_ttl and credential_hash:
+            save_validation(credential_hash, credential_cache_ttl)
     catalog = discover(reports)
     json.dump(catalog.to_dict(), sys.stdout, indent=2)
     LOGGER.info('Finished discover')
 
 
-@singer.utils.handle_top_exception(LOGGER)
-def main():
-
-    parsed_args = singer.utils.parse_args(REQUIRED_CONFIG_KEYS)
-
-    config = parsed_args.config
+# Twitter Ads SDK client of the config (tap_twitter_ads.Client, the SDK is imported on first use)
+def get_client(config):
     request_timeout = config.get('request_timeout')
     # if request_timeout is other than 0, "0" or "" then use request_timeout
     if request_timeout and float(request_timeout):
@@ -65,7 +104,8 @@ def main():
 
     # Twitter Ads SDK Reference: https://github.com/twitterdev/twitter-python-ads-sdk
     # Client reference: https://github.com/twitterdev/twitter-python-ads-sdk#rate-limit-handling-and-request-options
-    client = Client(
+    client_class = getattr(sys.modules[__name__], 'Client')
+    return client_class(
         consumer_key=config.get('consumer_key'),
         consumer_secret=config.get('consumer_secret'),
         access_token=config.get('access_token'),
@@ -78,6 +118,18 @@ def main():
             'retry_on_status': [400, 420, 500, 502, 503, 504],
             'retry_on_timeouts': True,
             'timeout': request_timeout}) # connect and read timeout in seconds
+
+
+@singer.utils.handle_top_exception(LOGGER)
+def main():
+
+    # --plan (w/ --catalog): print the sync plan instead of syncing; not a singer-python argument
+    plan_mode = '--plan' in sys.argv
+    if plan_mode:
+        sys.argv.remove('--plan')
+    parsed_args = singer.utils.parse_args(REQUIRED_CONFIG_KEYS)
+
+    config = parsed_args.config
     state = {}
     if parsed_args.state:
         state = parsed_args.state
@@ -87,8 +139,25 @@ def main():
     reports = config.get('reports', {})
 
     if parsed_args.discover:
-        do_discover(reports, client, config.get("account_ids"))
+        # Credentials and accounts validated in the last credential_cache_ttl seconds (cached by a hash of
+        #   the config) are not validated again, w/o creating the SDK client
+        credential_cache_ttl = get_credential_cache_ttl(config)
+        credential_hash = get_credential_hash(config)
+        client = None
+        if not credential_cache_ttl or not is_validated(credential_hash, credential_cache_ttl):
+            client = get_client(config)
+        do_discover(reports, client, config.get("account_ids"), credential_cache_ttl, credential_hash)
+        return
+
+    client = get_client(config)
+    if parsed_args.catalog and plan_mode:
+        from tap_twitter_ads.plan import plan as _plan # pylint: disable=import-outside-toplevel
+        _plan(client=client,
+              config=config,
+              catalog=catalog,
+              state=state)
     elif parsed_args.catalog:
+        from tap_twitter_ads.sync import sync as _sync # pylint: disable=import-outside-toplevel
         _sync(client=client,
              config=config,
              catalog=catalog,
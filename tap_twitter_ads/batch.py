@@ -0,0 +1,119 @@
+import os
+import gzip
+import uuid
+import simplejson as json
+import singer
+
+LOGGER = singer.get_logger()
+
+# Defaults for batch messages (config batch_max_records, batch_max_bytes, batch_dir)
+DEFAULT_BATCH_MAX_RECORDS = 10000
+DEFAULT_BATCH_MAX_BYTES = 50000000 # uncompressed JSONL bytes
+DEFAULT_BATCH_DIR = 'batches'
+
+
+# BATCH message: references gzip compressed JSONL files with the records of a stream.
+# Same format as the Singer SDK BATCH message:
+#   {"type": "BATCH", "stream": "tweets", "encoding": {"format": "jsonl", "compression": "gzip"},
+#    "manifest": ["file:///path/to/tweets-<uuid>.jsonl.gz"]}
+class BatchMessage(singer.Message):
+    def __init__(self, stream, manifest, encoding=None):
+        self.stream = stream
+        self.manifest = manifest
+        self.encoding = encoding or {'format': 'jsonl', 'compression': 'gzip'}
+
+    def asdict(self):
+        return {
+            'type': 'BATCH',
+            'stream': self.stream,
+            'encoding': self.encoding,
+            'manifest': self.manifest
+        }
+
+    def __str__(self):
+        return str(self.asdict())
+
+
+# Returns a BatchWriter if batch messages are enabled in the config (batch_messages), else None
+def get_batch_writer(tap_config):
+    if str(tap_config.get('batch_messages', 'false')).lower() != 'true':
+        return None
+    return BatchWriter(
+        batch_dir=tap_config.get('batch_dir') or DEFAULT_BATCH_DIR,
+        max_records=int(tap_config.get('batch_max_records') or DEFAULT_BATCH_MAX_RECORDS),
+        max_bytes=int(tap_config.get('batch_max_bytes') or DEFAULT_BATCH_MAX_BYTES))
+
+
+# Accumulates records by stream into gzip JSONL batch files and writes BATCH messages
+# Records of a stream are held in memory and written as RECORD messages when flushed,
+#   until the stream reaches max_records or max_bytes (over the run); its records are then written to batch files.
+# Batch files are closed and their BATCH messages written when they reach max_records or max_bytes,
+#   and on flush(), which must be called before each STATE message.
+class BatchWriter:
+    def __init__(self, batch_dir, max_records=DEFAULT_BATCH_MAX_RECORDS, max_bytes=DEFAULT_BATCH_MAX_BYTES):
+        self.batch_dir = batch_dir
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        # stream_name: {'batch': bool, 'records': [(record, time_extracted)], 'lines': [],
+        #   'record_count': 0, 'bytes': 0, 'file': None, 'file_path': None}
+        self.streams = {}
+
+    def write_record(self, stream_name, record, time_extracted=None):
+        stream = self.streams.get(stream_name)
+        if stream is None:
+            stream = {'batch': False, 'records': [], 'lines': [], 'record_count': 0, 'bytes': 0, \
+                'file': None, 'file_path': None}
+            self.streams[stream_name] = stream
+
+        line = json.dumps(record, use_decimal=True) + '\n'
+        stream['record_count'] = stream['record_count'] + 1
+        stream['bytes'] = stream['bytes'] + len(line)
+
+        if not stream['batch']:
+            # Small stream (so far): hold the record, to write as a RECORD message
+            stream['records'].append((record, time_extracted))
+            stream['lines'].append(line)
+            if stream['record_count'] < self.max_records and stream['bytes'] < self.max_bytes:
+                return
+            # Large stream: switch to batch files, starting w/ the held records
+            stream['batch'] = True
+            self.open_batch_file(stream_name, stream)
+            stream['file'].write(''.join(stream['lines']).encode('utf-8'))
+            stream['record_count'] = len(stream['lines'])
+            stream['bytes'] = sum(len(held_line) for held_line in stream['lines'])
+            stream['records'] = []
+            stream['lines'] = []
+        else:
+            if stream['file'] is None:
+                self.open_batch_file(stream_name, stream)
+            stream['file'].write(line.encode('utf-8'))
+
+        if stream['record_count'] >= self.max_records or stream['bytes'] >= self.max_bytes:
+            self.close_batch_file(stream_name, stream)
+
+    def open_batch_file(self, stream_name, stream):
+        os.makedirs(self.batch_dir, exist_ok=True)
+        stream['file_path'] = os.path.abspath(os.path.join(self.batch_dir, '{}-{}.jsonl.gz'.format(
+            stream_name, uuid.uuid4().hex)))
+        stream['file'] = gzip.open(stream['file_path'], 'wb', compresslevel=6)
+
+    # Close the stream's batch file and write its BATCH message
+    def close_batch_file(self, stream_name, stream):
+        stream['file'].close()
+        singer.write_message(BatchMessage(stream_name, ['file://{}'.format(stream['file_path'])]))
+        LOGGER.info('Stream: {} - BATCH file: {}, records: {}'.format(
+            stream_name, stream['file_path'], stream['record_count']))
+        stream['file'] = None
+        stream['file_path'] = None
+        stream['record_count'] = 0
+        stream['bytes'] = 0
+
+    # Write held records as RECORD messages and close open batch files (before STATE messages)
+    def flush(self):
+        for stream_name, stream in self.streams.items():
+            if stream['file'] is not None:
+                self.close_batch_file(stream_name, stream)
+            for record, time_extracted in stream['records']:
+                singer.messages.write_record(stream_name, record, time_extracted=time_extracted)
+            stream['records'] = []
+            stream['lines'] = []
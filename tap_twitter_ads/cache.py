@@ -0,0 +1,55 @@
+import os
+import stat
+import singer
+
+LOGGER = singer.get_logger()
+
+CACHE_DIR_NAME = 'tap-twitter-ads'
+
+
+# Per-user cache directory: $XDG_CACHE_HOME/tap-twitter-ads, ~/.cache/tap-twitter-ads by default
+def get_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, CACHE_DIR_NAME)
+
+
+def get_cache_path(file_name):
+    return os.path.join(get_cache_dir(), file_name)
+
+
+# A cache file is only trusted if it is a regular file owned by the user, w/o group/other permissions
+def is_private_file(file_stat):
+    if hasattr(os, 'getuid') and file_stat.st_uid != os.getuid():
+        return False
+    return stat.S_ISREG(file_stat.st_mode) and not file_stat.st_mode & 0o077
+
+
+# Content of a cache file, None if it does not exist or is not private to the user (see is_private_file)
+def read_cache_file(path):
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+    except OSError:
+        return None
+    with open(fd, encoding='utf-8') as file:
+        if not is_private_file(os.fstat(fd)):
+            LOGGER.warning('Cache file ignored, not private to the user: {}'.format(path))
+            return None
+        return file.read()
+
+
+# Write a cache file readable by the user only (0600, in a 0700 directory).
+# Written to a temp file and moved, a partial file is never read; returns False if not written
+def write_cache_file(path, content):
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        # A stale temp file is replaced, the new one is created w/ the user only permissions
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+    except OSError as err:
+        LOGGER.warning('Cache file not written: {}: {}'.format(path, err))
+        return False
+    return True
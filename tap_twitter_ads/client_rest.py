@@ -9,6 +9,7 @@ from requests_oauthlib import OAuth1
 
 from singer import metrics
 import singer
+from tap_twitter_ads.rate_limits import RATE_LIMITS
 
 LOGGER = singer.get_logger()
 
@@ -230,6 +231,7 @@ class TwitterClient(object):
 
         # Rate Limit reference: https://developer.twitter.com/en/docs/basics/rate-limiting
         # LOGGER.info('headers = {}'.format(response.headers))
+        RATE_LIMITS.record_response(url, response.status_code, response.headers)
         rate_limit = int(response.headers.get('x-rate-limit-limit'))
         rate_limit_remaining = int(response.headers.get('x-rate-limit-remaining'))
         rate_limit_reset = int(response.headers.get('x-rate-limit-reset'))
@@ -241,6 +243,7 @@ class TwitterClient(object):
                 rate_limit, rate_limit_remaining, int(rate_limit_percent_remaining)))
             wait_time = rate_limit_reset - int(time.time())
             LOGGER.warning('Waiting for {} seconds.'.format(wait_time))
+            RATE_LIMITS.record_sleep(int(wait_time))
             time.sleep(int(wait_time))
 
         if response.status_code in (420, 429):
@@ -0,0 +1,178 @@
+import os
+from datetime import timezone
+import singer
+from singer import utils
+from tap_twitter_ads.transform import get_selected_properties
+
+LOGGER = singer.get_logger()
+
+# Report output formats (config report_output_format)
+# singer: report rows are Singer RECORD messages (default)
+# arrow/parquet: report rows are written to one local file per report, account and date window;
+#   the report stream only carries a manifest record for each file.
+#   Rows skip the Singer Transformer: columns are the selected top-level fields (see get_arrow_schema),
+#   nested field selection and schema validation are not applied.
+OUTPUT_FORMATS = ['singer', 'arrow', 'parquet']
+FILE_EXTENSIONS = {
+    'arrow': 'arrow',
+    'parquet': 'parquet'
+}
+
+# Schema of the report stream in arrow/parquet output format: one record per file
+MANIFEST_KEY_PROPERTIES = ['file_path']
+MANIFEST_SCHEMA = {
+    'type': ['null', 'object'],
+    'additionalProperties': False,
+    'properties': {
+        'file_path': {'type': ['null', 'string']},
+        'format': {'type': ['null', 'string']},
+        'report_name': {'type': ['null', 'string']},
+        'account_id': {'type': ['null', 'string']},
+        'window_start': {'type': ['null', 'string'], 'format': 'date-time'},
+        'window_end': {'type': ['null', 'string'], 'format': 'date-time'},
+        'record_count': {'type': ['null', 'integer']},
+        'file_size': {'type': ['null', 'integer']},
+        'columns': {'type': ['null', 'array'], 'items': {'type': ['null', 'string']}},
+        'created_at': {'type': ['null', 'string'], 'format': 'date-time'}
+    }
+}
+
+
+def get_output_format(tap_config):
+    output_format = str(tap_config.get('report_output_format') or 'singer').lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise RuntimeError('Invalid report_output_format: {}, must be one of: {}'.format(
+            output_format, ', '.join(OUTPUT_FORMATS)))
+    return output_format
+
+
+# pyarrow is an optional dependency: pip install tap-twitter-ads[columnar]
+def import_pyarrow():
+    try:
+        import pyarrow # pylint: disable=import-outside-toplevel
+        import pyarrow.compute # pylint: disable=import-outside-toplevel,unused-import
+        import pyarrow.ipc # pylint: disable=import-outside-toplevel,unused-import
+        import pyarrow.parquet # pylint: disable=import-outside-toplevel,unused-import
+    except ImportError as err:
+        raise ImportError('report_output_format arrow/parquet requires pyarrow, ' \
+            'install it with: pip install tap-twitter-ads[columnar]') from err
+    return pyarrow
+
+
+# Arrow type for a JSON schema node (resolved, no $ref)
+# object -> struct, array -> list, date-time string -> timestamp (UTC)
+def get_arrow_type(pa, schema):
+    json_types = schema.get('type', [])
+    if isinstance(json_types, str):
+        json_types = [json_types]
+    if 'object' in json_types:
+        properties = schema.get('properties')
+        if not properties:
+            return pa.string()
+        return pa.struct([pa.field(key, get_arrow_type(pa, val)) for key, val in properties.items()])
+    if 'array' in json_types:
+        return pa.list_(get_arrow_type(pa, schema.get('items', {})))
+    if 'integer' in json_types:
+        return pa.int64()
+    if 'number' in json_types:
+        return pa.float64()
+    if 'boolean' in json_types:
+        return pa.bool_()
+    if 'string' in json_types and schema.get('format') == 'date-time':
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+
+# Arrow schema for a report, from its JSON schema and catalog metadata
+def get_arrow_schema(pa, schema, stream_metadata):
+    selected_properties = get_selected_properties(schema, stream_metadata)
+    return pa.schema([pa.field(key, get_arrow_type(pa, val)) for key, val in selected_properties.items()])
+
+
+# Records are built with date-time values as strings, then cast to timestamps by column
+def get_string_type(pa, arrow_type):
+    if pa.types.is_struct(arrow_type):
+        return pa.struct([pa.field(field.name, get_string_type(pa, field.type)) for field in arrow_type])
+    if pa.types.is_list(arrow_type):
+        return pa.list_(get_string_type(pa, arrow_type.value_type))
+    if pa.types.is_timestamp(arrow_type):
+        return pa.string()
+    return arrow_type
+
+
+def cast_array(pa, array, arrow_type):
+    if array.type == arrow_type:
+        return array
+    if pa.types.is_struct(arrow_type):
+        children = [cast_array(pa, array.field(i), field.type) for i, field in enumerate(arrow_type)]
+        return pa.StructArray.from_arrays(children, fields=list(arrow_type), mask=array.is_null())
+    # Child values of null structs are empty strings
+    array = pa.compute.if_else(pa.compute.equal(array, ''), pa.scalar(None, array.type), array)
+    return array.cast(arrow_type)
+
+
+# Writes the report rows of a date window to one Arrow IPC or Parquet file
+# The file is written to a temporary path and renamed on close, so a manifest only points at complete files.
+class ColumnarWriter:
+    def __init__(self, output_format, output_dir, report_name, account_id, window_start, window_end, \
+        schema, stream_metadata):
+        self.pa = import_pyarrow()
+        self.output_format = output_format
+        self.report_name = report_name
+        self.account_id = account_id
+        self.window_start = window_start
+        self.window_end = window_end
+        self.arrow_schema = get_arrow_schema(self.pa, schema, stream_metadata)
+        self.string_schema = self.pa.schema([self.pa.field(field.name, get_string_type(self.pa, field.type)) \
+            for field in self.arrow_schema])
+
+        file_name = '{}_{}_{}.{}'.format(account_id, window_start.strftime('%Y%m%dT%H%M%S'), \
+            window_end.strftime('%Y%m%dT%H%M%S'), FILE_EXTENSIONS[output_format])
+        self.file_path = os.path.abspath(os.path.join(output_dir, report_name, file_name))
+        self.tmp_file_path = '{}.tmp'.format(self.file_path)
+        self.writer = None
+        self.record_count = 0
+
+    def write_records(self, records):
+        if not records:
+            return
+        batch = self.pa.RecordBatch.from_pylist(records, schema=self.string_schema)
+        columns = [cast_array(self.pa, column, field.type) for column, field in zip(batch.columns, self.arrow_schema)]
+        batch = self.pa.RecordBatch.from_arrays(columns, schema=self.arrow_schema)
+        if self.writer is None:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            if self.output_format == 'parquet':
+                self.writer = self.pa.parquet.ParquetWriter(self.tmp_file_path, self.arrow_schema)
+            else:
+                self.writer = self.pa.ipc.new_file(self.tmp_file_path, self.arrow_schema)
+        self.writer.write_batch(batch)
+        self.record_count = self.record_count + len(records)
+
+    # Close the file and return its manifest record (None if no records were written)
+    def close(self):
+        if self.writer is None:
+            return None
+        self.writer.close()
+        self.writer = None
+        os.replace(self.tmp_file_path, self.file_path)
+        LOGGER.info('Report: {} - Wrote {} records to {}'.format(self.report_name, self.record_count, self.file_path))
+        return {
+            'file_path': self.file_path,
+            'format': self.output_format,
+            'report_name': self.report_name,
+            'account_id': self.account_id,
+            'window_start': utils.strftime(self.window_start.astimezone(timezone.utc)),
+            'window_end': utils.strftime(self.window_end.astimezone(timezone.utc)),
+            'record_count': self.record_count,
+            'file_size': os.path.getsize(self.file_path),
+            'columns': self.arrow_schema.names,
+            'created_at': utils.strftime(utils.now())
+        }
+
+    # Remove a partially written file (sync error)
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if os.path.exists(self.tmp_file_path):
+            os.remove(self.tmp_file_path)
@@ -0,0 +1,59 @@
+import json
+import time
+import hashlib
+from tap_twitter_ads.cache import get_cache_path, read_cache_file, write_cache_file
+
+# Successful credential validations (discover mode) are cached for credential_cache_ttl seconds,
+#   if set (opt-in: revoked tokens or removed accounts pass discovery until the validation expires)
+DEFAULT_CREDENTIAL_CACHE_TTL = 0
+CREDENTIAL_CACHE_FILE = 'credentials.json'
+CREDENTIAL_KEYS = ['consumer_key', 'consumer_secret', 'access_token', 'access_token_secret']
+
+
+def get_credential_cache_ttl(tap_config):
+    ttl = tap_config.get('credential_cache_ttl')
+    if ttl is None or ttl == '':
+        return DEFAULT_CREDENTIAL_CACHE_TTL
+    return max(int(ttl), 0)
+
+
+# In the user's cache directory (see cache.get_cache_dir)
+def get_credential_cache_path():
+    return get_cache_path(CREDENTIAL_CACHE_FILE)
+
+
+# Hash of the OAuth credentials and account ids of the config (the cache never holds the credentials)
+def get_credential_hash(tap_config):
+    digest = hashlib.sha256()
+    account_ids = str(tap_config.get('account_ids') or '').replace(' ', '').split(',')
+    for value in [tap_config.get(key) for key in CREDENTIAL_KEYS] + sorted(account_ids):
+        digest.update(str(value).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+# Validation times (epoch seconds) by credential hash, w/o expired validations
+def load_validations(ttl):
+    validations_json = read_cache_file(get_credential_cache_path())
+    if validations_json is None:
+        return {}
+    try:
+        validations = json.loads(validations_json)
+    except ValueError:
+        return {}
+    if not isinstance(validations, dict):
+        return {}
+    now = time.time()
+    return {credential_hash: validated_at for credential_hash, validated_at in validations.items() \
+        if isinstance(validated_at, (int, float)) and now - validated_at < ttl}
+
+
+def is_validated(credential_hash, ttl):
+    return credential_hash in load_validations(ttl)
+
+
+def save_validation(credential_hash, ttl):
+    validations = load_validations(ttl)
+    validations[credential_hash] = time.time()
+    # Readable by the user only, not written on error (validations are only a cache)
+    write_cache_file(get_credential_cache_path(), json.dumps(validations))
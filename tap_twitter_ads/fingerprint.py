@@ -0,0 +1,83 @@
+import os
+import json
+import hashlib
+import singer
+
+LOGGER = singer.get_logger()
+
+DEFAULT_FINGERPRINT_PATH = 'fingerprints.json'
+
+# Schema of the tombstone field added to streams w/ fingerprints
+DELETED_AT_FIELD = '_sdc_deleted_at'
+DELETED_AT_SCHEMA = {
+    'type': ['null', 'string'],
+    'format': 'date-time'
+}
+
+
+# Returns a FingerprintIndex if fingerprints are enabled in the config (full_table_fingerprints), else None
+def get_fingerprint_index(tap_config):
+    if str(tap_config.get('full_table_fingerprints', 'false')).lower() != 'true':
+        return None
+    return FingerprintIndex(tap_config.get('fingerprint_path') or DEFAULT_FINGERPRINT_PATH)
+
+
+# Content fingerprints of FULL_TABLE stream records, stored in a local sidecar file (not the Singer state):
+#   {stream_name: {account_id: {record_key: md5 of the record}}}
+# Only new or changed records are written. When a stream was fully read, the keys of the previous run that
+#   were not read again are returned by finish(), to write tombstone records.
+class FingerprintIndex:
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self.seen = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.index = json.load(file)
+        LOGGER.info('Fingerprints: {} - {} streams'.format(path, len(self.index)))
+
+    # Key of a record from its primary key values
+    @staticmethod
+    def get_record_key(record, key_properties):
+        return json.dumps([record.get(key) for key in key_properties])
+
+    @staticmethod
+    def get_fingerprint(record):
+        return hashlib.md5(json.dumps(record, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    # Start reading a stream for an account
+    def start(self, stream_name, account_id):
+        self.seen[(stream_name, account_id)] = set()
+
+    # Returns True if the record is new or changed since the previous run, and stores its fingerprint
+    def is_changed(self, stream_name, account_id, record_key, record):
+        fingerprints = self.index.setdefault(stream_name, {}).setdefault(account_id, {})
+        self.seen.setdefault((stream_name, account_id), set()).add(record_key)
+        fingerprint = self.get_fingerprint(record)
+        if fingerprints.get(record_key) == fingerprint:
+            return False
+        fingerprints[record_key] = fingerprint
+        return True
+
+    # Finish reading a stream for an account, save the fingerprints and return the deleted record keys
+    # full_read: all records of the stream were read (not only the children of changed parents),
+    #   so records not read were deleted
+    def finish(self, stream_name, account_id, full_read):
+        seen = self.seen.pop((stream_name, account_id), set())
+        fingerprints = self.index.setdefault(stream_name, {}).setdefault(account_id, {})
+        deleted_keys = []
+        if full_read:
+            deleted_keys = [record_key for record_key in fingerprints if record_key not in seen]
+            for record_key in deleted_keys:
+                del fingerprints[record_key]
+        LOGGER.info('Stream: {} - Fingerprints: {} records, {} deleted'.format(
+            stream_name, len(fingerprints), len(deleted_keys)))
+        self.save()
+        return deleted_keys
+
+    # Write the sidecar file to a temporary file and rename it, so it is never partially written
+    def save(self):
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.index, file)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import threading
+from contextlib import nullcontext
+import singer
+
+LOGGER = singer.get_logger()
+
+# Stage timing trace file formats (config stage_timing_format)
+# json: summary rows and spans; chrome: Chrome trace events (chrome://tracing, Perfetto)
+TRACE_FORMATS = ['json', 'chrome']
+
+# Pipeline stages, in pipeline order (summary order for stages w/ the same total time)
+STAGES = [
+    'pagination', # GET endpoint pages (first page and cursor pages)
+    'obj_to_dict',
+    'transform', # transform_record
+    'transformer', # Singer Transformer
+    'write',
+    'state', # write bookmark and STATE message
+    'job_post', # POST async jobs
+    'job_wait', # wait between async job status checks
+    'job_status', # GET async job statuses
+    'download', # GET async result (includes decompress and JSON parse, done by the SDK Response)
+    'transform_report'
+]
+# Per-record stages are aggregated only, they are not written as trace spans
+RECORD_STAGES = frozenset(['pagination', 'obj_to_dict', 'transform', 'transformer', 'write'])
+# Span when stage timing is disabled
+NULL_SPAN = nullcontext()
+
+
+# Returns a StageTimer if stage timing is enabled in the config (stage_timing), else None
+def get_stage_timer(tap_config):
+    if str(tap_config.get('stage_timing', 'false')).lower() != 'true':
+        return None
+    trace_format = str(tap_config.get('stage_timing_format') or 'json').lower()
+    if trace_format not in TRACE_FORMATS:
+        raise RuntimeError('Invalid stage_timing_format: {}, must be one of: {}'.format(
+            trace_format, ', '.join(TRACE_FORMATS)))
+    return StageTimer(tap_config.get('stage_timing_path'), trace_format)
+
+
+class Span:
+    __slots__ = ('timer', 'stage', 'account_id', 'stream', 'start')
+
+    def __init__(self, timer, stage, account_id, stream):
+        self.timer = timer
+        self.stage = stage
+        self.account_id = account_id
+        self.stream = stream
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.timer.add(self.stage, self.account_id, self.stream, self.start, time.perf_counter())
+
+
+# Time spent per pipeline stage, tagged by account_id and stream (endpoint or report stream name)
+# Spans are aggregated per (stage, account_id, stream): count, total and max seconds.
+# close() logs a summary table and, w/ stage_timing_path, writes the spans (w/o per-record stages) to a file.
+class StageTimer:
+    def __init__(self, trace_path=None, trace_format='json'):
+        self.trace_path = trace_path
+        self.trace_format = trace_format
+        self.stats = {}
+        self.spans = []
+        self.lock = threading.Lock()
+        self.start_time = time.perf_counter()
+
+    def span(self, stage, account_id=None, stream=None):
+        return Span(self, stage, account_id, stream)
+
+    # Iterate an iterable, timing each next() as a span of the stage
+    def timed_iter(self, iterable, stage, account_id=None, stream=None):
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, account_id, stream, start, time.perf_counter())
+                return
+            self.add(stage, account_id, stream, start, time.perf_counter())
+            yield item
+
+    def add(self, stage, account_id, stream, start, end):
+        seconds = end - start
+        key = (stage, account_id, stream)
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                self.stats[key] = [1, seconds, seconds]
+            else:
+                stats[0] = stats[0] + 1
+                stats[1] = stats[1] + seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+            if self.trace_path and stage not in RECORD_STAGES:
+                self.spans.append((stage, account_id, stream, start, seconds, threading.get_ident()))
+
+    # Summary rows (dicts) per (stage, account_id, stream), by total seconds desc
+    def get_summary(self):
+        with self.lock:
+            stats = list(self.stats.items())
+        rows = []
+        for (stage, account_id, stream), (count, total, maximum) in stats:
+            rows.append({
+                'stage': stage,
+                'account_id': account_id,
+                'stream': stream,
+                'count': count,
+                'total_seconds': round(total, 6),
+                'mean_ms': round(total * 1000 / count, 3),
+                'max_ms': round(maximum * 1000, 3)
+            })
+        stage_order = {stage: i for i, stage in enumerate(STAGES)}
+        rows.sort(key=lambda row: (-row['total_seconds'], stage_order.get(row['stage'], len(STAGES))))
+        return rows
+
+    def log_summary(self):
+        rows = self.get_summary()
+        run_seconds = time.perf_counter() - self.start_time
+        LOGGER.info('Stage timing summary - run time: {:.1f} sec'.format(run_seconds))
+        LOGGER.info('{:<18} {:<12} {:<40} {:>10} {:>10} {:>10} {:>10}'.format(
+            'stage', 'account_id', 'stream', 'count', 'total_s', 'mean_ms', 'max_ms'))
+        for row in rows:
+            LOGGER.info('{:<18} {:<12} {:<40} {:>10} {:>10.2f} {:>10.2f} {:>10.2f}'.format(
+                row['stage'], str(row['account_id']), str(row['stream']), row['count'], row['total_seconds'], \
+                row['mean_ms'], row['max_ms']))
+
+    def get_trace(self):
+        with self.lock:
+            spans = list(self.spans)
+        if self.trace_format == 'chrome':
+            pid = os.getpid()
+            return {
+                'traceEvents': [{
+                    'name': stage,
+                    'cat': stream or stage,
+                    'ph': 'X',
+                    'ts': round((start - self.start_time) * 1000000),
+                    'dur': round(seconds * 1000000),
+                    'pid': pid,
+                    'tid': thread_id,
+                    'args': {'account_id': account_id, 'stream': stream}
+                } for stage, account_id, stream, start, seconds, thread_id in spans],
+                'displayTimeUnit': 'ms'
+            }
+        return {
+            'summary': self.get_summary(),
+            'spans': [{
+                'stage': stage,
+                'account_id': account_id,
+                'stream': stream,
+                'start_seconds': round(start - self.start_time, 6),
+                'seconds': round(seconds, 6),
+                'thread_id': thread_id
+            } for stage, account_id, stream, start, seconds, thread_id in spans]
+        }
+
+    # Write the trace file (written to a temp file and moved, a partial file is never left)
+    def write_trace(self):
+        tmp_path = '{}.tmp'.format(self.trace_path)
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.get_trace(), file)
+        os.replace(tmp_path, self.trace_path)
+        LOGGER.info('Stage timing: {} - {} spans written'.format(self.trace_path, len(self.spans)))
+
+    def close(self):
+        self.log_summary()
+        if self.trace_path:
+            self.write_trace()
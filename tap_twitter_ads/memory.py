@@ -0,0 +1,122 @@
+import os
+import sys
+import resource
+import threading
+import tracemalloc
+from contextlib import contextmanager
+import singer
+
+LOGGER = singer.get_logger()
+
+# Memory tracking modes (config memory_tracking)
+# rss: resident set size of the process (all memory, incl. native buffers such as pyarrow)
+# tracemalloc: Python allocations only, slower (every allocation is traced)
+MEMORY_TRACKING_MODES = ['rss', 'tracemalloc']
+SAMPLE_INTERVAL = 0.05 # seconds
+MB = 1048576
+
+
+# Returns a MemoryTracker if memory tracking is enabled in the config (memory_tracking), else None
+def get_memory_tracker(tap_config):
+    mode = tap_config.get('memory_tracking')
+    if not mode or str(mode).lower() == 'false':
+        return None
+    mode = 'rss' if str(mode).lower() == 'true' else str(mode).lower()
+    if mode not in MEMORY_TRACKING_MODES:
+        raise RuntimeError('Invalid memory_tracking: {}, must be one of: {}'.format(
+            mode, ', '.join(MEMORY_TRACKING_MODES)))
+    soft_limit_mb = tap_config.get('memory_soft_limit_mb')
+    return MemoryTracker(mode, float(soft_limit_mb) if soft_limit_mb else None)
+
+
+def get_rss():
+    try:
+        with open('/proc/self/statm', encoding='utf-8') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # No /proc (macOS): peak RSS of the process (ru_maxrss is bytes on macOS, KB on Linux)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+class MemoryUnit:
+    __slots__ = ('unit', 'account_id', 'stream', 'start_bytes', 'peak_bytes')
+
+    def __init__(self, unit, account_id, stream, start_bytes):
+        self.unit = unit
+        self.account_id = account_id
+        self.stream = stream
+        self.start_bytes = start_bytes
+        self.peak_bytes = start_bytes
+
+
+# Memory high-water mark of units of work (stream sync, report date window, async result download)
+# Memory is sampled in a thread every SAMPLE_INTERVAL, the peak of each unit in progress is updated;
+#   units may be nested and run in several threads (downloads), so a peak is the process peak while
+#   the unit was in progress.
+class MemoryTracker:
+    def __init__(self, mode='rss', soft_limit_mb=None):
+        self.mode = mode
+        self.soft_limit_bytes = soft_limit_mb * MB if soft_limit_mb else None
+        self.units = set()
+        self.lock = threading.Lock()
+        if mode == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.run_sampler, daemon=True)
+        self.sampler.start()
+
+    def get_usage(self):
+        if self.mode == 'tracemalloc':
+            return tracemalloc.get_traced_memory()[0]
+        return get_rss()
+
+    def sample(self):
+        usage = self.get_usage()
+        with self.lock:
+            for memory_unit in self.units:
+                if usage > memory_unit.peak_bytes:
+                    memory_unit.peak_bytes = usage
+
+    def run_sampler(self):
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            self.sample()
+
+    # Start tracking a unit, logged so that the last unit started is visible if the process is killed (OOM)
+    def start(self, unit, account_id=None, stream=None):
+        memory_unit = MemoryUnit(unit, account_id, stream, self.get_usage())
+        with self.lock:
+            self.units.add(memory_unit)
+        LOGGER.info('Memory ({}): {} - {}, Account ID: {}, start: {:.1f} MB'.format(
+            self.mode, unit, stream, account_id, memory_unit.start_bytes / MB))
+        return memory_unit
+
+    # Stop tracking a unit and log its peak; returns True if the memory peak while the unit was in progress
+    #   (process memory, not only the unit's growth) exceeded the soft limit
+    def stop(self, memory_unit):
+        self.sample()
+        growth_bytes = memory_unit.peak_bytes - memory_unit.start_bytes
+        over_soft_limit = self.soft_limit_bytes is not None and memory_unit.peak_bytes > self.soft_limit_bytes
+        with self.lock:
+            self.units.discard(memory_unit)
+        LOGGER.info('Memory ({}): {} - {}, Account ID: {}, start: {:.1f} MB, peak: {:.1f} MB, ' \
+            'growth: {:.1f} MB{}'.format(
+            self.mode, memory_unit.unit, memory_unit.stream, memory_unit.account_id, \
+            memory_unit.start_bytes / MB, memory_unit.peak_bytes / MB, growth_bytes / MB, \
+            ', over soft limit: {:.0f} MB'.format(self.soft_limit_bytes / MB) if over_soft_limit else ''))
+        return over_soft_limit
+
+    # Track a unit of work, yields the MemoryUnit
+    @contextmanager
+    def track(self, unit, account_id=None, stream=None):
+        memory_unit = self.start(unit, account_id, stream)
+        try:
+            yield memory_unit
+        finally:
+            self.stop(memory_unit)
+
+    def close(self):
+        self.stopped.set()
+        self.sampler.join()
+        if self.mode == 'tracemalloc':
+            tracemalloc.stop()
@@ -0,0 +1,251 @@
+import sys
+import json
+import math
+from datetime import timedelta
+import pytz
+import singer
+from singer.utils import strptime_to_utc
+from tap_twitter_ads.streams import STREAMS, Reports, get_page_size
+from tap_twitter_ads.sync import get_sync_streams, get_report_targeting_ids
+
+LOGGER = singer.get_logger()
+
+# Estimated runtime: seconds per API call (config plan_seconds_per_call) and the wait before each
+#   async job status check (see Reports.get_async_results_urls)
+DEFAULT_SECONDS_PER_CALL = 1.0
+JOB_WAIT_SECONDS = 15
+
+
+# Sum of counts, None if a count is unknown
+def add_count(total, count):
+    if total is None or count is None:
+        return None
+    return total + count
+
+
+# Replace keys/ids in the params of an endpoint (as in sync_endpoint)
+def get_plan_params(endpoint_config, account_id, tap_config, start_date, sub_type):
+    with_deleted = tap_config.get('with_deleted', 'true')
+    country_codes = tap_config.get('country_codes', '').replace(' ', '')
+    params = {}
+    for key, val in ((hasattr(endpoint_config, 'params') or {}) and endpoint_config.params).items():
+        if isinstance(val, str):
+            val = val.replace('{with_deleted}', str(with_deleted).lower()) \
+                .replace('{account_ids}', account_id) \
+                .replace('{start_date}', start_date) \
+                .replace('{country_codes}', country_codes) \
+                .replace('{sub_type}', sub_type)
+        params[key] = val
+    return params
+
+
+# Number of records of an endpoint, from a 1 record request w/ with_total_count (None if unknown)
+def get_record_count(stream_obj, stream_name, client, path, params):
+    probe_params = {key: val for key, val in params.items() if key != 'cursor'}
+    probe_params['count'] = 1
+    probe_params['with_total_count'] = 'true'
+    try:
+        cursor = stream_obj.get_resource(stream_name, client, path, probe_params)
+    except Exception as err: # pylint: disable=broad-except
+        LOGGER.warning('Plan: {} - record count unavailable: {}'.format(stream_name, err))
+        return None
+    # w/o total_count, the count is only known when the first page is the last one
+    if cursor.exhausted or cursor.count > cursor.fetched:
+        return cursor.count
+    return None
+
+
+# Plan of a parent stream (w/ its selected child streams): records and paginated API calls
+# Incremental streams are planned as full reads (upper bound), the sync stops at the bookmark
+def plan_endpoint(client, tap_config, start_date, stream_name, account_id, child_streams):
+    endpoint_config = STREAMS[stream_name]
+    stream_obj = endpoint_config()
+    path = endpoint_config.path.replace('{account_id}', account_id)
+    sub_types = getattr(endpoint_config, 'sub_types', ['none'])
+    if sub_types == ['{country_code_list}']:
+        sub_types = tap_config.get('country_codes', '').replace(' ', '').split(',')
+
+    records = 0
+    api_calls = 0
+    for sub_type in sub_types:
+        params = get_plan_params(endpoint_config, account_id, tap_config, start_date, sub_type)
+        sub_type_records = get_record_count(stream_obj, stream_name, client, path, params)
+        api_calls = api_calls + 1 # record count request
+        if records is not None:
+            records = None if sub_type_records is None else records + sub_type_records
+        page_size = params.get('count')
+        if page_size and tap_config.get('page_size'):
+            page_size = get_page_size(tap_config, page_size)
+        if page_size and sub_type_records:
+            api_calls = api_calls + math.ceil(sub_type_records / int(page_size))
+        else:
+            api_calls = api_calls + 1
+
+    stream_plan = {
+        'replication_method': getattr(endpoint_config, 'replication_method', 'FULL_TABLE'),
+        'records': records,
+        'api_calls': api_calls,
+        'children': {}
+    }
+    # Children are requested by chunks of parent_ids (at least 1 page per chunk)
+    for child_stream_name in getattr(endpoint_config, 'children', None) or []:
+        if child_stream_name in child_streams:
+            parent_ids_limit = getattr(STREAMS[child_stream_name], 'parent_ids_limit', 1)
+            child_api_calls = None
+            if records is not None:
+                child_api_calls = math.ceil(records / parent_ids_limit)
+            stream_plan['children'][child_stream_name] = {
+                'parent_ids_limit': parent_ids_limit,
+                'api_calls': child_api_calls
+            }
+    return stream_plan
+
+
+# Plan of a report: date windows, async jobs and API calls (from the bookmark, window stats and active entities)
+def plan_report(client, state, tap_config, start_date, report_config, account_id, timezone, \
+    country_ids, platform_ids):
+    reports_obj = Reports()
+    report_name = report_config.get('name')
+    report_entity = report_config.get('entity')
+    report_segment = report_config.get('segment', 'NO_SEGMENT')
+    report_granularity = report_config.get('granularity', 'DAY')
+    if report_segment == 'NO_SEGMENT' or report_entity in ['MEDIA_CREATIVE', 'ORGANIC_TWEET']:
+        report_segment = None
+
+    if report_segment in ('LOCATIONS', 'METROS', 'POSTAL_CODES', 'REGIONS'):
+        sub_type_count = len(country_ids)
+    elif report_segment in ('DEVICES', 'PLATFORM_VERSIONS'):
+        sub_type_count = len(platform_ids)
+    else:
+        sub_type_count = 1
+
+    last_datetime = reports_obj.get_bookmark(state, report_name, start_date, account_id)
+    last_dttm = strptime_to_utc(last_datetime).astimezone(timezone)
+    attribution_window = int(tap_config.get('attribution_window', '14'))
+    abs_start, abs_end = reports_obj.get_absolute_start_end_time(
+        report_granularity, timezone, last_dttm, attribution_window)
+    date_window_size = reports_obj.get_date_window_size(state, report_name, account_id, \
+        report_granularity, report_segment, tap_config)
+    job_seconds_per_day = reports_obj.get_report_window_stats(state, report_name, account_id) \
+        .get('job_seconds_per_day')
+
+    windows = 0
+    jobs = 0
+    job_status_calls = 0
+    api_calls = 0
+    window_start = abs_start
+    while window_start != abs_end:
+        window_end = min(window_start + timedelta(days=date_window_size), abs_end)
+        windows = windows + 1
+        window_start_rounded, window_end_rounded = reports_obj.round_times(
+            report_granularity, timezone, window_start, window_end)
+        window_start_str = window_start_rounded.strftime('%Y-%m-%dT%H:%M:%S%z')
+        window_end_str = window_end_rounded.strftime('%Y-%m-%dT%H:%M:%S%z')
+
+        # Async jobs of the window (by placement set and chunk of entity_ids, for each sub_type id)
+        window_jobs = 0
+        if report_entity == 'ACCOUNT':
+            window_jobs = 2 # ALL_ON_TWITTER and PUBLISHER_NETWORK
+        elif report_entity == 'ORGANIC_TWEET':
+            # Entity ids are the published tweets of the window (not requested by the plan)
+            window_jobs = None
+        else:
+            active_entities_path = 'stats/accounts/{account_id}/active_entities'.replace(
+                '{account_id}', account_id)
+            active_entities = reports_obj.get_resource('active_entities', client, active_entities_path, {
+                'entity': report_entity,
+                'start_time': window_start_str,
+                'end_time': window_end_str
+            })
+            api_calls = api_calls + 1
+            entity_id_sets = reports_obj.get_active_entity_sets(active_entities, report_name, account_id, \
+                report_entity, report_granularity, timezone, window_start, window_end)
+            for entity_id_set in entity_id_sets:
+                window_jobs = window_jobs + len(reports_obj.pack_entity_id_chunks(
+                    entity_id_set.get('entity_ids', []), entity_id_set.get('entity_windows'), \
+                    report_granularity, timezone, entity_id_set.get('start_time'), entity_id_set.get('end_time')))
+
+        if window_jobs is not None:
+            window_jobs = window_jobs * sub_type_count
+        jobs = add_count(jobs, window_jobs)
+        # Status checks (if jobs are queued): from the observed job time of the report, at least 1
+        if window_jobs is None or window_jobs > 0:
+            window_status_calls = 1
+            if job_seconds_per_day:
+                window_days = (window_end - window_start).total_seconds() / 86400
+                window_status_calls = max(1, math.ceil(job_seconds_per_day * window_days / JOB_WAIT_SECONDS))
+            job_status_calls = job_status_calls + window_status_calls
+        window_start = window_end
+
+    # POST and download of each job, status checks
+    api_calls = add_count(api_calls, None if jobs is None else (2 * jobs) + job_status_calls)
+
+    return {
+        'entity': report_entity,
+        'segment': report_segment or 'NO_SEGMENT',
+        'granularity': report_granularity,
+        'start_time': abs_start.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'end_time': abs_end.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'date_window_size': date_window_size,
+        'date_windows': windows,
+        'async_jobs': jobs,
+        'job_status_calls': job_status_calls,
+        'api_calls': api_calls
+    }
+
+
+# Plan - dry-run of sync: the streams, child streams and reports to sync w/ their expected API calls,
+#   async jobs, date windows and estimated runtime by account.
+# Only metadata is requested (record counts, account timezone, targeting ids, active entities),
+#   no records, schemas or states are written.
+def plan(client, config, catalog, state):
+    account_list = config.get('account_ids').replace(' ', '').split(',')
+    country_code_list = config.get('country_codes', 'US').replace(' ', '').split(',')
+    start_date = config.get('start_date')
+    reports = config.get('reports', [])
+    seconds_per_call = float(config.get('plan_seconds_per_call') or DEFAULT_SECONDS_PER_CALL)
+
+    _, parent_streams, child_streams, report_streams = get_sync_streams(catalog, state, reports)
+
+    sync_plan = {'accounts': {}, 'api_calls': 0, 'async_jobs': 0, 'estimated_seconds': 0}
+    for account_id in account_list:
+        LOGGER.info('Plan: Account ID: {}'.format(account_id))
+        api_calls = 0
+        async_jobs = 0
+        job_wait_seconds = 0
+        account_plan = {'streams': {}, 'reports': {}}
+
+        for stream_name in parent_streams:
+            stream_plan = plan_endpoint(client, config, start_date, stream_name, account_id, child_streams)
+            account_plan['streams'][stream_name] = stream_plan
+            api_calls = add_count(api_calls, stream_plan['api_calls'])
+            for child_plan in stream_plan['children'].values():
+                api_calls = add_count(api_calls, child_plan['api_calls'])
+
+        if report_streams:
+            timezone = pytz.timezone(client.accounts(account_id).timezone)
+            country_ids, platform_ids = get_report_targeting_ids(client, country_code_list)
+            # account timezone, countries (by country code) and platforms
+            api_calls = add_count(api_calls, 2 + len(country_code_list))
+            for report in reports:
+                if report.get('name') in report_streams:
+                    report_plan = plan_report(client, state, config, start_date, report, account_id, timezone, \
+                        country_ids, platform_ids)
+                    account_plan['reports'][report.get('name')] = report_plan
+                    api_calls = add_count(api_calls, report_plan['api_calls'])
+                    async_jobs = add_count(async_jobs, report_plan['async_jobs'])
+                    job_wait_seconds = job_wait_seconds + report_plan['job_status_calls'] * JOB_WAIT_SECONDS
+
+        account_plan['api_calls'] = api_calls
+        account_plan['async_jobs'] = async_jobs
+        account_plan['estimated_seconds'] = None
+        if api_calls is not None:
+            account_plan['estimated_seconds'] = round(api_calls * seconds_per_call + job_wait_seconds)
+        sync_plan['accounts'][account_id] = account_plan
+        for key in ['api_calls', 'async_jobs', 'estimated_seconds']:
+            sync_plan[key] = add_count(sync_plan[key], account_plan[key])
+
+    json.dump(sync_plan, sys.stdout, indent=2)
+    LOGGER.info('Plan: {} API calls, {} async jobs, estimated runtime: {} seconds'.format(
+        sync_plan['api_calls'], sync_plan['async_jobs'], sync_plan['estimated_seconds']))
+    return sync_plan
@@ -0,0 +1,118 @@
+import os
+import sys
+import cProfile
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+import singer
+
+LOGGER = singer.get_logger()
+
+DEFAULT_PROFILE_DIR = 'profiles'
+DEFAULT_SAMPLE_INTERVAL_MS = 10
+
+# Profilers (config profiler)
+# cprofile: deterministic, every call of the syncing thread; .pstats file (python -m pstats, snakeviz)
+# sampling: stacks of all threads sampled every profile_interval_ms (low overhead, includes the report
+#   download threads); .collapsed file, one 'frame;frame;frame count' line per stack (flamegraph.pl, speedscope)
+PROFILERS = ['cprofile', 'sampling']
+FILE_EXTENSIONS = {
+    'cprofile': 'pstats',
+    'sampling': 'collapsed'
+}
+
+
+# Returns a StreamProfiler if profile_streams is set in the config, else None
+def get_stream_profiler(tap_config):
+    profile_streams = tap_config.get('profile_streams')
+    if not profile_streams:
+        return None
+    if isinstance(profile_streams, str):
+        profile_streams = profile_streams.replace(' ', '').split(',')
+    profiler = str(tap_config.get('profiler') or 'cprofile').lower()
+    if profiler not in PROFILERS:
+        raise RuntimeError('Invalid profiler: {}, must be one of: {}'.format(profiler, ', '.join(PROFILERS)))
+    interval_ms = float(tap_config.get('profile_interval_ms') or DEFAULT_SAMPLE_INTERVAL_MS)
+    return StreamProfiler(profile_streams, tap_config.get('profile_dir') or DEFAULT_PROFILE_DIR, profiler, \
+        interval_ms / 1000)
+
+
+# Samples the stacks of all threads (except its own) in a thread, counted by collapsed stack
+class SamplingProfiler:
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    @staticmethod
+    def get_frame_name(frame):
+        code = frame.f_code
+        return '{} ({})'.format(code.co_name, os.path.basename(code.co_filename))
+
+    def sample(self):
+        own_thread_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items(): # pylint: disable=protected-access
+            if thread_id == own_thread_id:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(self.get_frame_name(frame))
+                frame = frame.f_back
+            stack = ';'.join(reversed(frames))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples = self.samples + 1
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def enable(self):
+        self.thread.start()
+
+    def disable(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write('{} {}\n'.format(stack, count))
+
+
+# Profiles the sync of selected streams/reports (config profile_streams), one file per stream and account:
+#   <profile_dir>/<stream_name>_<account_id>_<utc timestamp>.<pstats|collapsed>
+class StreamProfiler:
+    def __init__(self, streams, profile_dir, profiler='cprofile', interval=DEFAULT_SAMPLE_INTERVAL_MS / 1000):
+        self.streams = set(streams)
+        self.profile_dir = profile_dir
+        self.profiler = profiler
+        self.interval = interval
+
+    # stream_names: the stream and the child streams synced with it
+    def is_profiled(self, stream_names):
+        return 'all' in self.streams or any(stream_name in self.streams for stream_name in stream_names)
+
+    def profile(self, stream_name, account_id, child_streams=None):
+        if not self.is_profiled([stream_name] + list(child_streams or [])):
+            return nullcontext()
+        return self.run_profiler(stream_name, account_id)
+
+    @contextmanager
+    def run_profiler(self, stream_name, account_id):
+        if self.profiler == 'sampling':
+            profiler = SamplingProfiler(self.interval)
+        else:
+            profiler = cProfile.Profile()
+        path = os.path.join(self.profile_dir, '{}_{}_{}.{}'.format(stream_name, account_id, \
+            datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S'), FILE_EXTENSIONS[self.profiler]))
+        LOGGER.info('Stream: {} - Profiling ({}), Account ID: {}'.format(stream_name, self.profiler, account_id))
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(path)
+            LOGGER.info('Stream: {} - Profile written: {}'.format(stream_name, path))
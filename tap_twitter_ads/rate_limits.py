@@ -0,0 +1,216 @@
+import re
+import time
+import threading
+from urllib.parse import urlparse
+import singer
+from singer import metrics
+from requests_oauthlib import OAuth1Session
+import twitter_ads.http
+
+LOGGER = singer.get_logger()
+
+# Async job results are downloaded from another host (ton.twimg.com)
+ASYNC_RESULTS_PATH = '/advertiser-api-async-analytics/'
+ASYNC_RESULTS_FAMILY = 'async_results'
+
+# Rate limit headers: account level (some endpoints), else user/app level
+# Reference: https://developer.twitter.com/en/docs/twitter-ads-api/rate-limiting
+RATE_LIMIT_HEADERS = [
+    ('x-account-rate-limit-limit', 'x-account-rate-limit-remaining', 'x-account-rate-limit-reset'),
+    ('x-rate-limit-limit', 'x-rate-limit-remaining', 'x-rate-limit-reset')
+]
+
+
+# Endpoint family of a request url: path w/o the API version, account and numeric ids
+#   https://ads-api.twitter.com/11/accounts/18ce54d4x5t/line_items -> accounts/:account_id/line_items
+def get_endpoint_family(url):
+    path = urlparse(url).path
+    if path.startswith(ASYNC_RESULTS_PATH):
+        return ASYNC_RESULTS_FAMILY
+    segments = re.sub(r'^/\d+/', '/', path).strip('/').split('/')
+    family = []
+    for i, segment in enumerate(segments):
+        if i > 0 and segments[i - 1] == 'accounts':
+            family.append(':account_id')
+        elif segment.isdigit():
+            family.append(':id')
+        else:
+            family.append(segment)
+    return '/'.join(family)
+
+
+def get_int(headers, key):
+    try:
+        return int(headers.get(key))
+    except (TypeError, ValueError):
+        return None
+
+
+# API budget per endpoint family: calls, error/rate limited responses, last and min remaining calls,
+#   and the time slept waiting for rate limit resets, in SDK retry delays (5xx, timeouts) or in
+#   backoff (tap), for the whole run.
+# Sleeps are attributed to the last endpoint family requested by the sleeping thread.
+class RateLimitRegistry:
+    def __init__(self):
+        self.families = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def get_family(self, family):
+        stats = self.families.get(family)
+        if stats is None:
+            stats = self.families[family] = {
+                'calls': 0,
+                'errors': 0,
+                'rate_limited': 0,
+                'limit': None,
+                'remaining': None,
+                'min_remaining': None,
+                'reset': None,
+                'reset_sleep_seconds': 0.0,
+                'retry_sleep_seconds': 0.0,
+                'backoff_seconds': 0.0
+            }
+        return stats
+
+    # A request of the thread is sent (no response yet, e.g. if it times out)
+    def start_request(self, url):
+        self.local.family = get_endpoint_family(url)
+        self.local.status_code = None
+
+    def record_response(self, url, status_code, headers):
+        family = get_endpoint_family(url)
+        self.local.family = family
+        self.local.status_code = status_code
+        limit = remaining = reset = None
+        for limit_key, remaining_key, reset_key in RATE_LIMIT_HEADERS:
+            remaining = get_int(headers, remaining_key)
+            if remaining is not None:
+                limit = get_int(headers, limit_key)
+                reset = get_int(headers, reset_key)
+                break
+        with self.lock:
+            stats = self.get_family(family)
+            stats['calls'] = stats['calls'] + 1
+            if status_code >= 400:
+                stats['errors'] = stats['errors'] + 1
+            if status_code in (420, 429):
+                stats['rate_limited'] = stats['rate_limited'] + 1
+            if remaining is not None:
+                stats['limit'] = limit
+                stats['remaining'] = remaining
+                stats['reset'] = reset
+                if stats['min_remaining'] is None or remaining < stats['min_remaining']:
+                    stats['min_remaining'] = remaining
+
+    # Kind of an SDK sleep: the SDK waits for the rate limit reset after a 429 response,
+    #   else it sleeps retry_delay before retrying (retry_on_status, timeouts)
+    def get_sdk_sleep_kind(self):
+        if getattr(self.local, 'status_code', None) == 429:
+            return 'reset_sleep_seconds'
+        return 'retry_sleep_seconds'
+
+    # kind: reset_sleep_seconds, retry_sleep_seconds or backoff_seconds
+    def record_sleep(self, seconds, kind='reset_sleep_seconds'):
+        family = getattr(self.local, 'family', None) or 'unknown'
+        with self.lock:
+            stats = self.get_family(family)
+            stats[kind] = stats[kind] + max(seconds or 0, 0)
+
+    def get_summary(self):
+        with self.lock:
+            return {family: dict(stats) for family, stats in sorted(self.families.items())}
+
+    def get_metric_points(self):
+        points = []
+        for family, stats in self.get_summary().items():
+            tags = {metrics.Tag.endpoint: family}
+            points.append(metrics.Point('counter', 'api_calls', stats['calls'], tags))
+            points.append(metrics.Point('counter', 'api_rate_limited', stats['rate_limited'], tags))
+            if stats['min_remaining'] is not None:
+                points.append(metrics.Point('gauge', 'rate_limit_remaining', stats['min_remaining'], \
+                    dict(tags, limit=stats['limit'])))
+            points.append(metrics.Point('timer', 'rate_limit_sleep', round(stats['reset_sleep_seconds'], 3), tags))
+            points.append(metrics.Point('timer', 'retry_sleep', round(stats['retry_sleep_seconds'], 3), tags))
+            points.append(metrics.Point('timer', 'backoff_sleep', round(stats['backoff_seconds'], 3), tags))
+        return points
+
+    # METRIC messages (log lines) and a summary table for the run
+    def log_summary(self):
+        for point in self.get_metric_points():
+            metrics.log(LOGGER, point)
+        now = int(time.time())
+        LOGGER.info('Rate limit summary:')
+        LOGGER.info('{:<50} {:>7} {:>7} {:>7} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9}'.format('endpoint', 'calls', \
+            'errors', '429s', 'limit', 'min_left', 'reset_in', 'sleep_s', 'retry_s', 'backoff_s'))
+        for family, stats in self.get_summary().items():
+            reset_in = stats['reset'] - now if stats['reset'] else None
+            LOGGER.info('{:<50} {:>7} {:>7} {:>7} {:>7} {:>9} {:>9} {:>9.1f} {:>9.1f} {:>9.1f}'.format(family, \
+                stats['calls'], stats['errors'], stats['rate_limited'], str(stats['limit']), \
+                str(stats['min_remaining']), str(reset_in), stats['reset_sleep_seconds'], \
+                stats['retry_sleep_seconds'], stats['backoff_seconds']))
+
+
+RATE_LIMITS = RateLimitRegistry()
+
+
+def record_response_hook(response, *args, **kwargs): # pylint: disable=unused-argument
+    RATE_LIMITS.record_response(response.url, response.status_code, response.headers)
+    return response
+
+
+# OAuth1Session of the SDK Request, records each response (incl. responses retried by the SDK)
+class RateLimitOAuth1Session(OAuth1Session):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hooks['response'].append(record_response_hook)
+
+    def request(self, method, url, *args, **kwargs): # pylint: disable=arguments-differ
+        RATE_LIMITS.start_request(url)
+        return super().request(method, url, *args, **kwargs)
+
+
+# time module of the SDK http module, records the sleeps of the SDK (rate limit resets and retry delays,
+#   by the last response of the thread)
+class SleepRecordingTime:
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(seconds):
+        RATE_LIMITS.record_sleep(seconds, RATE_LIMITS.get_sdk_sleep_kind())
+        time.sleep(seconds)
+
+
+# SDK http module attributes replaced by install_sdk_hooks, w/ their originals (restored by uninstall_sdk_hooks)
+SDK_HOOKS = {
+    'installed': False,
+    'originals': {}
+}
+
+
+# Patches the SDK http module, installed by sync (see sync.sync); installed once per process
+def install_sdk_hooks():
+    if SDK_HOOKS['installed']:
+        return
+    SDK_HOOKS['originals'] = {
+        'OAuth1Session': twitter_ads.http.OAuth1Session,
+        'time': twitter_ads.http.time
+    }
+    twitter_ads.http.OAuth1Session = RateLimitOAuth1Session
+    twitter_ads.http.time = SleepRecordingTime()
+    SDK_HOOKS['installed'] = True
+
+
+def uninstall_sdk_hooks():
+    if not SDK_HOOKS['installed']:
+        return
+    for name, original in SDK_HOOKS['originals'].items():
+        setattr(twitter_ads.http, name, original)
+    SDK_HOOKS['originals'] = {}
+    SDK_HOOKS['installed'] = False
+
+
+# backoff on_backoff handler, records the tap's backoff waits
+def record_backoff(details):
+    RATE_LIMITS.record_sleep(details.get('wait'), 'backoff_seconds')
@@ -1,8 +1,11 @@
 import os
 import json
+import hashlib
+import functools
+import importlib.metadata
 import singer
 from singer import metadata
-from tap_twitter_ads.streams import STREAMS
+from tap_twitter_ads.cache import get_cache_path, read_cache_file, write_cache_file
 
 
 LOGGER = singer.get_logger()
@@ -85,7 +88,46 @@ def make_replication_key_automatic(mdata, schema, replication_keys):
 
     return metadata.to_list(mdata)
 
-def get_schemas(reports):
+
+# Files the endpoint schemas and metadata are built from: schemas, stream definitions and this module
+def get_bundle_source_paths():
+    paths = [get_abs_path('schema.py'), get_abs_path('streams.py')]
+    for schemas_dir in ['schemas', 'schemas/shared']:
+        schemas_path = get_abs_path(schemas_dir)
+        paths = paths + sorted(os.path.join(schemas_path, f) for f in os.listdir(schemas_path)
+                               if f.endswith('.json'))
+    return paths
+
+
+# Version of an installed distribution, '' if not installed (e.g. the tap run from source)
+def get_distribution_version(name):
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return ''
+
+
+# Hash of the tap and singer-python versions and of the path, mtime and size of the package files of the
+#   schema bundle (the files are not read)
+def get_package_hash():
+    digest = hashlib.sha256()
+    for name in ['tap-twitter-ads', 'singer-python']:
+        digest.update('{}=={}\0'.format(name, get_distribution_version(name)).encode('utf-8'))
+    package_path = get_abs_path('')
+    for path in get_bundle_source_paths():
+        file_stat = os.stat(path)
+        digest.update('{}:{}:{}\0'.format(os.path.relpath(path, package_path), file_stat.st_mtime_ns, \
+            file_stat.st_size).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_bundle_path(package_hash):
+    return get_cache_path('schemas_{}.json'.format(package_hash[:16]))
+
+
+# Resolved schemas and metadata of the stream endpoints
+def build_endpoint_bundle():
+    from tap_twitter_ads.streams import STREAMS # pylint: disable=import-outside-toplevel
     schemas = {}
     field_metadata = {}
 
@@ -124,6 +166,100 @@ def get_schemas(reports):
 
         field_metadata[stream_name] = mdata
 
+    return {'schemas': schemas, 'metadata': field_metadata}
+
+
+# Endpoint schema bundle (JSON), built on first use and kept in the user's cache directory, keyed by
+#   get_package_hash, so discovery does not read, resolve and build the metadata of every endpoint schema again.
+@functools.lru_cache(maxsize=None)
+def get_endpoint_bundle():
+    bundle_path = get_bundle_path(get_package_hash())
+    bundle_json = read_cache_file(bundle_path)
+    if bundle_json is not None:
+        try:
+            json.loads(bundle_json)
+            return bundle_json
+        except ValueError:
+            pass
+
+    bundle_json = json.dumps(build_endpoint_bundle())
+    if write_cache_file(bundle_path, bundle_json):
+        LOGGER.info('Schema bundle written: {}'.format(bundle_path))
+    return bundle_json
+
+
+# Metadata breadcrumbs are tuples (lists in JSON)
+def load_metadata(mdata):
+    for entry in mdata:
+        entry['breadcrumb'] = tuple(entry['breadcrumb'])
+    return mdata
+
+
+# Endpoint schemas and metadata (new objects for each call)
+def get_endpoint_schemas():
+    bundle = json.loads(get_endpoint_bundle())
+    for mdata in bundle['metadata'].values():
+        load_metadata(mdata)
+    return bundle['schemas'], bundle['metadata']
+
+
+# Resolved schema and metadata (JSON) of a report entity and segment, the same for every report of the combination
+@functools.lru_cache(maxsize=None)
+def get_resolved_report_schema(report_entity, report_segment):
+    # Undocumented rule: CONVERSION_TAGS report segment ONLY allows WEB_CONVERSION metric group
+    if report_segment == 'CONVERSION_TAGS' and report_entity in \
+        ['ACCOUNT', 'CAMPAIGN', 'LINE_ITEM', 'PROMOTED_TWEET']:
+        report_path = get_abs_path('schemas/shared/report_web_conversion.json')
+
+    # ACCOUNT, FUNDING_INSTRUMENT, ORGANIC_TWEET only permit a subset of METRIC_GROUPS
+    elif report_entity in ('ACCOUNT', 'FUNDING_INSTRUMENT', 'ORGANIC_TWEET'):
+        report_path = get_abs_path('schemas/shared/report_{}.json'.format(
+            report_entity.lower()))
+    else:
+        report_path = get_abs_path('schemas/shared/report_other.json')
+
+    refs = load_shared_schema_refs()
+    with open(report_path, encoding='utf-8') as file:
+        schema = json.load(file)
+
+    # Replace $ref nodes with reference nodes in schema
+    schema = singer.resolve_schema_references(schema, refs)
+
+    # If NO_SEGMENT, then remove Segment fields
+    if report_segment == 'NO_SEGMENT':
+        schema['properties']['dimensions'].pop('segmentation_type', None)
+        schema['properties']['dimensions'].pop('segment_name', None)
+        schema['properties']['dimensions'].pop('segment_value', None)
+
+    # Web Conversion ONLY valid for NO_SEGMENT, PLATFORM, and CONVERSION_TAGS segment
+    # Reference: https://developer.twitter.com/en/docs/ads/analytics/overview/metrics-and-segmentation#WEB_CONVERSION
+    #   Docs ^^ say 'PLATFORMS Only' Segmentation; but CONVERSION_TAGS segment only allow WEB_CONVERSION metrics
+    if report_segment not in ('NO_SEGMENT', 'PLATFORMS', 'CONVERSION_TAGS'):
+        schema['properties'].pop('web_conversion', None)
+
+    mdata = metadata.new()
+
+    mdata = metadata.get_standard_metadata(
+        schema=schema,
+        key_properties=['__sdc_dimensions_hash_key'],
+        valid_replication_keys=['end_time'],
+        replication_method='INCREMENTAL'
+    )
+
+    # Make replication keys of automatic inclusion
+    mdata = make_replication_key_automatic(mdata, schema, ['end_time'])
+    return json.dumps({'schema': schema, 'metadata': mdata})
+
+
+# Report schema and metadata (new objects for each call, parsed from the memoized JSON)
+def get_report_schema(report_entity, report_segment):
+    report_schema = json.loads(get_resolved_report_schema(report_entity, report_segment))
+    return report_schema['schema'], load_metadata(report_schema['metadata'])
+
+
+def get_schemas(reports):
+    schemas, field_metadata = get_endpoint_schemas()
+
     # JSON schemas for each report
     for report in reports:
         report_name = report.get('name')
@@ -169,49 +305,8 @@ def get_schemas(reports):
             LOGGER.error('ERROR: {}'.format(running_error))
             raise RuntimeError(running_error)
 
-        # Undocumented rule: CONVERSION_TAGS report segment ONLY allows WEB_CONVERSION metric group
-        if report_segment == 'CONVERSION_TAGS' and report_entity in \
-            ['ACCOUNT', 'CAMPAIGN', 'LINE_ITEM', 'PROMOTED_TWEET']:
-            report_path = get_abs_path('schemas/shared/report_web_conversion.json')
-
-        # ACCOUNT, FUNDING_INSTRUMENT, ORGANIC_TWEET only permit a subset of METRIC_GROUPS
-        elif report_entity in ('ACCOUNT', 'FUNDING_INSTRUMENT', 'ORGANIC_TWEET'):
-            report_path = get_abs_path('schemas/shared/report_{}.json'.format(
-                report_entity.lower()))
-        else:
-            report_path = get_abs_path('schemas/shared/report_other.json')
-
-        with open(report_path) as file:
-            schema = json.load(file)
-
-        # Replace $ref nodes with reference nodes in schema
-        schema = singer.resolve_schema_references(schema, refs)
-
-        # If NO_SEGMENT, then remove Segment fields
-        if report_segment == 'NO_SEGMENT':
-            schema['properties']['dimensions'].pop('segmentation_type', None)
-            schema['properties']['dimensions'].pop('segment_name', None)
-            schema['properties']['dimensions'].pop('segment_value', None)
-
-        # Web Conversion ONLY valid for NO_SEGMENT, PLATFORM, and CONVERSION_TAGS segment
-        # Reference: https://developer.twitter.com/en/docs/ads/analytics/overview/metrics-and-segmentation#WEB_CONVERSION
-        #   Docs ^^ say 'PLATFORMS Only' Segmentation; but CONVERSION_TAGS segment only allow WEB_CONVERSION metrics
-        if report_segment not in ('NO_SEGMENT', 'PLATFORMS', 'CONVERSION_TAGS'):
-            schema['properties'].pop('web_conversion', None)
-
+        schema, mdata = get_report_schema(report_entity, report_segment)
         schemas[report_name] = schema
-        mdata = metadata.new()
-
-        mdata = metadata.get_standard_metadata(
-            schema=schema,
-            key_properties=['__sdc_dimensions_hash_key'],
-            valid_replication_keys=['end_time'],
-            replication_method='INCREMENTAL'
-        )
-
-        # Make replication keys of automatic inclusion
-        mdata = make_replication_key_automatic(mdata, schema, ['end_time'])
-
         field_metadata[report_name] = mdata
 
     return schemas, field_metadata
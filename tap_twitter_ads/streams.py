@@ -12,12 +12,17 @@
 #   data_key: JSON element containing the results list for the endpoint
 #   bookmark_query_field: From date-time field used for filtering the query
 #   bookmark_type: Data type for bookmark, integer or datetime
+import copy
+import json
+import math
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
 import singer
 import time
 import backoff
 from requests.exceptions import ConnectionError
 import functools
-import pytz
 from singer import metrics, metadata, Transformer, utils
 from urllib.parse import urlparse
 from twitter_ads import API_VERSION
@@ -25,16 +30,117 @@ from twitter_ads.cursor import Cursor
 from twitter_ads.http import Request
 from twitter_ads.error import Error
 from twitter_ads.utils import split_list
-from singer.utils import strptime_to_utc
+from singer.utils import strptime_to_utc, strftime
 from datetime import datetime, timedelta
-from tap_twitter_ads.transform import transform_record, transform_report
-import copy
+from tap_twitter_ads.transform import transform_record, transform_report, get_projection, project_record, \
+    get_selected_properties, END_TIME_EPOCH_KEY
+from tap_twitter_ads.columnar import ColumnarWriter, get_output_format
+from tap_twitter_ads.fingerprint import FingerprintIndex, DELETED_AT_FIELD, DELETED_AT_SCHEMA
+from tap_twitter_ads.instrumentation import NULL_SPAN
+from tap_twitter_ads.rate_limits import record_backoff
 from tap_twitter_ads.exceptions import raise_for_error
 from tap_twitter_ads.exceptions import TwitterAdsBackoffError
 
 BOOKMARK_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 LOGGER = singer.get_logger()
 
+# Adaptive report date window defaults
+DEFAULT_TARGET_JOB_ROWS = 250000 # rows (entity x segment x time slot) per async job result
+DEFAULT_TARGET_JOB_SECONDS = 900 # time for a date window's async jobs to finish
+# Estimated number of segment values per entity, before a report's result size is observed
+DEFAULT_SEGMENT_CARDINALITY = 20
+SEGMENT_CARDINALITY = {
+    'AGE': 10,
+    'GENDER': 3,
+    'PLATFORMS': 5,
+    'DEVICES': 100,
+    'PLATFORM_VERSIONS': 50,
+    'LANGUAGES': 40,
+    'LOCATIONS': 60,
+    'REGIONS': 60,
+    'METROS': 200,
+    'POSTAL_CODES': 1000,
+    'INTERESTS': 350,
+    'KEYWORDS': 100,
+    'CONVERSION_TAGS': 10
+}
+
+# Small-delta sync: incremental requests sorted by the bookmark desc start w/ a small page (count),
+#   growing by PROBE_GROWTH_FACTOR for each page, up to the stream's page size.
+DEFAULT_PROBE_COUNT = 20
+PROBE_GROWTH_FACTOR = 4
+
+
+# Cursor for small-delta sync: pages through a GET resource like twitter_ads Cursor (raw dicts),
+#   starting w/ count=probe_count and growing the count geometrically for each next page.
+# Pages are only requested while records are read: the caller stops at the first record older than
+#   the bookmark, so the count only grows while every record is newer than the bookmark.
+class ProbeCursor:
+    def __init__(self, client, resource, params, probe_count, max_count):
+        self._client = client
+        self._resource = resource
+        self._params = dict(params or {})
+        self.count = min(probe_count, max_count)
+        self.max_count = max_count
+        self.pages = 0
+        self._collection = []
+        self._current_index = 0
+        self._next_cursor = None
+        self.__fetch()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._current_index < len(self._collection):
+            value = self._collection[self._current_index]
+            self._current_index += 1
+            return value
+        if self._next_cursor:
+            self.count = min(self.count * PROBE_GROWTH_FACTOR, self.max_count)
+            self.__fetch()
+            return self.__next__()
+        raise StopIteration
+
+    def __fetch(self):
+        params = dict(self._params)
+        params['count'] = self.count
+        params['cursor'] = self._next_cursor
+        response = Request(self._client, 'get', self._resource, params=params).perform()
+        self.pages = self.pages + 1
+        self._next_cursor = response.body.get('next_cursor', None)
+        self._collection = response.body.get('data', [])
+        self._current_index = 0
+
+
+# Deduplicated parent ids for child streams, chunked for child requests
+# Ids are the keys of a single dict (deduplicated, in insertion order), no separate set and list.
+class ParentIdSet:
+    def __init__(self):
+        self._ids = {}
+
+    def add(self, parent_id):
+        if parent_id is not None:
+            self._ids.setdefault(parent_id)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    # Lists of up to chunk_size parent ids
+    def chunks(self, chunk_size):
+        chunk = []
+        for parent_id in self:
+            chunk.append(parent_id)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
 # Currently syncing sets the stream currently being delivered in the state.
 # If the integration is interrupted, this state property is used to identify
 #  the starting point to continue from.
@@ -44,6 +150,9 @@ def update_currently_syncing(state, stream_name):
         del state['currently_syncing']
     else:
         singer.set_currently_syncing(state, stream_name)
+    # Records (and batches) must be written before the state
+    if TwitterAds.batch_writer:
+        TwitterAds.batch_writer.flush()
     singer.write_state(state)
     LOGGER.info('Stream: {} - Currently Syncing'.format(stream_name))
 
@@ -67,13 +176,29 @@ def get_page_size(config, default_page_size):
     except Exception:
         raise Exception("The entered page size ({}) is invalid".format(page_size))
 
+
+# Small-delta sync: only for bookmarked streams sorted by the bookmark desc, after the first sync.
+# Not for streams w/ selected children (children read all parent records w/ the same cursor)
+#   or SCHEDULED tweets (not sorted).
+def can_probe(bookmark_field, params, is_first_sync, sub_type, has_selected_children):
+    if not bookmark_field or not params.get('count'):
+        return False
+    if '{}-desc'.format(bookmark_field) not in params.get('sort_by', []):
+        return False
+    if is_first_sync:
+        return False
+    if sub_type == 'SCHEDULED':
+        return False
+    return not has_selected_children
+
 # Backoff ConnectionError and TwitterAdsBackoffError (429, 500, 502, 503) up to 5 times.
 def retry_pattern(fnc):
     @backoff.on_exception(backoff.constant,
                           (ConnectionError, TwitterAdsBackoffError),
                           max_tries=5,
                           interval=60,
-                          jitter=None
+                          jitter=None,
+                          on_backoff=record_backoff
                           )
     @functools.wraps(fnc)
     def wrapper(*args, **kwargs):
@@ -101,6 +226,14 @@ class TwitterAds:
     parent_path = None
     parent_id_field = None
     url = "https://ads-api.twitter.com"
+    # BatchWriter when batch messages are enabled (set in sync), shared by all streams
+    batch_writer = None
+    # FingerprintIndex when FULL_TABLE fingerprints are enabled (set in sync), shared by all streams
+    fingerprint_index = None
+    # StageTimer when stage timing is enabled (set in sync), shared by all streams
+    stage_timer = None
+    # MemoryTracker when memory tracking is enabled (set in sync), shared by all streams
+    memory_tracker = None
     
     # Reference: https://developer.twitter.com/en/docs/ads/campaign-management/overview/placements#placements
     PLACEMENTS = [
@@ -108,11 +241,53 @@ class TwitterAds:
         'PUBLISHER_NETWORK' # On the Twitter Audience Platform
     ]
     
+    # Span of a pipeline stage (see instrumentation.STAGES), a no-op unless stage timing is enabled
+    def span(self, stage, account_id=None, stream=None):
+        if self.stage_timer is None:
+            return NULL_SPAN
+        return self.stage_timer.span(stage, account_id, stream)
+
+    # Iterate a cursor, timing each next() as a span of the stage when stage timing is enabled
+    def timed_iter(self, iterable, stage, account_id=None, stream=None):
+        if self.stage_timer is None:
+            return iterable
+        return self.stage_timer.timed_iter(iterable, stage, account_id, stream)
+
+    # Track the memory peak of a unit of work, a no-op unless memory tracking is enabled
+    def track_memory(self, unit, account_id=None, stream=None):
+        if self.memory_tracker is None:
+            return NULL_SPAN
+        return self.memory_tracker.track(unit, account_id, stream)
+
+    # FULL_TABLE streams (no replication key) only write new/changed records when fingerprints are enabled
+    def uses_fingerprints(self, stream_name):
+        return self.fingerprint_index is not None and stream_name in STREAMS and \
+            not getattr(STREAMS[stream_name], 'replication_keys', None)
+
+    # Schema of a stream, w/ the tombstone field for streams w/ fingerprints
+    def get_stream_schema(self, catalog, stream_name):
+        schema = catalog.get_stream(stream_name).schema.to_dict()
+        if self.uses_fingerprints(stream_name):
+            schema['properties'][DELETED_AT_FIELD] = DELETED_AT_SCHEMA
+        return schema
+
+    # Write tombstone records (key fields and _sdc_deleted_at) for records deleted since the previous run
+    def write_tombstones(self, stream_name, account_id, key_properties, full_read):
+        deleted_keys = self.fingerprint_index.finish(stream_name, account_id, full_read)
+        deleted_at = strftime(utils.now())
+        for record_key in deleted_keys:
+            tombstone = dict(zip(key_properties, json.loads(record_key)))
+            tombstone[DELETED_AT_FIELD] = deleted_at
+            self.write_record(stream_name, tombstone, time_extracted=utils.now())
+        return len(deleted_keys)
+
     # function to fetch schema in sync mode
     def write_schema(self, catalog, stream_name):
         stream = catalog.get_stream(stream_name)
-        schema = stream.schema.to_dict()
+        schema = self.get_stream_schema(catalog, stream_name)
         LOGGER.info('Stream: {} - Writing schema'.format(stream_name))
+        if self.batch_writer:
+            self.batch_writer.flush()
         try:
             singer.write_schema(stream_name, schema, stream.key_properties)
         except OSError as err:
@@ -122,6 +297,9 @@ class TwitterAds:
     # function to fetch record in sync mode    
     def write_record(self, stream_name, record, time_extracted):
         try:
+            if self.batch_writer:
+                self.batch_writer.write_record(stream_name, record, time_extracted=time_extracted)
+                return
             singer.messages.write_record(
                 stream_name, record, time_extracted=time_extracted)
         except OSError as err:
@@ -159,8 +337,12 @@ class TwitterAds:
         else:
             state['bookmarks'][stream][account_id] = value # Update bookmark value for particular account
             LOGGER.info('Stream: {} - Write state, bookmark value: {}'.format(stream, value))
-        
-        singer.write_state(state)
+
+        # Records (and batches) must be written before the state
+        with self.span('state', account_id, stream):
+            if self.batch_writer:
+                self.batch_writer.flush()
+            singer.write_state(state)
             
     # Converts cursor object to dictionary
     def obj_to_dict(self, obj):
@@ -182,11 +364,14 @@ class TwitterAds:
     # pylint: disable=line-too-long
     # API SDK Requests: https://github.com/twitterdev/twitter-python-ads-sdk/blob/master/examples/manual_request.py
     # pylint: enable=line-too-long
+    # probe_count: small-delta sync, page through the resource w/ a ProbeCursor starting at this count
     @retry_pattern
-    def get_resource(self, stream_name, client, path, params=None):
+    def get_resource(self, stream_name, client, path, params=None, probe_count=None):
         resource = '/{}/{}'.format(API_VERSION, path)
         
         try:
+            if probe_count:
+                return ProbeCursor(client, resource, params, probe_count, params.get('count'))
             request = Request(client, 'get', resource, params=params) #, stream=True)
             cursor = Cursor(None, request)
         except Exception as e:
@@ -304,6 +489,14 @@ class TwitterAds:
             sub_types = ['none']
         children = (hasattr(endpoint_config, 'children')) and endpoint_config.children
 
+        # Children are synced by chunks of parent_ids; their fingerprints are started/finished by the parent
+        is_child_sync = parent_ids is not None
+        fingerprints = None
+        if self.uses_fingerprints(stream_name) and stream_name in selected_streams:
+            fingerprints = self.fingerprint_index
+            if not is_child_sync:
+                fingerprints.start(stream_name, account_id)
+
         if parent_ids is None:
             parent_ids = []
         if child_streams is None:
@@ -312,6 +505,9 @@ class TwitterAds:
         # tap config variabless
         # Twitter Ads does not accept True/False as boolean, must be true/false
         with_deleted = tap_config.get('with_deleted', 'true')
+        # Small-delta sync: probe incremental streams w/ a small page size first
+        small_delta_sync = str(tap_config.get('small_delta_sync', 'false')).lower() == 'true'
+        probe_count = int(tap_config.get('small_delta_probe_count') or DEFAULT_PROBE_COUNT)
         country_codes = tap_config.get('country_codes', '').replace(' ', '')
         country_code_list = country_codes.split(',')
         LOGGER.info('country_code_list = {}'.format(country_code_list)) # COMMENT OUT
@@ -378,8 +574,17 @@ class TwitterAds:
                 stream_name, self.url, API_VERSION, path))
             LOGGER.info('Stream: {} - Request params: {}'.format(stream_name, new_params))
 
+            # Small-delta sync: probe w/ a small page first (see can_probe)
+            stream_probe_count = None
+            has_selected_children = any(child in child_streams for child in (children or []))
+            if small_delta_sync and can_probe(
+                    bookmark_field, new_params, last_datetime == start_date, sub_type, has_selected_children):
+                stream_probe_count = probe_count
+                LOGGER.info('Stream: {} - Small-delta sync, probe count: {}'.format(stream_name, probe_count))
+
             # API Call
-            cursor = self.get_resource(stream_name, client, path, new_params)
+            with self.span('pagination', account_id, stream_name):
+                cursor = self.get_resource(stream_name, client, path, new_params, stream_probe_count)
 
             # cursor is an object like a generator(yield). First, it will be iterated for the parent stream with 
             # the parent's bookmark. But, for the child also we want to iterate through all parent records 
@@ -391,8 +596,10 @@ class TwitterAds:
 
             # Get stream metadata from catalog (for masking and validation)
             stream = catalog.get_stream(stream_name)
-            schema = stream.schema.to_dict()
+            schema = self.get_stream_schema(catalog, stream_name)
             stream_metadata = metadata.to_map(stream.metadata)
+            # Selected fields (and key/bookmark fields) to keep from each raw record
+            projection = get_projection(schema, stream_metadata, list(id_fields) + [bookmark_field])
 
             i = 0
             with metrics.record_counter(stream_name) as counter:
@@ -400,13 +607,16 @@ class TwitterAds:
                 # at that time this condition may become False.
                 if stream_name in selected_streams:
                     # Loop thru cursor records, break out if no more data or bookmark_value < last_dttm
-                    for record in cursor:
+                    for record in self.timed_iter(cursor, 'pagination', account_id, stream_name):
                         # Get dictionary for record
-                        record_dict = self.obj_to_dict(record)
+                        with self.span('obj_to_dict', account_id, stream_name):
+                            record_dict = self.obj_to_dict(record)
                         if not record_dict:
                             # Finish looping
                             LOGGER.info('Stream: {} - Finished Looping, no more data'.format(stream_name))
                             break
+                        # Only the selected fields are transformed
+                        record_dict = project_record(record_dict, projection)
 
                         # Get record's bookmark_value
                         # All bookmarked requests are sorted by updated_at descending
@@ -451,7 +661,8 @@ class TwitterAds:
                                     stream_name, key, record))
 
                             # Transform record from transform.py
-                            prepared_record = transform_record(stream_name, record_dict)
+                            with self.span('transform', account_id, stream_name):
+                                prepared_record = transform_record(stream_name, record_dict)
 
                             # Add account_id to record
                             if add_account_id:
@@ -459,18 +670,23 @@ class TwitterAds:
 
                         # Transform record with Singer Transformer
                         with Transformer() as transformer:
-                            transformed_record = transformer.transform(
-                                prepared_record,
-                                schema,
-                                stream_metadata)
-
-                            self.write_record(stream_name, transformed_record, time_extracted=time_extracted)
-                            counter.increment()
-
+                            with self.span('transformer', account_id, stream_name):
+                                transformed_record = transformer.transform(
+                                    prepared_record,
+                                    schema,
+                                    stream_metadata)
+
+                            # Fingerprints: skip records not changed since the previous run
+                            if fingerprints is None or fingerprints.is_changed(stream_name, account_id, \
+                                FingerprintIndex.get_record_key(record_dict, id_fields), transformed_record):
+                                with self.span('write', account_id, stream_name):
+                                    self.write_record(stream_name, transformed_record, \
+                                        time_extracted=time_extracted)
+                                counter.increment()
+                                total_records = total_records + 1
 
                             # Increment counters
                             i = i + 1
-                            total_records = total_records + 1
 
                             # End: for record in cursor
                         # End: with metrics as counter
@@ -511,8 +727,13 @@ class TwitterAds:
 
                         child_max_bookmark_value = None
                         child_counter = 0
+                        # parent_ids of the child stream (deduplicated)
+                        child_parent_ids = ParentIdSet()
+                        child_fingerprints = self.uses_fingerprints(child_stream_name)
+                        if child_fingerprints:
+                            self.fingerprint_index.start(child_stream_name, account_id)
                         # Loop thru cursor records, break out if no more data or child_bookmark_value < child_last_dttm
-                        for record in cursor_child:
+                        for record in self.timed_iter(cursor_child, 'pagination', account_id, child_stream_name):
                             # Get dictionary for record
                             record_dict = self.obj_to_dict(record)
 
@@ -538,16 +759,17 @@ class TwitterAds:
                             else:
                                 child_bookmark_value = child_last_dttm
 
-                            # Append parent_id to parent_ids
+                            # Add parent_id to child_parent_ids
                             parent_id = record_dict.get(parent_id_field)
-                            parent_ids.append(parent_id)
+                            child_parent_ids.add(parent_id)
 
                             child_counter = child_counter + 1
                         # End: for record in cursor
 
                         chunk = 0 # chunk number
                         # Make chunks of parent_ids
-                        for chunk_ids in split_list(parent_ids, parent_id_limit):
+                        LOGGER.info('Child Stream: {} - parent_ids: {}'.format(child_stream_name, len(child_parent_ids)))
+                        for chunk_ids in child_parent_ids.chunks(parent_id_limit):
                             # pylint: disable=line-too-long
                             LOGGER.info('Child Stream: {} - Syncing, chunk#: {}, parent_stream: {}, parent chunk_ids: {}'.format(
                                 child_stream_name, chunk, stream_name, chunk_ids))
@@ -574,6 +796,12 @@ class TwitterAds:
                             chunk = chunk + 1
                             # End: for chunk in parent_id_chunks
 
+                        # Tombstones only if all parents (so all child records) were read: not for incremental parents
+                        if child_fingerprints:
+                            child_key_properties = getattr(child_endpoint_config, 'key_properties', [])
+                            total_child_records = total_child_records + self.write_tombstones(child_stream_name, \
+                                account_id, child_key_properties, full_read=not bookmark_field)
+
                         # pylint: disable=line-too-long
                         LOGGER.info('Child Stream: {} - FINISHED Syncing, parent_stream: {}, account_id: {}'.format(
                             child_stream_name, stream_name, account_id))
@@ -598,6 +826,10 @@ class TwitterAds:
 
         LOGGER.info('Stream: {}, max_bookmark_value: {}'.format(stream_name, max_bookmark_value))
 
+        # Tombstones for records deleted since the previous run (top-level FULL_TABLE streams are fully read)
+        if fingerprints and not is_child_sync:
+            total_records = total_records + self.write_tombstones(stream_name, account_id, id_fields, full_read=True)
+
         # Update the state with the max_bookmark_value for all other streams except tweets stream if stream is selected
         if bookmark_field  and stream_name in selected_streams and stream_name != "tweets":
             self.write_bookmark(state, stream_name, max_bookmark_value, account_id)
@@ -607,6 +839,13 @@ class TwitterAds:
 
 # Class for all reports streams
 class Reports(TwitterAds):
+    # Orderings of entity activity windows (start, end) tried when packing entity_ids into async jobs
+    PACKING_ORDERS = {
+        'activity_start': lambda window: (window[0], window[1]),
+        'activity_end': lambda window: (window[1], window[0]),
+        'activity_duration': lambda window: (window[1] - window[0], window[0])
+    }
+
     # syncing for all report streams
     def sync_report(self,
                     client,
@@ -651,7 +890,14 @@ class Reports(TwitterAds):
         if report_entity in ['MEDIA_CREATIVE', 'ORGANIC_TWEET']:
             report_segment = None
 
-        # Initialize account and get account timezone
+        # Get schema and stream_metadata from catalog (for metric groups, Transformer masking and validation)
+        stream = catalog.get_stream(report_name)
+        schema = stream.schema.to_dict()
+        stream_metadata = metadata.to_map(stream.metadata)
+        selected_properties = get_selected_properties(schema, stream_metadata)
+
+        # Initialize account and get account timezone (pytz is only needed by reports)
+        import pytz # pylint: disable=import-outside-toplevel
         account = client.accounts(account_id)
         tzone = account.timezone
         timezone = pytz.timezone(tzone)
@@ -661,6 +907,19 @@ class Reports(TwitterAds):
         last_datetime = self.get_bookmark(state, report_name, start_date, account_id)
         last_dttm = strptime_to_utc(last_datetime).astimezone(timezone)
         max_bookmark_value = last_datetime
+        # Report records carry their end_time as epoch seconds, so the max is tracked as a number
+        max_bookmark_epoch = last_dttm.timestamp()
+
+        # Number of async results downloaded and transformed concurrently
+        download_workers = int(tap_config.get('report_download_workers') or 1)
+        transform_processes = int(tap_config.get('report_transform_processes') or 0)
+
+        # Skip report rows where all metrics are 0 (rows where all metrics are null are always skipped)
+        drop_zero_rows = str(tap_config.get('drop_zero_metric_rows', 'false')).lower() == 'true'
+
+        # Report rows as Singer records (singer) or columnar files w/ manifest records (arrow, parquet)
+        output_format = get_output_format(tap_config)
+        output_dir = tap_config.get('report_output_dir') or 'reports'
 
         # Get absolute start and end times
         attribution_window = int(tap_config.get('attribution_window', '14'))
@@ -668,232 +927,498 @@ class Reports(TwitterAds):
             report_granularity, timezone, last_dttm, attribution_window)
 
         # Initialize date window
-        if report_segment:
-            # Max is 45 days (segmented), set lower to avoid date/hour rounding issues
-            date_window_size = 42 # is the Answer
-        else:
-            # Max is 90 days, set lower to avoid date/hour rounding issues
-            date_window_size = 85
+        # Window size adapts to the report's granularity, segment and observed result size
+        date_window_size = self.get_date_window_size(state, report_name, account_id, \
+            report_granularity, report_segment, tap_config)
         window_start = abs_start
         window_end = (abs_start + timedelta(days=date_window_size))
         window_start_rounded = None
         window_end_rounded = None
         if window_end > abs_end:
             window_end = abs_end
+        # Max window size (days) after the memory soft limit was exceeded
+        memory_window_size = None
 
-        # DATE WINDOW LOOP
-        while window_start != abs_end:
-            entity_id_sets = []
-            entity_ids = []
-            window_start_rounded, window_end_rounded = self.round_times(
-                report_granularity, timezone, window_start, window_end)
-            window_start_str = window_start_rounded.strftime('%Y-%m-%dT%H:%M:%S%z')
-            window_end_str = window_end_rounded.strftime('%Y-%m-%dT%H:%M:%S%z')
-
-            LOGGER.info('Report: {} - Date window: {} to {}'.format(
-                report_name, window_start_str, window_end_str))
-
-            # ACCOUNT cannot use active_entities endpoint; but single Account ID
-            if report_entity == 'ACCOUNT':
-                entity_ids.append(account_id)
-                entity_id_sets = [
-                    {
-                        'placement': 'ALL_ON_TWITTER',
-                        'entity_ids': entity_ids,
-                        'start_time': window_start_str,
-                        'end_time': window_end_str
-                    },
-                    {
-                        'placement': 'PUBLISHER_NETWORK',
-                        'entity_ids': entity_ids,
-                        'start_time': window_start_str,
-                        'end_time': window_end_str
-                    }
-                ]
-
-            # ORGANIC_TWEET cannot use active_entities endpoint
-            elif report_entity == 'ORGANIC_TWEET':
-                LOGGER.info('Report: {} - GET ORGANINC_TWEET entity_ids'.format(report_name))
-                entity_ids = self.get_tweet_entity_ids(client, account_id, window_start, window_end)
-                entity_id_set = { # PUBLISHER_NETWORK is invalid placement for ORGANIC_TWEET
-                    'placement': 'ALL_ON_TWITTER',
-                    'entity_ids': entity_ids,
-                    'start_time': window_start_str,
-                    'end_time': window_end_str
-                }
-                entity_id_sets.append(entity_id_set)
-
-            # ALL OTHER entity types use active_entities endpoint
-            else:
-                # Reference: https://developer.twitter.com/en/docs/ads/analytics/api-reference/active-entities
-                # GET active_entities for entity
-                LOGGER.info('Report: {} - GET {} active_entities entity_ids'.format(
-                    report_name, report_entity))
-                active_entities_path = 'stats/accounts/{account_id}/active_entities'.replace(
-                    '{account_id}', account_id)
-                active_entities_params = {
-                    'entity': report_entity,
-                    'start_time': window_start_str,
-                    'end_time': window_end_str
-                }
-                LOGGER.info('Report: {} - active_entities GET URL: {}/{}/{}'.format(
-                    report_name, self.url, API_VERSION, active_entities_path))
-                LOGGER.info('Report: {} - active_entities params: {}'.format(
-                    report_name, active_entities_params))
-                active_entities = self.get_resource('active_entities', client, active_entities_path, \
-                    active_entities_params)
-
-                # Get active entity_ids, start, end for each placement type for date window
-                entity_id_sets = self.get_active_entity_sets(active_entities,
-                                                            report_name,
-                                                            account_id,
-                                                            report_entity,
-                                                            report_granularity,
-                                                            timezone,
-                                                            window_start,
-                                                            window_end)
-                # End: else (active_entities)
-
-            LOGGER.info('entity_id_sets = {}'.format(entity_id_sets)) # COMMENT OUT
-
-            # ASYNC report POST requests
-            # Get metric_groups for report_entity and report_egment
-            metric_groups = self.get_entity_metric_groups(report_entity, report_segment)
-
-            # Set sub_type and sub_type_ids for sub_type loop
-            if report_segment in ('LOCATIONS', 'METROS', 'POSTAL_CODES', 'REGIONS'):
-                sub_type = 'countries'
-                sub_type_ids = country_ids
-            elif report_segment in ('DEVICES', 'PLATFORM_VERSIONS'):
-                sub_type = 'platforms'
-                sub_type_ids = platform_ids
-            else: # NO sub_type (loop once thru sub_type loop)
-                sub_type = 'none'
-                sub_type_ids = ['none']
-
-            # POST ALL Queued ASYNC Jobs for Report
-            queued_job_ids = []
-            # SUB_TYPE LOOP
-            # Countries or Platforms loop (or single loop for sub_types = ['none'])
-            for sub_type_id in sub_type_ids:
-                sub_type_queued_job_ids = []
-                if sub_type == 'platforms':
-                    country_id = None
-                    platform_id = sub_type_id
-                elif sub_type == 'countries':
-                    country_id = sub_type_id
-                    platform_id = None
-                else:
-                    country_id = None
-                    platform_id = None
-
-                # ENTITY ID SET LOOP
-                for entity_id_set in entity_id_sets:
-                    entity_id_set_queued_job_ids = []
-                    LOGGER.info('entity_id_set = {}'.format(entity_id_set)) # COMMENT OUT
-                    placement = entity_id_set.get('placement')
-                    entity_ids = entity_id_set.get('entity_ids', [])
-                    start_time = entity_id_set.get('start_time')
-                    end_time = entity_id_set.get('end_time')
-                    LOGGER.info('Report: {} - placement: {}, start_time: {}, end_time: {}'.format(
-                        report_name, placement, start_time, end_time))
-
-                    # POST ASYNC JOBS for ENTITY ID SET (possibly many chunks)
-                    entity_id_set_queued_job_ids = self.post_queued_async_jobs(client,
-                                                                        account_id,
-                                                                        report_name,
-                                                                        report_entity,
-                                                                        entity_ids,
-                                                                        report_granularity,
-                                                                        report_segment,
-                                                                        metric_groups,
-                                                                        placement,
-                                                                        start_time,
-                                                                        end_time,
-                                                                        country_id,
-                                                                        platform_id)
-                    sub_type_queued_job_ids = sub_type_queued_job_ids + entity_id_set_queued_job_ids
-                    # End: for entity_id_set in entity_id_sets
+        # Transform process pool of the report, shut down after the last date window
+        transform_pool = None
+        if transform_processes > 0:
+            transform_pool = self.get_transform_pool(transform_processes)
+        try:
+            # DATE WINDOW LOOP
+            while window_start != abs_end:
+                window_memory = None
+                if self.memory_tracker:
+                    window_memory = self.memory_tracker.start('report_window', account_id, report_name)
+                # The window's memory unit is stopped even if the window fails
+                over_soft_limit = False
+                try:
+                    entity_id_sets = []
+                    entity_ids = []
+                    window_start_rounded, window_end_rounded = self.round_times(
+                        report_granularity, timezone, window_start, window_end)
+                    window_start_str = window_start_rounded.strftime('%Y-%m-%dT%H:%M:%S%z')
+                    window_end_str = window_end_rounded.strftime('%Y-%m-%dT%H:%M:%S%z')
+
+                    LOGGER.info('Report: {} - Date window: {} to {}'.format(
+                        report_name, window_start_str, window_end_str))
+
+                    # ACCOUNT cannot use active_entities endpoint; but single Account ID
+                    if report_entity == 'ACCOUNT':
+                        entity_ids.append(account_id)
+                        entity_id_sets = [
+                            {
+                                'placement': 'ALL_ON_TWITTER',
+                                'entity_ids': entity_ids,
+                                'start_time': window_start_str,
+                                'end_time': window_end_str
+                            },
+                            {
+                                'placement': 'PUBLISHER_NETWORK',
+                                'entity_ids': entity_ids,
+                                'start_time': window_start_str,
+                                'end_time': window_end_str
+                            }
+                        ]
+
+                    # ORGANIC_TWEET cannot use active_entities endpoint
+                    elif report_entity == 'ORGANIC_TWEET':
+                        LOGGER.info('Report: {} - GET ORGANINC_TWEET entity_ids'.format(report_name))
+                        entity_ids = self.get_tweet_entity_ids(client, account_id, window_start, window_end)
+                        entity_id_set = { # PUBLISHER_NETWORK is invalid placement for ORGANIC_TWEET
+                            'placement': 'ALL_ON_TWITTER',
+                            'entity_ids': entity_ids,
+                            'start_time': window_start_str,
+                            'end_time': window_end_str
+                        }
+                        entity_id_sets.append(entity_id_set)
+
+                    # ALL OTHER entity types use active_entities endpoint
+                    else:
+                        # Reference: https://developer.twitter.com/en/docs/ads/analytics/api-reference/active-entities
+                        # GET active_entities for entity
+                        LOGGER.info('Report: {} - GET {} active_entities entity_ids'.format(
+                            report_name, report_entity))
+                        active_entities_path = 'stats/accounts/{account_id}/active_entities'.replace(
+                            '{account_id}', account_id)
+                        active_entities_params = {
+                            'entity': report_entity,
+                            'start_time': window_start_str,
+                            'end_time': window_end_str
+                        }
+                        LOGGER.info('Report: {} - active_entities GET URL: {}/{}/{}'.format(
+                            report_name, self.url, API_VERSION, active_entities_path))
+                        LOGGER.info('Report: {} - active_entities params: {}'.format(
+                            report_name, active_entities_params))
+                        active_entities = self.get_resource('active_entities', client, active_entities_path, \
+                            active_entities_params)
+
+                        # Get active entity_ids, start, end for each placement type for date window
+                        entity_id_sets = self.get_active_entity_sets(active_entities,
+                                                                    report_name,
+                                                                    account_id,
+                                                                    report_entity,
+                                                                    report_granularity,
+                                                                    timezone,
+                                                                    window_start,
+                                                                    window_end)
+                        # End: else (active_entities)
+
+                    LOGGER.info('entity_id_sets = {}'.format(
+                        [self.get_entity_id_set_log(entity_id_set) for entity_id_set in entity_id_sets]))
+
+                    # ASYNC report POST requests
+                    # Get metric_groups for report_entity and report_egment, for the selected report properties
+                    metric_groups = self.get_entity_metric_groups(report_entity, report_segment, selected_properties)
+
+                    # Set sub_type and sub_type_ids for sub_type loop
+                    if report_segment in ('LOCATIONS', 'METROS', 'POSTAL_CODES', 'REGIONS'):
+                        sub_type = 'countries'
+                        sub_type_ids = country_ids
+                    elif report_segment in ('DEVICES', 'PLATFORM_VERSIONS'):
+                        sub_type = 'platforms'
+                        sub_type_ids = platform_ids
+                    else: # NO sub_type (loop once thru sub_type loop)
+                        sub_type = 'none'
+                        sub_type_ids = ['none']
+
+                    # Number of entity_ids in the date window, for the adaptive date window size
+                    entity_count = len(set(entity_id for entity_id_set in entity_id_sets \
+                        for entity_id in entity_id_set.get('entity_ids', [])))
+
+                    # POST ALL Queued ASYNC Jobs for Report
+                    jobs_start = time.time()
+                    queued_job_ids = []
+                    # SUB_TYPE LOOP
+                    # Countries or Platforms loop (or single loop for sub_types = ['none'])
+                    for sub_type_id in sub_type_ids:
+                        sub_type_queued_job_ids = []
+                        if sub_type == 'platforms':
+                            country_id = None
+                            platform_id = sub_type_id
+                        elif sub_type == 'countries':
+                            country_id = sub_type_id
+                            platform_id = None
+                        else:
+                            country_id = None
+                            platform_id = None
+
+                        # ENTITY ID SET LOOP
+                        for entity_id_set in entity_id_sets:
+                            entity_id_set_queued_job_ids = []
+                            LOGGER.info('entity_id_set = {}'.format(self.get_entity_id_set_log(entity_id_set)))
+                            placement = entity_id_set.get('placement')
+                            entity_ids = entity_id_set.get('entity_ids', [])
+                            entity_windows = entity_id_set.get('entity_windows')
+                            start_time = entity_id_set.get('start_time')
+                            end_time = entity_id_set.get('end_time')
+                            LOGGER.info('Report: {} - placement: {}, start_time: {}, end_time: {}'.format(
+                                report_name, placement, start_time, end_time))
+
+                            # POST ASYNC JOBS for ENTITY ID SET (possibly many chunks)
+                            entity_id_set_queued_job_ids = self.post_queued_async_jobs(client,
+                                                                                account_id,
+                                                                                report_name,
+                                                                                report_entity,
+                                                                                entity_ids,
+                                                                                report_granularity,
+                                                                                report_segment,
+                                                                                metric_groups,
+                                                                                placement,
+                                                                                start_time,
+                                                                                end_time,
+                                                                                country_id,
+                                                                                platform_id,
+                                                                                entity_windows,
+                                                                                timezone)
+                            sub_type_queued_job_ids = sub_type_queued_job_ids + entity_id_set_queued_job_ids
+                            # End: for entity_id_set in entity_id_sets
                 
-                queued_job_ids = queued_job_ids + sub_type_queued_job_ids
-                # End: for sub_type_id in sub_type_ids
-
-            # WHILE JOBS STILL RUNNING LOOP, GET ASYNC JOB STATUS
-            # GET ASYNC Status Reference: https://developer.twitter.com/en/docs/ads/analytics/api-reference/asynchronous#get-stats-jobs-accounts-account-id 
-            async_results_urls = []
-            async_results_urls = self.get_async_results_urls(client, account_id, report_name, queued_job_ids)
-            LOGGER.info('async_results_urls = {}'.format(async_results_urls)) # COMMENT OUT
-
-            # Get stream_metadata from catalog (for Transformer masking and validation below)
-            stream = catalog.get_stream(report_name)
-            schema = stream.schema.to_dict()
-            stream_metadata = metadata.to_map(stream.metadata)
-
-            # ASYNC RESULTS DOWNLOAD / PROCESS LOOP
-            # RISK: What if some reports error or don't finish?
-            # Possibly move this code block withing ASYNC Status Check
-            total_records = 0
-            for async_results_url in async_results_urls:
-
-                # GET DOWNLOAD DATA FROM URL
-                LOGGER.info('Report: {} - GET async data from URL: {}'.format(
-                    report_name, async_results_url))
-                async_data = self.get_async_data(report_name, client, async_results_url)
-                # LOGGER.info('async_data = {}'.format(async_data)) # COMMENT OUT
-
-                # time_extracted: datetime when the data was extracted from the API
-                time_extracted = utils.now()
-
-                # TRANSFORM REPORT DATA
-                transformed_data = []
-                transformed_data = transform_report(report_name, async_data, account_id)
-                # LOGGER.info('transformed_data = {}'.format(transformed_data)) # COMMENT OUT
-                if transformed_data is None or transformed_data == []:
-                    LOGGER.info('Report: {} - NO TRANSFORMED DATA for URL: {}'.format(
-                        report_name, async_results_url))
-
-                # PROCESS RESULTS TO TARGET RECORDS
-                with metrics.record_counter(report_name) as counter:
-                    for record in transformed_data:
-                        # Transform record with Singer Transformer
-
-                        # Evalueate max_bookmark_value
-                        end_time = record.get('end_time') # String
-                        end_dttm = strptime_to_utc(end_time) # Datetime
-                        max_bookmark_dttm = strptime_to_utc(max_bookmark_value) # Datetime
-                        if end_dttm > max_bookmark_dttm: # Datetime comparison
-                            max_bookmark_value = end_time # String
-
-                        with Transformer() as transformer:
-                            transformed_record = transformer.transform(
-                                record,
-                                schema,
-                                stream_metadata)
-
-                            self.write_record(report_name, transformed_record, time_extracted=time_extracted)
+                        queued_job_ids = queued_job_ids + sub_type_queued_job_ids
+                        # End: for sub_type_id in sub_type_ids
+
+                    # WHILE JOBS STILL RUNNING LOOP, GET ASYNC JOB STATUS
+                    # GET ASYNC Status Reference: https://developer.twitter.com/en/docs/ads/analytics/api-reference/asynchronous#get-stats-jobs-accounts-account-id 
+                    async_results_urls = []
+                    async_results_urls = self.get_async_results_urls(client, account_id, report_name, queued_job_ids)
+                    LOGGER.info('async_results_urls = {}'.format(async_results_urls)) # COMMENT OUT
+                    job_seconds = time.time() - jobs_start
+
+                    # ASYNC RESULTS DOWNLOAD / PROCESS LOOP
+                    # RISK: What if some reports error or don't finish?
+                    # Possibly move this code block withing ASYNC Status Check
+                    # Results are downloaded/transformed concurrently (see get_async_results),
+                    #   but returned and written in async_results_urls order
+                    total_records = 0
+                    result_rows = 0
+                    result_entity_days = 0
+                    columnar_writer = None
+                    if output_format != 'singer':
+                        columnar_writer = ColumnarWriter(output_format, output_dir, report_name, account_id, \
+                            window_start_rounded, window_end_rounded, schema, stream_metadata)
+                    async_results = self.get_async_results(client, report_name, account_id, async_results_urls, \
+                        drop_zero_rows, download_workers, transform_processes, transform_pool)
+                    # A failed window (download, transform or write) removes its partial columnar file
+                    manifest_record = None
+                    try:
+                        for async_results_url, async_data_size, time_extracted, transformed_data in async_results:
+                            rows, entity_days = async_data_size
+                            result_rows = result_rows + rows
+                            result_entity_days = result_entity_days + entity_days
+
+                            # LOGGER.info('transformed_data = {}'.format(transformed_data)) # COMMENT OUT
+                            if transformed_data is None or transformed_data == []:
+                                LOGGER.info('Report: {} - NO TRANSFORMED DATA for URL: {}'.format(
+                                    report_name, async_results_url))
+
+                            # WRITE RESULTS TO COLUMNAR FILE (manifest record written after the date window)
+                            if columnar_writer:
+                                for record in transformed_data:
+                                    end_epoch = record.pop(END_TIME_EPOCH_KEY) # Epoch seconds
+                                    if end_epoch > max_bookmark_epoch: # Number comparison
+                                        max_bookmark_epoch = end_epoch
+                                columnar_writer.write_records(transformed_data)
+                                continue
+
+                            # PROCESS RESULTS TO TARGET RECORDS
+                            with metrics.record_counter(report_name) as counter:
+                                for record in transformed_data:
+                                    # Transform record with Singer Transformer
+
+                                    # Evalueate max_bookmark_epoch
+                                    end_epoch = record.pop(END_TIME_EPOCH_KEY) # Epoch seconds
+                                    if end_epoch > max_bookmark_epoch: # Number comparison
+                                        max_bookmark_epoch = end_epoch
+
+                                    with Transformer() as transformer:
+                                        with self.span('transformer', account_id, report_name):
+                                            transformed_record = transformer.transform(
+                                                record,
+                                                schema,
+                                                stream_metadata)
+
+                                        with self.span('write', account_id, report_name):
+                                            self.write_record(report_name, transformed_record, time_extracted=time_extracted)
+                                        counter.increment()
+
+                            # Increment total_records
+                            total_records = total_records + counter.value
+                            # End: for async_results_url in async_results_urls
+                        if columnar_writer:
+                            manifest_record = columnar_writer.close()
+                    except Exception:
+                        if columnar_writer:
+                            columnar_writer.abort()
+                        raise
+
+                    # Write the manifest record for the date window's columnar file
+                    if manifest_record:
+                        with metrics.record_counter(report_name) as counter:
+                            self.write_record(report_name, manifest_record, time_extracted=utils.now())
                             counter.increment()
-
-                # Increment total_records
-                total_records = total_records + counter.value
-                # End: for async_results_url in async_results_urls
-
-            # Update the state with the max_bookmark_value for the date window
-            self.write_bookmark(state, report_name, max_bookmark_value, account_id)
-
-            # Increment date window
-            window_start = window_end
-            window_end = window_start + timedelta(days=date_window_size)
-            if window_end > abs_end:
-                window_end = abs_end
-            # End: date window
+                        total_records = total_records + manifest_record.get('record_count')
+
+                    # Update the report's observed result size (written to the state with the bookmark)
+                    window_days = (window_end_rounded - window_start_rounded).total_seconds() / 86400
+                    self.update_report_window_stats(state, report_name, account_id, entity_count, \
+                        window_days, result_rows, result_entity_days, job_seconds)
+
+                    # Update the state with the max_bookmark_value for the date window
+                    if max_bookmark_epoch > strptime_to_utc(max_bookmark_value).timestamp():
+                        max_bookmark_value = strftime(datetime.fromtimestamp(max_bookmark_epoch, pytz.utc)) # String
+                    self.write_bookmark(state, report_name, max_bookmark_value, account_id)
+
+                    # Increment date window
+                    date_window_size = self.get_date_window_size(state, report_name, account_id, \
+                        report_granularity, report_segment, tap_config)
+                finally:
+                    if window_memory:
+                        over_soft_limit = self.memory_tracker.stop(window_memory)
+                # Memory soft limit exceeded in the window (incl. its downloads): halve the next windows and
+                #   download/transform the async results serially
+                if over_soft_limit:
+                    memory_window_size = max(1, int(window_days / 2))
+                    download_workers = 1
+                    transform_processes = 0
+                    if transform_pool:
+                        transform_pool.shutdown()
+                        transform_pool = None
+                    LOGGER.warning('Report: {} - memory soft limit exceeded, date_window_size: {} days, ' \
+                        'serial downloads'.format(report_name, memory_window_size))
+                if memory_window_size:
+                    date_window_size = min(date_window_size, memory_window_size)
+                window_start = window_end
+                window_end = window_start + timedelta(days=date_window_size)
+                if window_end > abs_end:
+                    window_end = abs_end
+                # End: date window
+        finally:
+            if transform_pool:
+                transform_pool.shutdown()
 
         return total_records
         # End sync_report
 
+    # Process pool running transform_report, created once per report (spawned processes are slow to start)
+    def get_transform_pool(self, transform_processes):
+        # multiprocessing is only imported when transform processes are used
+        import multiprocessing # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor # pylint: disable=import-outside-toplevel
+        return ProcessPoolExecutor(max_workers=transform_processes, mp_context=multiprocessing.get_context('spawn'))
+
+
+    # Download and transform the async results of a date window
+    # Yields (async_results_url, (rows, entity_days), time_extracted, transformed_data) in URL order.
+    # download_workers: threads downloading/decompressing results
+    # transform_processes: processes running transform_report, 0 to transform in the download thread
+    # transform_pool: the report's transform pool (see get_transform_pool), created here if not provided
+    # Each transform is submitted to the pool as its download completes, so downloads and transforms
+    #   overlap; up to download_workers + transform_processes results are in flight.
+    def get_async_results(self, client, report_name, account_id, async_results_urls, drop_zero_rows, \
+        download_workers=1, transform_processes=0, transform_pool=None):
+        if download_workers <= 1 and transform_processes <= 0:
+            for async_results_url in async_results_urls:
+                yield self.get_async_result(client, report_name, account_id, async_results_url, \
+                    drop_zero_rows)
+            return
+
+        with ExitStack() as stack:
+            if transform_processes > 0 and transform_pool is None:
+                transform_pool = stack.enter_context(self.get_transform_pool(transform_processes))
+            # Entered last, so downloads (and their transform submissions) finish before the pool shuts down
+            download_pool = stack.enter_context(ThreadPoolExecutor(max_workers=max(download_workers, 1)))
+
+            max_pending = max(download_workers, 1) + max(transform_processes, 0)
+            pending_results = deque()
+            for async_results_url in async_results_urls:
+                result = download_pool.submit(self.get_async_result, client, report_name, account_id, \
+                    async_results_url, drop_zero_rows, transform_pool is None)
+                if transform_pool:
+                    download = result
+                    result = Future()
+                    download.add_done_callback(functools.partial(self.submit_transform, transform_pool, \
+                        result, report_name, account_id, drop_zero_rows))
+                pending_results.append(result)
+                # Limit results held in memory; wait for the oldest result before downloading more
+                if len(pending_results) >= max_pending:
+                    yield pending_results.popleft().result()
+            while pending_results:
+                yield pending_results.popleft().result()
+
+
+    # Download and decompress one async result, and transform it unless transform is False
+    #   (transformed_data is then the async data, see submit_transform)
+    def get_async_result(self, client, report_name, account_id, async_results_url, drop_zero_rows, \
+        transform=True):
+        # GET DOWNLOAD DATA FROM URL
+        LOGGER.info('Report: {} - GET async data from URL: {}'.format(
+            report_name, async_results_url))
+        with self.span('download', account_id, report_name), \
+            self.track_memory('download', account_id, report_name):
+            async_data = self.get_async_data(report_name, client, async_results_url)
+        # LOGGER.info('async_data = {}'.format(async_data)) # COMMENT OUT
+        async_data_size = self.get_result_size(async_data)
+
+        # time_extracted: datetime when the data was extracted from the API
+        time_extracted = utils.now()
+        if not transform:
+            return async_results_url, async_data_size, time_extracted, async_data
+
+        # TRANSFORM REPORT DATA
+        with self.span('transform_report', account_id, report_name):
+            transformed_data = transform_report(report_name, async_data, account_id, drop_zero_rows)
+        return async_results_url, async_data_size, time_extracted, transformed_data
+
+
+    # Done callback of a download (in the download thread): submits transform_report to the process pool
+    #   and sets the transformed result (or the error) on result when the transform completes
+    def submit_transform(self, transform_pool, result, report_name, account_id, drop_zero_rows, download):
+        try:
+            async_results_url, async_data_size, time_extracted, async_data = download.result()
+            transform_start = time.perf_counter()
+            transform = transform_pool.submit(transform_report, report_name, async_data, account_id, \
+                drop_zero_rows)
+        except Exception as err: # pylint: disable=broad-except
+            result.set_exception(err)
+            return
+
+        def set_transformed(transform):
+            # The span includes the wait for a free transform process
+            if self.stage_timer:
+                self.stage_timer.add('transform_report', account_id, report_name, transform_start, \
+                    time.perf_counter())
+            try:
+                result.set_result((async_results_url, async_data_size, time_extracted, transform.result()))
+            except Exception as err: # pylint: disable=broad-except
+                result.set_exception(err)
+        transform.add_done_callback(set_transformed)
+
+
+    # Adaptive date window size (days) for a report
+    # Max is 45 days (segmented) or 90 days (not segmented), set lower to avoid date/hour rounding issues.
+    # Within the max, the window is sized to keep each async job's result within
+    #   report_target_job_rows (rows: entity x segment x time slot) and, once observed,
+    #   report_target_job_seconds (time for the window's jobs to finish).
+    # Rows per entity per day are estimated from granularity and segment cardinality, and
+    #   replaced by the report's observed result size stored in the state (report_windows).
+    def get_date_window_size(self, state, report_name, account_id, report_granularity, \
+        report_segment, tap_config):
+        if report_segment:
+            max_window_size = 42 # is the Answer
+        else:
+            max_window_size = 85
+
+        # TOTAL reports return one value per entity/segment, whatever the window size
+        if report_granularity == 'TOTAL':
+            return max_window_size
+
+        target_job_rows = float(tap_config.get('report_target_job_rows') or DEFAULT_TARGET_JOB_ROWS)
+        target_job_seconds = float(tap_config.get('report_target_job_seconds') or DEFAULT_TARGET_JOB_SECONDS)
+
+        window_stats = self.get_report_window_stats(state, report_name, account_id)
+        rows_per_entity_day = window_stats.get('rows_per_entity_day')
+        if not rows_per_entity_day:
+            slots_per_day = 24 if report_granularity == 'HOUR' else 1
+            segment_cardinality = 1
+            if report_segment:
+                segment_cardinality = SEGMENT_CARDINALITY.get(report_segment, DEFAULT_SEGMENT_CARDINALITY)
+            rows_per_entity_day = slots_per_day * segment_cardinality
+        entities_per_job = min(window_stats.get('entity_count') or 20, 20)
+
+        date_window_size = target_job_rows / (rows_per_entity_day * entities_per_job)
+        job_seconds_per_day = window_stats.get('job_seconds_per_day')
+        if job_seconds_per_day:
+            date_window_size = min(date_window_size, target_job_seconds / job_seconds_per_day)
+
+        date_window_size = max(1, min(max_window_size, int(date_window_size)))
+        LOGGER.info('Report: {} - date_window_size: {} days, rows_per_entity_day: {}, entities_per_job: {}'.format(
+            report_name, date_window_size, rows_per_entity_day, entities_per_job))
+        return date_window_size
+
+
+    # Observed result size of a report, by account
+    def get_report_window_stats(self, state, report_name, account_id):
+        return (state or {}).get('report_windows', {}).get(report_name, {}).get(account_id, {})
+
+
+    # Update the observed result size of a report with a finished date window
+    # Values are averaged with the previous windows (exponential moving average)
+    def update_report_window_stats(self, state, report_name, account_id, entity_count, window_days, \
+        result_rows, result_entity_days, job_seconds):
+        window_stats = dict(self.get_report_window_stats(state, report_name, account_id))
+
+        def moving_average(key, value):
+            previous_value = window_stats.get(key)
+            if previous_value:
+                value = (previous_value + value) / 2
+            window_stats[key] = round(value, 3)
+
+        if result_entity_days:
+            moving_average('rows_per_entity_day', result_rows / result_entity_days)
+        if window_days and result_rows:
+            moving_average('job_seconds_per_day', job_seconds / window_days)
+        if entity_count:
+            window_stats['entity_count'] = entity_count
+
+        state.setdefault('report_windows', {}).setdefault(report_name, {})[account_id] = window_stats
+        LOGGER.info('Report: {} - report_windows: {}'.format(report_name, window_stats))
+
+
+    # Result size of an async job: rows (entity x segment x time slot) and entity days requested
+    def get_result_size(self, async_data):
+        time_series_length = int(async_data.get('time_series_length', 1))
+        params = async_data.get('request', {}).get('params', {})
+        start_time = params.get('start_time')
+        end_time = params.get('end_time')
+        days = 0
+        if start_time and end_time:
+            days = (strptime_to_utc(end_time) - strptime_to_utc(start_time)).total_seconds() / 86400
+
+        rows = 0
+        entity_days = 0
+        for id_record in async_data.get('data') or []:
+            rows = rows + len(id_record.get('id_data') or []) * time_series_length
+            entity_days = entity_days + days
+        return rows, entity_days
+
+
     # GET Metric Groups allowed for each Entity, w/ Segment constraints
     # Metrics & Segmentation: https://developer.twitter.com/en/docs/ads/analytics/overview/metrics-and-segmentation
     # Google Sheet summary: https://docs.google.com/spreadsheets/d/1Cn3B1TPZOjg9QhnnF44Myrs3W8hNOSyFRH6qn8SCc7E/edit?usp=sharing
-    def get_entity_metric_groups(self, report_entity, report_segment):
+    # Report properties (nested objects) populated by each metric group (see transform_report)
+    METRIC_GROUP_PROPERTIES = {
+        'ENGAGEMENT': 'engagement',
+        'BILLING': 'billing',
+        'VIDEO': 'video',
+        'MEDIA': 'media',
+        'WEB_CONVERSION': 'web_conversion',
+        'MOBILE_CONVERSION': 'mobile_conversion',
+        'LIFE_TIME_VALUE_MOBILE_CONVERSION': 'mobile_conversion'
+    }
+
+    # metric_groups allowed for the report entity and segment
+    # selected_properties: selected top-level report properties; only metric groups for selected
+    #   properties are requested (the first allowed metric group if none are selected).
+    def get_entity_metric_groups(self, report_entity, report_segment, selected_properties=None):
         # Entity type: Set metric_groups, instantiate object
         all_metric_groups = [
             'ENGAGEMENT',
@@ -934,6 +1459,12 @@ class Reports(TwitterAds):
         elif report_entity == 'ORGANIC_TWEET':
             metric_groups = ['ENGAGEMENT', 'VIDEO']
 
+        if metric_groups and selected_properties is not None:
+            selected_metric_groups = [metric_group for metric_group in metric_groups \
+                if self.METRIC_GROUP_PROPERTIES.get(metric_group) in selected_properties]
+            # Async jobs require at least one metric group
+            metric_groups = selected_metric_groups or metric_groups[:1]
+
         return metric_groups
 
 
@@ -997,6 +1528,18 @@ class Reports(TwitterAds):
         return entity_ids
 
 
+    # Entity id set for logs: placement, time range, entity ids and the number of entity windows
+    #   (the entity windows, a pair of datetimes per entity, are not logged)
+    def get_entity_id_set_log(self, entity_id_set):
+        return {
+            'placement': entity_id_set.get('placement'),
+            'start_time': entity_id_set.get('start_time'),
+            'end_time': entity_id_set.get('end_time'),
+            'entity_ids': entity_id_set.get('entity_ids', []),
+            'entity_windows': len(entity_id_set.get('entity_windows') or {})
+        }
+
+
     # GET Active Entity IDs w/in date window (rounded for granularity) for an entity type
     def get_active_entity_sets(self, active_entities, report_name, account_id, report_entity, \
         report_granularity, timezone, window_start, window_end):
@@ -1009,6 +1552,7 @@ class Reports(TwitterAds):
         for placement in self.PLACEMENTS: # ALL_ON_TWITTER, PUBLISHER_NETWORK
             # LOGGER.info('placement = {}'.format(placement)) # COMMENT OUT
             entity_ids = []
+            entity_windows = {} # entity_id: (activity start, activity end), used to pack async jobs
             min_start = None
             max_end = None
             min_start_rounded = window_start
@@ -1027,6 +1571,7 @@ class Reports(TwitterAds):
                 # If active_entity in placement, append; and determine min/max dates
                 if placement in entity_placements:
                     entity_ids.append(entity_id)
+                    entity_windows[entity_id] = (entity_start, entity_end)
                     if ent == 0:
                         min_start = entity_start
                         max_end = entity_end
@@ -1060,9 +1605,10 @@ class Reports(TwitterAds):
                     'placement': placement,
                     'entity_ids': entity_ids,
                     'start_time': min_start_rounded.strftime('%Y-%m-%dT%H:%M:%S%z'),
-                    'end_time': max_end_rounded.strftime('%Y-%m-%dT%H:%M:%S%z')
+                    'end_time': max_end_rounded.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'entity_windows': entity_windows
                 }
-                LOGGER.info('entity_id_set = {}'.format(entity_id_set)) # COMMENT OUT
+                LOGGER.info('entity_id_set = {}'.format(self.get_entity_id_set_log(entity_id_set)))
                 entity_id_sets.append(entity_id_set)
 
             # End: for placement in PLACEMENTS
@@ -1088,16 +1634,23 @@ class Reports(TwitterAds):
     #      limited to 45 day windows (for SEGMENT queries), 90 days (for non-SEGMENTED)
     # pylint: enable=line-too-long
     def post_queued_async_jobs(self, client, account_id, report_name, report_entity, entity_ids, report_granularity, \
-        report_segment, metric_groups, placement, start_time, end_time, country_id, platform_id):
+        report_segment, metric_groups, placement, start_time, end_time, country_id, platform_id, \
+        entity_windows=None, timezone=None):
         queued_job_ids = []
+        # Pack entity_ids with similar activity windows into full chunks of 20
+        job_chunks = self.pack_entity_id_chunks(entity_ids, entity_windows, report_granularity, \
+            timezone, start_time, end_time)
+        self.log_job_cost(report_name, placement, entity_ids, entity_windows, report_granularity, \
+            start_time, end_time, job_chunks)
+
         # CHUNK ENTITY_IDS LOOP
         chunk = 0 # chunk number
-        # Make chunks of 20 of entity_ids
-        for chunk_ids in split_list(entity_ids, 20):
+        for job_chunk in job_chunks:
+            chunk_ids = job_chunk.get('entity_ids')
             # POST async_queued_job for report entity chunk_ids
             # Reference: https://developer.twitter.com/en/docs/ads/analytics/api-reference/asynchronous#post-stats-jobs-accounts-account-id
-            LOGGER.info('Report: {} - POST ASYNC queued_job, chunk#: {}'.format(
-                report_name, chunk))
+            LOGGER.info('Report: {} - POST ASYNC queued_job, chunk#: {}, start_time: {}, end_time: {}'.format(
+                report_name, chunk, job_chunk.get('start_time'), job_chunk.get('end_time')))
             queued_job_path = 'stats/jobs/accounts/{account_id}'.replace(
                 '{account_id}', account_id)
             queued_job_params = {
@@ -1107,8 +1660,8 @@ class Reports(TwitterAds):
                 'metric_groups': ','.join(map(str, metric_groups)),
                 'placement': placement,
                 'granularity': report_granularity,
-                'start_time': start_time,
-                'end_time': end_time,
+                'start_time': job_chunk.get('start_time'),
+                'end_time': job_chunk.get('end_time'),
                 # Optional params
                 'segmentation_type': report_segment,
                 'country': country_id,
@@ -1120,17 +1673,142 @@ class Reports(TwitterAds):
                 report_name, queued_job_params))
 
             # POST queued_job: asynchronous job
-            queued_job = self.post_resource('queued_job', client, queued_job_path, \
-                queued_job_params)
+            with self.span('job_post', account_id, report_name):
+                queued_job = self.post_resource('queued_job', client, queued_job_path, \
+                    queued_job_params)
 
             queued_job_data = queued_job.get('data')
             queued_job_id = queued_job_data.get('id_str')
             queued_job_ids.append(queued_job_id)
             LOGGER.info('queued_job_ids = {}'.format(queued_job_ids)) # COMMENT OUT
-            # End: for chunk_ids in entity_ids
+            chunk = chunk + 1
+            # End: for job_chunk in job_chunks
         return queued_job_ids
 
 
+    # Group entity_ids by similar activity window and narrow each job to its group's activity
+    # Entities are ordered by activity window, so each chunk of 20 holds entities that were
+    #   active at about the same time; the job start/end is the chunk's min start/max end,
+    #   rounded for granularity and limited to the entity_id_set's start/end.
+    # Each ordering in PACKING_ORDERS is tried, and the one with the lowest job cost is used.
+    # Entity IDs without an activity window (ACCOUNT, ORGANIC_TWEET) keep the set's start/end.
+    def pack_entity_id_chunks(self, entity_ids, entity_windows, report_granularity, timezone, \
+        start_time, end_time, chunk_size=20):
+        # Remove duplicate entity_ids (keep API order), a duplicate only adds a ragged chunk
+        unique_entity_ids = list(dict.fromkeys(entity_ids))
+
+        if not entity_windows or timezone is None:
+            return [{
+                'entity_ids': chunk_ids,
+                'start_time': start_time,
+                'end_time': end_time
+            } for chunk_ids in split_list(unique_entity_ids, chunk_size)]
+
+        set_start = strptime_to_utc(start_time)
+        set_end = strptime_to_utc(end_time)
+
+        def activity_window(entity_id):
+            return entity_windows.get(entity_id, (set_start, set_end))
+
+        best_order_name = None
+        best_job_chunks = None
+        best_cost = None
+        for order_name, order_key in self.PACKING_ORDERS.items():
+            # order_key is bound per ordering (not the loop variable)
+            packed_entity_ids = sorted(unique_entity_ids, \
+                key=lambda entity_id, order_key=order_key: order_key(activity_window(entity_id)))
+
+            job_chunks = []
+            for chunk_ids in split_list(packed_entity_ids, chunk_size):
+                chunk_start = min(activity_window(entity_id)[0] for entity_id in chunk_ids)
+                chunk_end = max(activity_window(entity_id)[1] for entity_id in chunk_ids)
+                chunk_start, chunk_end = self.round_times(report_granularity, timezone, chunk_start, chunk_end)
+                if chunk_start < set_start:
+                    chunk_start = set_start.astimezone(timezone)
+                if chunk_end > set_end:
+                    chunk_end = set_end.astimezone(timezone)
+                job_chunks.append({
+                    'entity_ids': chunk_ids,
+                    'start_time': chunk_start.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'end_time': chunk_end.strftime('%Y-%m-%dT%H:%M:%S%z')
+                })
+
+            cost = self.get_job_cost(job_chunks, entity_windows, report_granularity)
+            LOGGER.debug('Job packing order: {}, requested_slots: {}'.format(
+                order_name, cost.get('requested_slots')))
+            if best_cost is None or cost.get('requested_slots') < best_cost.get('requested_slots'):
+                best_order_name = order_name
+                best_job_chunks = job_chunks
+                best_cost = cost
+
+        LOGGER.info('Job packing order: {}, jobs: {}, requested_slots: {}'.format(
+            best_order_name, best_cost.get('jobs'), best_cost.get('requested_slots')))
+        return best_job_chunks
+
+
+    # Job cost model for a list of job chunks
+    #   jobs: number of async jobs
+    #   requested_hours: sum of each job's end_time - start_time
+    #   requested_slots: time slots returned by the jobs, one series per entity_id
+    #       (HOUR: 1 hour slots, DAY: 1 day slots, TOTAL: 1 slot per job)
+    #   active_slots: time slots inside each entity's activity window
+    #   zero_slots: requested_slots outside of activity, returned as zero/null metrics
+    def get_job_cost(self, job_chunks, entity_windows, report_granularity):
+        slot_hours = {'HOUR': 1, 'DAY': 24}.get(report_granularity)
+
+        def get_slots(slot_start, slot_end):
+            hours = (slot_end - slot_start).total_seconds() / 3600
+            if hours <= 0:
+                return 0
+            if slot_hours is None: # TOTAL
+                return 1
+            return math.ceil(hours / slot_hours)
+
+        cost = {
+            'jobs': len(job_chunks),
+            'requested_hours': 0,
+            'requested_slots': 0,
+            'active_slots': 0
+        }
+        for job_chunk in job_chunks:
+            job_start = strptime_to_utc(job_chunk.get('start_time'))
+            job_end = strptime_to_utc(job_chunk.get('end_time'))
+            job_slots = get_slots(job_start, job_end)
+            cost['requested_hours'] = cost['requested_hours'] + (job_end - job_start).total_seconds() / 3600
+            for entity_id in job_chunk.get('entity_ids', []):
+                cost['requested_slots'] = cost['requested_slots'] + job_slots
+                entity_window = (entity_windows or {}).get(entity_id)
+                if entity_window:
+                    active_slots = get_slots(max(job_start, entity_window[0]), min(job_end, entity_window[1]))
+                    cost['active_slots'] = cost['active_slots'] + min(max(active_slots, 1), job_slots)
+                else:
+                    cost['active_slots'] = cost['active_slots'] + job_slots
+        cost['zero_slots'] = cost['requested_slots'] - cost['active_slots']
+        return cost
+
+
+    # Log the job cost model, for one job window per chunk of entity_ids (in API order)
+    #   compared with the packed job chunks
+    def log_job_cost(self, report_name, placement, entity_ids, entity_windows, report_granularity, \
+        start_time, end_time, job_chunks):
+        unpacked_job_chunks = [{
+            'entity_ids': chunk_ids,
+            'start_time': start_time,
+            'end_time': end_time
+        } for chunk_ids in split_list(entity_ids, 20)]
+        unpacked_cost = self.get_job_cost(unpacked_job_chunks, entity_windows, report_granularity)
+        packed_cost = self.get_job_cost(job_chunks, entity_windows, report_granularity)
+        # pylint: disable=line-too-long
+        LOGGER.info('Report: {} - placement: {}, job cost: jobs {} -> {}, requested hours {:.0f} -> {:.0f}, requested slots {} -> {}, zero-metric slots {} -> {}'.format(
+            report_name, placement,
+            unpacked_cost.get('jobs'), packed_cost.get('jobs'),
+            unpacked_cost.get('requested_hours'), packed_cost.get('requested_hours'),
+            unpacked_cost.get('requested_slots'), packed_cost.get('requested_slots'),
+            unpacked_cost.get('zero_slots'), packed_cost.get('zero_slots')))
+        # pylint: enable=line-too-long
+        return unpacked_cost, packed_cost
+
+
     def get_async_results_urls(self, client, account_id, report_name, queued_job_ids):
         # WHILE JOBS STILL RUNNING LOOP, GET ASYNC JOB STATUS
         # GET ASYNC Status Reference: https://developer.twitter.com/en/docs/ads/analytics/api-reference/asynchronous#get-stats-jobs-accounts-account-id 
@@ -1142,7 +1820,8 @@ class Reports(TwitterAds):
             wait_sec = 15
             LOGGER.info('Report: {} - Waiting {} sec for async job(s) to finish'.format(
                 report_name, wait_sec))
-            time.sleep(wait_sec)
+            with self.span('job_wait', account_id, report_name):
+                time.sleep(wait_sec)
 
             # GET async_job_status
             LOGGER.info('Report: {} - GET async_job_statuses'.format(report_name))
@@ -1158,11 +1837,12 @@ class Reports(TwitterAds):
                 report_name, self.url, API_VERSION, async_job_statuses_path))
             LOGGER.info('Report: {} - async_job_statuses params: {}'.format(
                 report_name, async_job_statuses_params))
-            async_job_statuses = self.get_resource('async_job_statuses', client, async_job_statuses_path, \
-                async_job_statuses_params)
+            with self.span('job_status', account_id, report_name):
+                async_job_statuses = self.get_resource('async_job_statuses', client, async_job_statuses_path, \
+                    async_job_statuses_params)
 
             jobs_still_running = False
-            for async_job_status in async_job_statuses:
+            for async_job_status in self.timed_iter(async_job_statuses, 'job_status', account_id, report_name):
                 job_status_dict = self.obj_to_dict(async_job_status)
                 job_id = job_status_dict.get('id_str')
                 job_status = job_status_dict.get('status')
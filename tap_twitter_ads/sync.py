@@ -1,4 +1,5 @@
 # pylint: disable=too-many-lines
+from contextlib import nullcontext
 from urllib.parse import urlparse
 import singer
 from singer import metrics, metadata, Transformer, utils
@@ -6,18 +7,30 @@ from singer.utils import strptime_to_utc
 from twitter_ads import API_VERSION
 from twitter_ads.utils import split_list
 from tap_twitter_ads.transform import transform_record, transform_report
-from tap_twitter_ads.streams import STREAMS, update_currently_syncing, Reports
+from tap_twitter_ads.streams import STREAMS, update_currently_syncing, Reports, TwitterAds
+from tap_twitter_ads.batch import get_batch_writer
+from tap_twitter_ads.fingerprint import get_fingerprint_index
+from tap_twitter_ads.instrumentation import get_stage_timer
+from tap_twitter_ads.profiling import get_stream_profiler
+from tap_twitter_ads.rate_limits import RATE_LIMITS, install_sdk_hooks
+from tap_twitter_ads.memory import get_memory_tracker
+from tap_twitter_ads.columnar import get_output_format, MANIFEST_SCHEMA, MANIFEST_KEY_PROPERTIES
 
 LOGGER = singer.get_logger()
 
-# Sync - main function to loop through select streams to sync_endpoints and sync_reports
-def sync(client, config, catalog, state):
-    # Get config parameters
-    account_list = config.get('account_ids').replace(' ', '').split(',')
-    country_code_list = config.get('country_codes', 'US').replace(' ', '').split(',')
-    start_date = config.get('start_date')
-    reports = config.get('reports', [])
 
+# Profile the sync of a stream (and its children) or report if profiling is enabled for it
+def profile_stream(stream_profiler, stream_name, account_id, children=None):
+    if stream_profiler is None:
+        return nullcontext()
+    return stream_profiler.profile(stream_name, account_id, children)
+
+
+# Selected streams to sync (from the catalog, based on the state's currently syncing stream):
+#   selected_streams, parent_streams (incl. unselected parents of selected children), child_streams and
+#   report_streams (selected reports of the config)
+# Shared by sync and plan
+def get_sync_streams(catalog, state, reports):
     # Get selected_streams from catalog, based on state last_stream
     #   last_stream = Previous currently synced stream, if the load was interrupted
     last_stream = singer.get_currently_syncing(state)
@@ -29,7 +42,7 @@ def sync(client, config, catalog, state):
         selected_streams.append(stream.stream)
     LOGGER.info('Sync Selected Streams: {}'.format(selected_streams))
     if not selected_streams:
-        return
+        return selected_streams, [], [], []
 
     # Get lists of parent and child streams to sync (from streams.py and catalog)
     # For children, ensure that dependent parent_stream is included
@@ -37,7 +50,6 @@ def sync(client, config, catalog, state):
     child_streams = []
     # Get all streams (parent + child) from streams.py
     # Loop thru all streams
-    
     for stream_name, stream_obj in STREAMS.items():
         # If stream has a parent_stream, then it is a child stream
         parent_stream = hasattr(stream_obj, 'parent_stream') and stream_obj.parent_stream
@@ -53,7 +65,6 @@ def sync(client, config, catalog, state):
     LOGGER.info('Sync Parent Streams: {}'.format(parent_streams))
     LOGGER.info('Sync Child Streams: {}'.format(child_streams))
 
-    
     # Get list of report streams to sync (from config and catalog)
     report_streams = []
     for report in reports:
@@ -61,106 +72,171 @@ def sync(client, config, catalog, state):
         if report_name in selected_streams:
             report_streams.append(report_name)
     LOGGER.info('Sync Report Streams: {}'.format(report_streams))
+    return selected_streams, parent_streams, child_streams, report_streams
+
+
+# Targeting values of the report sub_types: country_ids (config country_codes) and platform_ids
+def get_report_targeting_ids(client, country_code_list):
+    # GET country_ids (targeting_values) based on config country_codes
+    country_ids = []
+    reports_obj = Reports()
+    country_path = 'targeting_criteria/locations'
+    for country_code in country_code_list:
+        country_params = {
+            'count': 1000,
+            'cursor': None,
+            'location_type': 'COUNTRIES',
+            'country_code': country_code
+        }
+        country_cursor = reports_obj.get_resource('countries', client, country_path, country_params)
+        for country in country_cursor:
+            country_id = country['targeting_value']
+            country_ids.append(country_id)
+    LOGGER.info('Countries - Country Codes: {}, Country Targeting IDs: {}'.format(
+        country_code_list, country_ids))
+
+    # GET platform_ids (targeting_values)
+    platform_ids = []
+    platforms_path = 'targeting_criteria/platforms'
+    platforms_params = {
+        'count': 1000,
+        'cursor': None
+    }
+    platforms_cursor = reports_obj.get_resource('platforms', client, platforms_path, platforms_params)
+    for platform in platforms_cursor:
+        platform_id = platform['targeting_value']
+        platform_ids.append(platform_id)
+    LOGGER.info('Platforms - Platform Targeting IDs: {}'.format(platform_ids))
+    return country_ids, platform_ids
+
 
-    # ACCOUNT_ID OUTER LOOP
-    for account_id in account_list:
-        LOGGER.info('Account ID: {} - START Syncing'.format(account_id))
+# Sync - main function to loop through select streams to sync_endpoints and sync_reports
+def sync(client, config, catalog, state):
+    # Get config parameters
+    account_list = config.get('account_ids').replace(' ', '').split(',')
+    country_code_list = config.get('country_codes', 'US').replace(' ', '').split(',')
+    start_date = config.get('start_date')
+    reports = config.get('reports', [])
 
-        # PARENT STREAM LOOP
-        for stream_name in parent_streams:
-            update_currently_syncing(state, stream_name)
-            endpoint_config = STREAMS[stream_name]
-            stream_obj = STREAMS[stream_name]()
+    selected_streams, parent_streams, child_streams, report_streams = get_sync_streams(catalog, state, reports)
+    if not selected_streams:
+        return
+
+    # Record the rate limit headers of each SDK response and the SDK sleeps (see rate_limits.py)
+    install_sdk_hooks()
+    # Batch messages (optional): records of large streams are written to batch files
+    TwitterAds.batch_writer = get_batch_writer(config)
+    # FULL_TABLE fingerprints (optional): only new/changed records and tombstones are written
+    TwitterAds.fingerprint_index = get_fingerprint_index(config)
+    # Stage timing (optional): time per pipeline stage, summary logged at the end of the sync
+    TwitterAds.stage_timer = get_stage_timer(config)
+    # Profiling (optional): cProfile or sampling profile of the selected streams/reports (config profile_streams)
+    stream_profiler = get_stream_profiler(config)
+    # Memory tracking (optional): memory peak per stream, report date window and async result download
+    TwitterAds.memory_tracker = get_memory_tracker(config)
+
+    try:
+        # ACCOUNT_ID OUTER LOOP
+        for account_id in account_list:
+            LOGGER.info('Account ID: {} - START Syncing'.format(account_id))
+
+            # PARENT STREAM LOOP
+            for stream_name in parent_streams:
+                update_currently_syncing(state, stream_name)
+                endpoint_config = STREAMS[stream_name]
+                stream_obj = STREAMS[stream_name]()
             
-            LOGGER.info('Stream: {} - START Syncing, Account ID: {}'.format(
-                stream_name, account_id))
-
-            # Write schema and log selected fields for stream
-            stream_obj.write_schema(catalog, stream_name)
-
-            selected_fields = stream_obj.get_selected_fields(catalog, stream_name)
-            LOGGER.info('Stream: {} - selected_fields: {}'.format(stream_name, selected_fields))
-
-            total_records = stream_obj.sync_endpoint(client=client,
-                                          catalog=catalog,
-                                          state=state,
-                                          start_date=start_date,
-                                          stream_name=stream_name,
-                                          endpoint_config=endpoint_config,
-                                          tap_config=config,
-                                          account_id=account_id,
-                                          child_streams=child_streams,
-                                          selected_streams= selected_streams)
-
-            LOGGER.info('Stream: {} - FINISHED Syncing, Account ID: {}, Total Records: {}'.format(
-                stream_name, account_id, total_records))
-
-            update_currently_syncing(state, None)
-
-        # GET country_ids and platform_ids (targeting values) - only if reports exist
-        if report_streams != []:
-            # GET country_ids (targeting_values) based on config country_codes
-            country_ids = []
-            reports_obj = Reports()
-            country_path = 'targeting_criteria/locations'
-            for country_code in country_code_list:
-                country_params = {
-                    'count': 1000,
-                    'cursor': None,
-                    'location_type': 'COUNTRIES',
-                    'country_code': country_code
-                }
-                country_cursor = reports_obj.get_resource('countries', client, country_path, country_params)
-                for country in country_cursor:
-                    country_id = country['targeting_value']
-                    country_ids.append(country_id)
-            LOGGER.info('Countries - Country Codes: {}, Country Targeting IDs: {}'.format(
-                country_code_list, country_ids))
-
-            # GET platform_ids (targeting_values)
-            platform_ids = []
-            platforms_path = 'targeting_criteria/platforms'
-            platforms_params = {
-                'count': 1000,
-                'cursor': None
-            }
-            platforms_cursor = reports_obj.get_resource('platforms', client, platforms_path, platforms_params)
-            for platform in platforms_cursor:
-                platform_id = platform['targeting_value']
-                platform_ids.append(platform_id)
-            LOGGER.info('Platforms - Platform Targeting IDs: {}'.format(platform_ids))
-
-        # REPORT STREAMS LOOP
-        for report in reports:
-            report_name = report.get('name')
-            if report_name in report_streams:
-                update_currently_syncing(state, report_name)
-
-                LOGGER.info('Report: {} - START Syncing for Account ID: {}'.format(
-                    report_name, account_id))
+                LOGGER.info('Stream: {} - START Syncing, Account ID: {}'.format(
+                    stream_name, account_id))
 
                 # Write schema and log selected fields for stream
-                reports_obj.write_schema(catalog, report_name)
-
-                selected_fields = reports_obj.get_selected_fields(catalog, report_name)
-                LOGGER.info('Report: {} - selected_fields: {}'.format(
-                    report_name, selected_fields))
-
-                total_records = reports_obj.sync_report(client=client,
-                                            catalog=catalog,
-                                            state=state,
-                                            start_date=start_date,
-                                            report_name=report_name,
-                                            report_config=report,
-                                            tap_config=config,
-                                            account_id=account_id,
-                                            country_ids=country_ids,
-                                            platform_ids=platform_ids)
-
-                # pylint: disable=line-too-long
-                LOGGER.info('Report: {} - FINISHED Syncing for Account ID: {}, Total Records: {}'.format(
-                    report_name, account_id, total_records))
-                # pylint: enable=line-too-long
+                stream_obj.write_schema(catalog, stream_name)
+
+                selected_fields = stream_obj.get_selected_fields(catalog, stream_name)
+                LOGGER.info('Stream: {} - selected_fields: {}'.format(stream_name, selected_fields))
+
+                with profile_stream(stream_profiler, stream_name, account_id, \
+                    getattr(endpoint_config, 'children', None)), \
+                    stream_obj.track_memory('sync_endpoint', account_id, stream_name):
+                    total_records = stream_obj.sync_endpoint(client=client,
+                                                  catalog=catalog,
+                                                  state=state,
+                                                  start_date=start_date,
+                                                  stream_name=stream_name,
+                                                  endpoint_config=endpoint_config,
+                                                  tap_config=config,
+                                                  account_id=account_id,
+                                                  child_streams=child_streams,
+                                                  selected_streams= selected_streams)
+
+                LOGGER.info('Stream: {} - FINISHED Syncing, Account ID: {}, Total Records: {}'.format(
+                    stream_name, account_id, total_records))
+
                 update_currently_syncing(state, None)
 
-        LOGGER.info('Account ID: {} - FINISHED Syncing'.format(account_id))
+            # GET country_ids and platform_ids (targeting values) - only if reports exist
+            country_ids, platform_ids = [], []
+            if report_streams != []:
+                reports_obj = Reports()
+                country_ids, platform_ids = get_report_targeting_ids(client, country_code_list)
+
+            # REPORT STREAMS LOOP
+            for report in reports:
+                report_name = report.get('name')
+                if report_name in report_streams:
+                    update_currently_syncing(state, report_name)
+
+                    LOGGER.info('Report: {} - START Syncing for Account ID: {}'.format(
+                        report_name, account_id))
+
+                    # Write schema and log selected fields for stream
+                    # Columnar report output: the stream carries manifest records for the report files
+                    if get_output_format(config) == 'singer':
+                        reports_obj.write_schema(catalog, report_name)
+                    else:
+                        singer.write_schema(report_name, MANIFEST_SCHEMA, MANIFEST_KEY_PROPERTIES)
+
+                    selected_fields = reports_obj.get_selected_fields(catalog, report_name)
+                    LOGGER.info('Report: {} - selected_fields: {}'.format(
+                        report_name, selected_fields))
+
+                    with profile_stream(stream_profiler, report_name, account_id):
+                        total_records = reports_obj.sync_report(client=client,
+                                                    catalog=catalog,
+                                                    state=state,
+                                                    start_date=start_date,
+                                                    report_name=report_name,
+                                                    report_config=report,
+                                                    tap_config=config,
+                                                    account_id=account_id,
+                                                    country_ids=country_ids,
+                                                    platform_ids=platform_ids)
+
+                    # pylint: disable=line-too-long
+                    LOGGER.info('Report: {} - FINISHED Syncing for Account ID: {}, Total Records: {}'.format(
+                        report_name, account_id, total_records))
+                    # pylint: enable=line-too-long
+                    update_currently_syncing(state, None)
+
+            LOGGER.info('Account ID: {} - FINISHED Syncing'.format(account_id))
+    finally:
+        # Held records, batches, the stage trace and the memory and rate limit summaries are written
+        #   even if the sync fails
+        # Write remaining held records and batches
+        if TwitterAds.batch_writer:
+            TwitterAds.batch_writer.flush()
+
+        if TwitterAds.stage_timer:
+            TwitterAds.stage_timer.close()
+
+        if TwitterAds.memory_tracker:
+            TwitterAds.memory_tracker.close()
+
+        # API calls, remaining rate limits and rate limit/backoff sleeps by endpoint family
+        RATE_LIMITS.log_summary()
+
+        # The helpers are class attributes shared by the stream objects of this sync only
+        TwitterAds.batch_writer = None
+        TwitterAds.fingerprint_index = None
+        TwitterAds.stage_timer = None
+        TwitterAds.memory_tracker = None
@@ -6,6 +6,10 @@ from singer.utils import strptime_to_utc, strftime
 
 LOGGER = singer.get_logger()
 
+# Report records carry their end_time as epoch seconds (int) in this key, alongside the end_time string.
+# It is not part of the report schema: sync_report removes it, to track the max bookmark as a number.
+END_TIME_EPOCH_KEY = '_end_time_epoch'
+
 
 # Create MD5 hash key for data element
 def hash_data(data):
@@ -15,8 +19,72 @@ def hash_data(data):
     return hash_id.hexdigest()
 
 
+# Pre-scan metrics for a datum: time indices with any non-null metric value
+# Metric values are lists (one value per time index) or dicts of lists (e.g. conversions)
+# drop_zero_rows: also skip time indices where every non-null metric value is 0
+def get_active_time_indices(metrics, time_series_length, drop_zero_rows=False):
+    active_indices = set()
+    for val in metrics.values():
+        if isinstance(val, list):
+            value_lists = [val]
+        elif isinstance(val, dict):
+            value_lists = [val2 for val2 in val.values() if isinstance(val2, list)]
+        else:
+            continue
+        for value_list in value_lists:
+            for i, index_val in enumerate(value_list[:time_series_length]):
+                if index_val is None or (drop_zero_rows and index_val == 0):
+                    continue
+                active_indices.add(i)
+    return sorted(active_indices)
+
+
+# Time slot table for a report job: (start, end, end epoch seconds) for each time index
+# start/end are ISO strings, computed once per job instead of once per entity/segment/slot
+def get_time_slots(start_time, interval, time_series_length):
+    time_slots = []
+    start_dttm = strptime_to_utc(start_time)
+    for _ in range(time_series_length):
+        end_dttm = start_dttm + interval
+        time_slots.append((strftime(start_dttm), strftime(end_dttm), int(end_dttm.timestamp())))
+        start_dttm = end_dttm
+    return time_slots
+
+
+# Determine nested object group for a metric key
+def get_metric_group(key):
+    if key[0:7] == 'billed_':
+        return 'billing'
+    if key[0:6] == 'media_':
+        return 'media'
+    if key[0:6] == 'video_':
+        return 'video'
+    if key[0:11] == 'conversion_':
+        return 'web_conversion'
+    if key[0:18] == 'mobile_conversion_':
+        return 'mobile_conversion'
+    return 'engagement'
+
+
+# Record template for the metric keys of a datum
+# Returns the record groups (in order of first metric key) and a (group, key) tuple for each metric key
+# metric_groups: key -> group classification map, shared by all data of a job
+def get_record_template(metric_keys, metric_groups):
+    record_groups = []
+    metric_key_groups = []
+    for key in metric_keys:
+        group = metric_groups.get(key)
+        if group is None:
+            group = get_metric_group(key)
+            metric_groups[key] = group
+        if group not in record_groups:
+            record_groups.append(group)
+        metric_key_groups.append((group, key))
+    return tuple(record_groups), tuple(metric_key_groups)
+
+
 # Transform for report_data in sync_report
-def transform_report(report_name, report_data, account_id):
+def transform_report(report_name, report_data, account_id, drop_zero_rows=False):
     time_series_length = int(report_data.get('time_series_length', 1)) # Default = 1 to loop once
     request = report_data.get('request', {})
 
@@ -48,6 +116,12 @@ def transform_report(report_name, report_data, account_id):
     elif granularity == 'TOTAL':
         interval = timedelta(days=0) # 0 days for TOTAL
 
+    # All data in a job shares the start_time, granularity and time_series_length
+    time_slots = get_time_slots(start_time, interval, time_series_length)
+    # Metric keys are a small fixed set per job: classify each key once
+    metric_groups = {}
+    record_templates = {}
+
     # Loop through entity_id records w/ data
     for id_record in report_data.get('data'):
         # LOGGER.info('id_record = {}'.format(id_record)) # COMMENT OUT
@@ -58,39 +132,55 @@ def transform_report(report_name, report_data, account_id):
 
         # Loop through id_data records
         for datum in id_data:
+            # Get time interval value from metrics value arrays
+            metrics = datum.get('metrics', {})
+
+            # Only build records for time intervals w/ metric data
+            active_indices = get_active_time_indices(metrics, time_series_length, drop_zero_rows)
+            if not active_indices:
+                continue
+
+            segment = datum.get('segment')
+            segment_name = None
+            segment_value = None
+            if segment:
+                segment_name = segment.get('segment_name')
+                segment_value = segment.get('segment_value')
+
+            # Dimensions template for the datum, start_time/end_time are set per time interval
+            dimensions_template = {
+                'report_name': report_name,
+                'account_id': account_id,
+                'entity': entity,
+                'entity_id': entity_id,
+                'granularity': granularity,
+                'placement': placement,
+                'start_time': None,
+                'end_time': None,
+                'segmentation_type': segmentation_type,
+                'segment_name': segment_name,
+                'segment_value': segment_value,
+                'country': country,
+                'platform': platform
+            }
+
+            # Record template for the metric keys: groups (in order) and metric values by group
+            metric_keys = tuple(metrics)
+            record_template = record_templates.get(metric_keys)
+            if record_template is None:
+                record_template = get_record_template(metric_keys, metric_groups)
+                record_templates[metric_keys] = record_template
+            record_groups, metric_key_groups = record_template
+            metric_values = [(group, key, val) for (group, key), val in zip(metric_key_groups, metrics.values()) \
+                if isinstance(val, (list, dict))]
+
             # Loop through time intervals
-            start_dttm = strptime_to_utc(start_time)
-            end_dttm = start_dttm
-            if interval:
-                end_dttm += interval
-            i = 0
-            while i <= (time_series_length - 1):
-                series_start = strftime(start_dttm)
-                series_end = strftime(end_dttm)
-
-                append_record = False # Initialize; only append records w/ metric data
-                segment = datum.get('segment')
-                segment_name = None
-                segment_value = None
-                if segment:
-                    segment_name = segment.get('segment_name')
-                    segment_value = segment.get('segment_value')
-
-                dimensions = {
-                    'report_name': report_name,
-                    'account_id': account_id,
-                    'entity': entity,
-                    'entity_id': entity_id,
-                    'granularity': granularity,
-                    'placement': placement,
-                    'start_time': series_start,
-                    'end_time': series_end,
-                    'segmentation_type': segmentation_type,
-                    'segment_name': segment_name,
-                    'segment_value': segment_value,
-                    'country': country,
-                    'platform': platform
-                }
+            for i in active_indices:
+                series_start, series_end, series_end_epoch = time_slots[i]
+
+                dimensions = dict(dimensions_template)
+                dimensions['start_time'] = series_start
+                dimensions['end_time'] = series_end
 
                 # Create MD5 hash key of sorted json dimesions (above)
                 dims_md5 = str(hash_data(json.dumps(dimensions, sort_keys=True)))
@@ -98,62 +188,32 @@ def transform_report(report_name, report_data, account_id):
                     '__sdc_dimensions_hash_key': dims_md5,
                     'start_time': series_start,
                     'end_time': series_end,
-                    'dimensions': dimensions
+                    'dimensions': dimensions,
+                    END_TIME_EPOCH_KEY: series_end_epoch
                 }
 
                 # LOGGER.info('dimensions_hash_key = {}'.format(dims_md5)) # COMMENT OUT
 
-                # Get time interval value from metrics value arrays
-                metrics = datum.get('metrics', {})
-                for key, val in list(metrics.items()):
-                    # Determine nested object group for each measure
-                    if key[0:7] == 'billed_':
-                        group = 'billing'
-                    elif key[0:6] == 'media_':
-                        group = 'media'
-                    elif key[0:6] == 'video_':
-                        group = 'video'
-                    elif key[0:11] == 'conversion_':
-                        group = 'web_conversion'
-                    elif key[0:18] == 'mobile_conversion_':
-                        group = 'mobile_conversion'
-                    else:
-                        group = 'engagement'
-                    # Create group node if not exists
-                    if not record.get(group):
-                        record[group] = {}
+                # Create group nodes
+                for group in record_groups:
+                    record[group] = {}
 
+                for group, key, val in metric_values:
                     if isinstance(val, list):
-                        index_val = None
-                        try:
-                            index_val = val[i]
-                            record[group][key] = index_val
-                            append_record = True
-                        except IndexError:
-                            index_val = None
-                    elif isinstance(val, dict):
+                        if i < len(val):
+                            record[group][key] = val[i]
+                    else:
                         new_dict = {}
-                        for key2, val2 in list(val.items()):
-                            idx_val = None
-                            if isinstance(val2, list):
-                                try:
-                                    idx_val = val2[i]
-                                    new_dict[key2] = idx_val
-                                    append_record = True
-                                except IndexError:
-                                    idx_val = None
+                        for key2, val2 in val.items():
+                            if isinstance(val2, list) and i < len(val2):
+                                new_dict[key2] = val2[i]
                         if new_dict != {}:
                             record[group][key] = new_dict
-                    # End for key, val in metrics
+                    # End for group, key, val in metric_values
 
                 # LOGGER.info('record = {}'.format(record)) # COMMENT OUT
-                # LOGGER.info('append_record = {}'.format(append_record)) # COMMENT OUT
-                if append_record:
-                    report_records.append(record)
-                i = i + 1
-                start_dttm = end_dttm
-                end_dttm = start_dttm + interval
-                # End: while i < time_series_length
+                report_records.append(record)
+                # End: for i in active_indices
 
             # End: for datum in id_data
 
@@ -162,6 +222,41 @@ def transform_report(report_name, report_data, account_id):
     return report_records
 
 
+# Top-level schema properties kept by the Singer Transformer for the catalog metadata:
+#   automatic fields are kept; fields not selected or unsupported are removed
+def get_selected_properties(schema, stream_metadata):
+    selected_properties = {}
+    for key, val in schema.get('properties', {}).items():
+        field_metadata = stream_metadata.get(('properties', key), {})
+        inclusion = field_metadata.get('inclusion')
+        if inclusion == 'unsupported':
+            continue
+        if inclusion != 'automatic' and field_metadata.get('selected') is False:
+            continue
+        selected_properties[key] = val
+    return selected_properties
+
+
+# Projection for records in sync_endpoint: the selected fields and the fields needed to sync (keys, bookmark)
+# None (all fields) for a schema without properties
+def get_projection(schema, stream_metadata, required_fields=None):
+    if not isinstance(schema.get('properties'), dict):
+        return None
+    projection = set(get_selected_properties(schema, stream_metadata))
+    for field in required_fields or []:
+        if field:
+            projection.add(field)
+    return frozenset(projection)
+
+
+# Project a raw record to the projection fields: fields not selected (or not in the schema) are not copied
+#   or transformed, the Singer Transformer would remove them.
+def project_record(record, projection):
+    if projection is None:
+        return record
+    return {key: val for key, val in record.items() if key in projection}
+
+
 # Transform for record in sync_endpoint
 def transform_record(stream_name, record):
     new_record = record
@@ -0,0 +1,90 @@
+import io
+import os
+import gzip
+import json
+import tempfile
+import unittest
+from unittest import mock
+from tap_twitter_ads.batch import BatchWriter, get_batch_writer
+from tap_twitter_ads.streams import TwitterAds
+
+
+def get_messages(stdout):
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+def read_batch_file(manifest):
+    with gzip.open(manifest[0].replace('file://', ''), 'rt') as batch_file:
+        return [json.loads(line) for line in batch_file]
+
+
+@mock.patch('sys.stdout', new_callable=io.StringIO)
+class TestBatchWriter(unittest.TestCase):
+    """
+    Test records written as BATCH messages referencing gzip JSONL files
+    """
+
+    def setUp(self):
+        self.batch_dir = tempfile.mkdtemp()
+
+    def test_small_stream_records(self, mocked_stdout):
+        """ Verify that a stream with fewer than max_records records is written as RECORD messages """
+        batch_writer = BatchWriter(self.batch_dir, max_records=3)
+        batch_writer.write_record('accounts', {'id': '1'})
+        batch_writer.write_record('accounts', {'id': '2'})
+        self.assertEqual(mocked_stdout.getvalue(), '')
+
+        batch_writer.flush()
+
+        messages = get_messages(mocked_stdout)
+        self.assertEqual([message['type'] for message in messages], ['RECORD', 'RECORD'])
+        self.assertEqual(os.listdir(self.batch_dir), [])
+
+    def test_large_stream_batches(self, mocked_stdout):
+        """ Verify that records of a large stream are written to batch files of max_records """
+        batch_writer = BatchWriter(self.batch_dir, max_records=3)
+        for i in range(7):
+            batch_writer.write_record('tweets', {'id': str(i)})
+        batch_writer.flush()
+
+        messages = get_messages(mocked_stdout)
+        self.assertEqual([message['type'] for message in messages], ['BATCH', 'BATCH', 'BATCH'])
+        self.assertEqual(messages[0]['encoding'], {'format': 'jsonl', 'compression': 'gzip'})
+        self.assertEqual([record['id'] for message in messages for record in read_batch_file(message['manifest'])], \
+            [str(i) for i in range(7)])
+
+    def test_max_bytes(self, mocked_stdout):
+        """ Verify that a batch file is closed at max_bytes """
+        batch_writer = BatchWriter(self.batch_dir, max_records=1000, max_bytes=50)
+        for i in range(4):
+            batch_writer.write_record('tweets', {'id': str(i), 'text': 'x' * 20})
+
+        messages = get_messages(mocked_stdout)
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(len(read_batch_file(messages[0]['manifest'])), 2)
+
+    def test_get_batch_writer(self, mocked_stdout):
+        """ Verify that batch messages are only enabled with batch_messages in the config """
+        self.assertIsNone(get_batch_writer({}))
+        batch_writer = get_batch_writer({'batch_messages': 'true', 'batch_max_records': '500'})
+        self.assertEqual(batch_writer.max_records, 500)
+
+
+@mock.patch('sys.stdout', new_callable=io.StringIO)
+class TestBatchBeforeState(unittest.TestCase):
+    """
+    Test that held records and batches are written before the state
+    """
+
+    def tearDown(self):
+        TwitterAds.batch_writer = None
+
+    def test_records_before_state(self, mocked_stdout):
+        """ Verify that write_bookmark writes held records before the STATE message """
+        TwitterAds.batch_writer = BatchWriter(tempfile.mkdtemp(), max_records=10)
+        stream_obj = TwitterAds()
+        stream_obj.write_record('campaigns', {'id': '1'}, time_extracted=None)
+        stream_obj.write_bookmark({}, 'campaigns', '2022-01-01T00:00:00.000000Z', 'account_id')
+
+        messages = get_messages(mocked_stdout)
+        self.assertEqual([message['type'] for message in messages], ['RECORD', 'STATE'])
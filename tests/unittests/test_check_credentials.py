@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from twitter_ads.client import Client
+import tap_twitter_ads
+from tap_twitter_ads import check_credentials
+from tap_twitter_ads.streams import TwitterAds
+from tap_twitter_ads import credentials
+from tap_twitter_ads.exceptions import TwitterAdsForbiddenError, TwitterAdsUnauthorizedError
+
+
+def get_client(access_token='test_at'):
+    return Client(consumer_key='test_ck', consumer_secret='test_cs', access_token=access_token,
+                  access_token_secret='test_ats')
+
+
+class TestCheckCredentials(unittest.TestCase):
+    """
+    Test that accounts are validated w/ batched GET accounts requests
+    """
+
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_one_request_for_accounts(self, mocked_get_resource):
+        """ Verify that the accounts are validated w/ one request, not one request per account """
+        mocked_get_resource.return_value = [{'id': 'acc_1'}, {'id': 'acc_2'}]
+
+        check_credentials(get_client(), TwitterAds(), 'acc_1, acc_2')
+
+        self.assertEqual(mocked_get_resource.call_count, 1)
+        self.assertEqual(mocked_get_resource.call_args[0][2], 'accounts')
+        self.assertEqual(mocked_get_resource.call_args[0][3]['account_ids'], 'acc_1,acc_2')
+
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_invalid_accounts(self, mocked_get_resource):
+        """ Verify that the accounts not returned are invalid """
+        mocked_get_resource.return_value = [{'id': 'acc_1'}]
+
+        with self.assertRaises(Exception) as e:
+            check_credentials(get_client(), TwitterAds(), 'acc_1,acc_2,acc_3')
+
+        self.assertEqual(str(e.exception),
+                         "Invalid Twitter Ads accounts provided during the configuration:['acc_2', 'acc_3']")
+
+    @mock.patch('tap_twitter_ads.ACCOUNT_IDS_LIMIT', 2)
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_account_ids_chunks(self, mocked_get_resource):
+        """ Verify that account_ids are requested by chunks of ACCOUNT_IDS_LIMIT """
+        mocked_get_resource.side_effect = [[{'id': 'acc_1'}, {'id': 'acc_2'}], [{'id': 'acc_3'}]]
+
+        check_credentials(get_client(), TwitterAds(), 'acc_1,acc_2,acc_3')
+
+        self.assertEqual([call[0][3]['account_ids'] for call in mocked_get_resource.call_args_list],
+                         ['acc_1,acc_2', 'acc_3'])
+
+
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_rejected_batch_checks_each_account(self, mocked_get_resource):
+        """ Verify that a batch rejected w/ a client error falls back to one request per account """
+        def get_resource(stream_name, client, path, params):
+            if params['account_ids'] in ('acc_1', 'acc_3'):
+                return [{'id': params['account_ids']}]
+            raise TwitterAdsForbiddenError('HTTP-error-code: 403, Message: Forbidden')
+        mocked_get_resource.side_effect = get_resource
+
+        with self.assertRaises(Exception) as e:
+            check_credentials(get_client(), TwitterAds(), 'acc_1,acc_2,acc_3')
+
+        self.assertEqual(str(e.exception), "Invalid Twitter Ads accounts provided during the configuration:['acc_2']")
+        self.assertEqual([call[0][3]['account_ids'] for call in mocked_get_resource.call_args_list],
+                         ['acc_1,acc_2,acc_3', 'acc_1', 'acc_2', 'acc_3'])
+
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_unauthorized_tokens(self, mocked_get_resource):
+        """ Verify that invalid tokens raise the unauthorized error, w/o checking each account """
+        mocked_get_resource.side_effect = TwitterAdsUnauthorizedError('HTTP-error-code: 401, Message: Unauthorized')
+
+        with self.assertRaises(TwitterAdsUnauthorizedError):
+            check_credentials(get_client(), TwitterAds(), 'acc_1,acc_2')
+
+        self.assertEqual(mocked_get_resource.call_count, 1)
+
+
+def get_config(account_ids='acc_1', access_token='test_at', credential_cache_ttl=300):
+    return {'consumer_key': 'test_ck', 'consumer_secret': 'test_cs', 'access_token': access_token,
+            'access_token_secret': 'test_ats', 'account_ids': account_ids,
+            'credential_cache_ttl': credential_cache_ttl}
+
+
+def run_discover(config):
+    """Run discovery as main does: the client is only created if the validation is not cached"""
+    with mock.patch('singer.utils.parse_args') as mocked_parse_args:
+        mocked_parse_args.return_value = mock.Mock(config=config, state=None, catalog=None, discover=True)
+        tap_twitter_ads.main()
+
+
+@mock.patch('tap_twitter_ads.discover')
+@mock.patch('json.dump')
+@mock.patch.object(TwitterAds, 'get_resource', return_value=[{'id': 'acc_1'}])
+class TestCredentialCache(unittest.TestCase):
+    """
+    Test that successful validations are cached w/ a TTL, by a hash of the config credentials and account ids
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.patcher = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.temp_dir})
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_cached_validation(self, mocked_get_resource, mocked_dump, mocked_discover):
+        """ Verify that a validation is reused within the TTL, w/o creating the SDK client """
+        run_discover(get_config())
+        with mock.patch('tap_twitter_ads.Client') as mocked_client:
+            run_discover(get_config())
+
+        self.assertEqual(mocked_get_resource.call_count, 1)
+        self.assertEqual(mocked_client.call_count, 0)
+        self.assertEqual(mocked_discover.call_count, 2)
+
+    def test_expired_validation(self, mocked_get_resource, mocked_dump, mocked_discover):
+        """ Verify that an expired validation is validated again """
+        with mock.patch('time.time', return_value=1000):
+            run_discover(get_config())
+        with mock.patch('time.time', return_value=1300):
+            run_discover(get_config())
+
+        self.assertEqual(mocked_get_resource.call_count, 2)
+
+    def test_other_credentials(self, mocked_get_resource, mocked_dump, mocked_discover):
+        """ Verify that a validation is only reused for the same credentials and account ids """
+        run_discover(get_config())
+        run_discover(get_config(access_token='other_at'))
+        mocked_get_resource.return_value = [{'id': 'acc_1'}, {'id': 'acc_2'}]
+        run_discover(get_config('acc_1,acc_2'))
+
+        self.assertEqual(mocked_get_resource.call_count, 3)
+
+    def test_failed_validation_not_cached(self, mocked_get_resource, mocked_dump, mocked_discover):
+        """ Verify that invalid accounts are not cached """
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                run_discover(get_config('acc_2'))
+
+        self.assertEqual(mocked_get_resource.call_count, 2)
+
+    def test_no_cache_wo_ttl(self, mocked_get_resource, mocked_dump, mocked_discover):
+        """ Verify that validations are not cached w/ a TTL of 0 """
+        run_discover(get_config(credential_cache_ttl=0))
+        run_discover(get_config(credential_cache_ttl=0))
+
+        self.assertEqual(mocked_get_resource.call_count, 2)
+
+    def test_cache_wo_credentials(self, mocked_get_resource, mocked_dump, mocked_discover):
+        """ Verify that the cache file does not hold the credentials """
+        run_discover(get_config())
+
+        with open(credentials.get_credential_cache_path(), encoding='utf-8') as file:
+            cache = file.read()
+        for value in ['test_ck', 'test_cs', 'test_at', 'test_ats', 'acc_1']:
+            self.assertNotIn(value, cache)
+        self.assertEqual(os.stat(credentials.get_credential_cache_path()).st_mode & 0o777, 0o600)
+
+    def test_credential_cache_ttl_config(self, mocked_get_resource, mocked_dump, mocked_discover):
+        """ Verify the credential_cache_ttl config, 0 (no cache) by default """
+        self.assertEqual(credentials.get_credential_cache_ttl({}), 0)
+        self.assertEqual(credentials.get_credential_cache_ttl({'credential_cache_ttl': '60'}), 60)
+        self.assertEqual(credentials.get_credential_cache_ttl({'credential_cache_ttl': 0}), 0)
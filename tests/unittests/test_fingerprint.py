@@ -0,0 +1,85 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+from tap_twitter_ads.fingerprint import FingerprintIndex, get_fingerprint_index
+from tap_twitter_ads.streams import TwitterAds
+
+STREAM_NAME = 'targeting_criteria'
+ACCOUNT_ID = 'dummy_account_id'
+
+
+def read_records(index, records, full_read=True):
+    """Read records of a stream run; return the changed record ids and the deleted record keys"""
+    index.start(STREAM_NAME, ACCOUNT_ID)
+    changed = [record['id'] for record in records \
+        if index.is_changed(STREAM_NAME, ACCOUNT_ID, FingerprintIndex.get_record_key(record, ['id']), record)]
+    return changed, index.finish(STREAM_NAME, ACCOUNT_ID, full_read)
+
+
+class TestFingerprintIndex(unittest.TestCase):
+    """
+    Test the content fingerprints of FULL_TABLE stream records
+    """
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'fingerprints.json')
+
+    def test_new_and_changed_records(self):
+        """ Verify that only new or changed records are returned as changed, across runs """
+        records = [{'id': '1', 'name': 'a'}, {'id': '2', 'name': 'b'}]
+        self.assertEqual(read_records(FingerprintIndex(self.path), records), (['1', '2'], []))
+
+        records = [{'id': '1', 'name': 'a'}, {'id': '2', 'name': 'c'}, {'id': '3', 'name': 'd'}]
+        self.assertEqual(read_records(FingerprintIndex(self.path), records), (['2', '3'], []))
+
+    def test_deleted_records(self):
+        """ Verify that records not read again are deleted only for a full read """
+        read_records(FingerprintIndex(self.path), [{'id': '1'}, {'id': '2'}])
+
+        self.assertEqual(read_records(FingerprintIndex(self.path), [{'id': '2'}], full_read=False), ([], []))
+        self.assertEqual(read_records(FingerprintIndex(self.path), [{'id': '2'}]), ([], ['["1"]']))
+        with open(self.path) as file:
+            self.assertEqual(list(json.load(file)[STREAM_NAME][ACCOUNT_ID]), ['["2"]'])
+        self.assertFalse(os.path.exists('{}.tmp'.format(self.path)))
+
+    def test_get_fingerprint_index(self):
+        """ Verify that fingerprints are only enabled with full_table_fingerprints in the config """
+        self.assertIsNone(get_fingerprint_index({}))
+        index = get_fingerprint_index({'full_table_fingerprints': 'true', 'fingerprint_path': self.path})
+        self.assertEqual(index.path, self.path)
+
+
+@mock.patch('sys.stdout', new_callable=io.StringIO)
+class TestTombstones(unittest.TestCase):
+    """
+    Test tombstone records for deleted FULL_TABLE records
+    """
+
+    def tearDown(self):
+        TwitterAds.fingerprint_index = None
+
+    def test_write_tombstones(self, mocked_stdout):
+        """ Verify that a tombstone w/ the key fields and _sdc_deleted_at is written for each deleted record """
+        index = FingerprintIndex(os.path.join(tempfile.mkdtemp(), 'fingerprints.json'))
+        read_records(index, [{'id': '1'}, {'id': '2'}])
+        TwitterAds.fingerprint_index = index
+        stream_obj = TwitterAds()
+        index.start(STREAM_NAME, ACCOUNT_ID)
+        index.is_changed(STREAM_NAME, ACCOUNT_ID, '["2"]', {'id': '2'})
+
+        self.assertEqual(stream_obj.write_tombstones(STREAM_NAME, ACCOUNT_ID, ['id'], full_read=True), 1)
+        message = json.loads(mocked_stdout.getvalue())
+        self.assertEqual(message['record']['id'], '1')
+        self.assertIn('_sdc_deleted_at', message['record'])
+
+    def test_uses_fingerprints(self, mocked_stdout):
+        """ Verify that only FULL_TABLE streams use fingerprints, when enabled """
+        stream_obj = TwitterAds()
+        self.assertFalse(stream_obj.uses_fingerprints(STREAM_NAME))
+
+        TwitterAds.fingerprint_index = mock.Mock()
+        self.assertTrue(stream_obj.uses_fingerprints(STREAM_NAME))
+        self.assertFalse(stream_obj.uses_fingerprints('campaigns'))
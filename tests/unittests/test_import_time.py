@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+from unittest import mock
+from tap_twitter_ads import credentials, schema
+
+# Max import time (ms) of the package on top of singer-python (imported by every tap)
+IMPORT_TIME_BUDGET_MS = 100
+# Modules of the SDK and the sync code paths
+SDK_MODULES = ['twitter_ads', 'twitter_ads.client', 'requests_oauthlib']
+SYNC_MODULES = ['tap_twitter_ads.streams', 'tap_twitter_ads.sync', 'tap_twitter_ads.plan', 'multiprocessing', 'pyarrow']
+
+
+# Modules imported by a statement, w/ their cumulative import time (us), from python -X importtime
+def get_import_times(statement, env=None):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True, env=env)
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line.split('|')
+        import_times[module.strip()] = int(cumulative)
+    return import_times
+
+
+class TestImportTime(unittest.TestCase):
+    """
+    Test the import time of the package and that the SDK, streams, sync and plan modules are imported
+    by the code paths that use them
+    """
+
+    def test_package_import(self):
+        """ Verify that importing the package does not import the SDK, streams, sync or plan, within the budget """
+        import_times = get_import_times('import tap_twitter_ads')
+
+        for module in SDK_MODULES + SYNC_MODULES:
+            self.assertNotIn(module, import_times)
+
+        package_ms = (import_times['tap_twitter_ads'] - import_times.get('singer', 0)) / 1000
+        self.assertLess(package_ms, IMPORT_TIME_BUDGET_MS)
+
+    @mock.patch.dict(os.environ)
+    def test_discover_imports(self):
+        """ Verify that discovery (schemas) w/ a cached schema bundle does not import the sync modules """
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        os.environ['XDG_CACHE_HOME'] = temp_dir
+        schema.get_endpoint_bundle.cache_clear()
+        self.addCleanup(schema.get_endpoint_bundle.cache_clear)
+        schema.get_endpoint_bundle()
+
+        import_times = get_import_times('from tap_twitter_ads.discover import discover; discover([])',
+                                        env=dict(os.environ))
+
+        for module in SYNC_MODULES + ['tap_twitter_ads.batch', 'tap_twitter_ads.profiling', 'tap_twitter_ads.memory']:
+            self.assertNotIn(module, import_times)
+
+    def test_client_attribute(self):
+        """ Verify that tap_twitter_ads.Client is the SDK Client, imported when used """
+        import tap_twitter_ads
+        from twitter_ads.client import Client
+
+        self.assertIs(tap_twitter_ads.Client, Client)
+        with self.assertRaises(AttributeError):
+            tap_twitter_ads.missing_attribute
+
+
+class TestCachedDiscoverImportTime(unittest.TestCase):
+    """
+    Test that --discover w/ a cached credential validation and schema bundle does not import the SDK
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.patcher = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.temp_dir})
+        self.patcher.start()
+        schema.get_endpoint_bundle.cache_clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+        schema.get_endpoint_bundle.cache_clear()
+        shutil.rmtree(self.temp_dir)
+
+    def test_cached_discover(self):
+        """ Verify that the SDK and streams are not imported, within the budget """
+        config = {'start_date': '2022-01-01T00:00:00Z', 'consumer_key': 'test_ck', 'consumer_secret': 'test_cs',
+                  'access_token': 'test_at', 'access_token_secret': 'test_ats', 'account_ids': 'acc_1',
+                  'credential_cache_ttl': 300}
+        config_path = os.path.join(self.temp_dir, 'config.json')
+        with open(config_path, 'w', encoding='utf-8') as file:
+            json.dump(config, file)
+        credentials.save_validation(credentials.get_credential_hash(config), 300)
+        schema.get_endpoint_bundle()
+
+        import_times = get_import_times('import sys; sys.argv = ["tap-twitter-ads", "--config", {}, "--discover"]; '
+                                        'import tap_twitter_ads; tap_twitter_ads.main()'.format(repr(config_path)),
+                                        env=dict(os.environ))
+
+        for module in SDK_MODULES + SYNC_MODULES:
+            self.assertNotIn(module, import_times)
+        package_ms = (import_times['tap_twitter_ads'] - import_times.get('singer', 0)) / 1000
+        self.assertLess(package_ms, IMPORT_TIME_BUDGET_MS)
@@ -0,0 +1,72 @@
+import unittest
+from tap_twitter_ads import memory
+from tap_twitter_ads.memory import MemoryTracker, get_memory_tracker, MB
+
+
+class TestMemoryTracker(unittest.TestCase):
+    """
+    Test the memory peaks of units of work
+    """
+
+    def test_tracemalloc_peak(self):
+        """ Verify that the peak of a unit includes memory allocated and freed during the unit """
+        tracker = MemoryTracker('tracemalloc')
+        try:
+            with tracker.track('download', 'acc', 'report') as memory_unit:
+                data = bytearray(20 * MB)
+                tracker.sample()
+                del data
+        finally:
+            tracker.close()
+        self.assertGreaterEqual(memory_unit.peak_bytes - memory_unit.start_bytes, 20 * MB)
+
+    def test_soft_limit(self):
+        """ Verify that a unit growing over the soft limit is reported when it is stopped """
+        tracker = MemoryTracker('tracemalloc', soft_limit_mb=10)
+        try:
+            memory_unit = tracker.start('report_window', 'acc', 'report')
+            data = bytearray(20 * MB)
+            self.assertTrue(tracker.stop(memory_unit))
+            del data
+        finally:
+            tracker.close()
+
+    def test_soft_limit_process_memory(self):
+        """ Verify that memory held before a unit counts toward the soft limit (slow growth across units) """
+        tracker = MemoryTracker('tracemalloc', soft_limit_mb=10)
+        try:
+            data = bytearray(20 * MB)
+            memory_unit = tracker.start('report_window', 'acc', 'report')
+            self.assertTrue(tracker.stop(memory_unit))
+            del data
+        finally:
+            tracker.close()
+
+    def test_start_logged(self):
+        """ Verify that the start of a unit is logged (visible if the process is killed during the unit) """
+        tracker = MemoryTracker('tracemalloc')
+        try:
+            with self.assertLogs(memory.LOGGER, 'INFO') as logs:
+                memory_unit = tracker.start('report_window', 'acc', 'report')
+            tracker.stop(memory_unit)
+        finally:
+            tracker.close()
+        self.assertIn('report_window - report, Account ID: acc, start:', logs.output[0])
+
+    def test_no_soft_limit(self):
+        """ Verify that the soft limit is never exceeded w/o memory_soft_limit_mb """
+        tracker = MemoryTracker('rss')
+        try:
+            self.assertFalse(tracker.stop(tracker.start('sync_endpoint', 'acc', 'campaigns')))
+        finally:
+            tracker.close()
+
+    def test_get_memory_tracker(self):
+        """ Verify the memory tracking config """
+        self.assertIsNone(get_memory_tracker({}))
+        self.assertIsNone(get_memory_tracker({'memory_tracking': 'false'}))
+        tracker = get_memory_tracker({'memory_tracking': 'true', 'memory_soft_limit_mb': '512'})
+        tracker.close()
+        self.assertEqual((tracker.mode, tracker.soft_limit_bytes), ('rss', 512 * MB))
+        with self.assertRaises(RuntimeError):
+            get_memory_tracker({'memory_tracking': 'heapy'})
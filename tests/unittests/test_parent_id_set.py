@@ -0,0 +1,38 @@
+import unittest
+from tap_twitter_ads.streams import ParentIdSet
+
+
+class TestParentIdSet(unittest.TestCase):
+    """
+    Test the deduplicated parent ids of child streams
+    """
+
+    def test_deduplicated_ids(self):
+        """ Verify that duplicate and null parent ids are only added once, in order """
+        parent_ids = ParentIdSet()
+        for parent_id in ['8v7jo', '8v7jp', '8v7jo', None, '8v7jq', '8v7jp']:
+            parent_ids.add(parent_id)
+
+        self.assertEqual(len(parent_ids), 3)
+        self.assertEqual(list(parent_ids), ['8v7jo', '8v7jp', '8v7jq'])
+
+    def test_mixed_ids(self):
+        """ Verify that integer and string parent ids are deduplicated, in insertion order """
+        parent_ids = ParentIdSet()
+        for parent_id in [1484405085639962727, '8v7jo', 1484405085639962627, 1484405085639962727, '8v7jo']:
+            parent_ids.add(parent_id)
+
+        self.assertEqual(len(parent_ids), 3)
+        self.assertEqual(list(parent_ids), [1484405085639962727, '8v7jo', 1484405085639962627])
+        self.assertEqual(list(parent_ids.chunks(2)), [[1484405085639962727, '8v7jo'], [1484405085639962627]])
+
+    def test_chunks(self):
+        """ Verify chunks of up to chunk_size parent ids """
+        parent_ids = ParentIdSet()
+        for parent_id in range(450):
+            parent_ids.add(parent_id)
+
+        chunks = list(parent_ids.chunks(200))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [200, 200, 50])
+        self.assertEqual(chunks[2][-1], 449)
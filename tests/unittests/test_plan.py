@@ -0,0 +1,128 @@
+import unittest
+from unittest import mock
+from datetime import timedelta
+import pytz
+from singer import utils
+from tap_twitter_ads.streams import TwitterAds, Reports
+from tap_twitter_ads import plan
+
+ACCOUNT_ID = 'dummy_account_id'
+
+
+def get_cursor(count, fetched=1, exhausted=False):
+    cursor = mock.Mock()
+    cursor.count = count
+    cursor.fetched = fetched
+    cursor.exhausted = exhausted
+    return cursor
+
+
+class TestPlanEndpoint(unittest.TestCase):
+    """
+    Test the planned API calls of endpoints and their child streams
+    """
+
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_pages_from_total_count(self, mocked_get_resource):
+        """ Verify that the pages are based on the total_count of a 1 record request """
+        mocked_get_resource.return_value = get_cursor(2500)
+
+        stream_plan = plan.plan_endpoint(None, {}, '2022-01-01T00:00:00Z', 'line_items', ACCOUNT_ID,
+                                         ['targeting_criteria'])
+
+        params = mocked_get_resource.call_args[0][3]
+        self.assertEqual(params['count'], 1)
+        self.assertEqual(params['with_total_count'], 'true')
+        self.assertNotIn('cursor', params)
+        self.assertEqual(stream_plan['records'], 2500)
+        # 1 count request + 3 pages of 1000
+        self.assertEqual(stream_plan['api_calls'], 4)
+        # 2500 line_items by chunks of 200 parent_ids
+        self.assertEqual(stream_plan['children'],
+                         {'targeting_criteria': {'parent_ids_limit': 200, 'api_calls': 13}})
+
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_page_size_config(self, mocked_get_resource):
+        """ Verify that the pages are based on page_size from the config """
+        mocked_get_resource.return_value = get_cursor(2500)
+
+        stream_plan = plan.plan_endpoint(None, {'page_size': 100}, '2022-01-01T00:00:00Z', 'campaigns',
+                                         ACCOUNT_ID, [])
+
+        self.assertEqual(stream_plan['api_calls'], 26)
+
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_unknown_record_count(self, mocked_get_resource):
+        """ Verify that records are unknown w/o total_count and more pages """
+        mocked_get_resource.return_value = get_cursor(1)
+
+        stream_plan = plan.plan_endpoint(None, {}, '2022-01-01T00:00:00Z', 'line_items', ACCOUNT_ID,
+                                         ['targeting_criteria'])
+
+        self.assertIsNone(stream_plan['records'])
+        self.assertEqual(stream_plan['api_calls'], 2)
+        self.assertIsNone(stream_plan['children']['targeting_criteria']['api_calls'])
+
+    @mock.patch.object(TwitterAds, 'get_resource')
+    def test_single_page_wo_total_count(self, mocked_get_resource):
+        """ Verify that the records of an exhausted first page are counted """
+        mocked_get_resource.return_value = get_cursor(1, exhausted=True)
+
+        stream_plan = plan.plan_endpoint(None, {}, '2022-01-01T00:00:00Z', 'campaigns', ACCOUNT_ID, [])
+
+        self.assertEqual(stream_plan['records'], 1)
+        self.assertEqual(stream_plan['api_calls'], 2)
+
+
+class TestPlanReport(unittest.TestCase):
+    """
+    Test the planned date windows, async jobs and API calls of reports
+    """
+    timezone = pytz.timezone('UTC')
+
+    def get_start_date(self, days):
+        return utils.strftime(utils.now() - timedelta(days=days))
+
+    def test_account_report(self):
+        """ Verify that ACCOUNT reports have 2 jobs (placements) by date window """
+        report_config = {'name': 'accounts_report', 'entity': 'ACCOUNT', 'granularity': 'DAY'}
+
+        report_plan = plan.plan_report(None, {}, {}, self.get_start_date(30), report_config, ACCOUNT_ID,
+                                       self.timezone, [], [])
+
+        self.assertEqual(report_plan['date_windows'], 1)
+        self.assertEqual(report_plan['async_jobs'], 2)
+        # 2 POSTs, 1 status check, 2 downloads
+        self.assertEqual(report_plan['api_calls'], 5)
+
+    @mock.patch.object(Reports, 'get_active_entity_sets')
+    @mock.patch.object(Reports, 'get_resource')
+    def test_segmented_report_jobs(self, mocked_get_resource, mocked_get_active_entity_sets):
+        """ Verify that jobs are counted by chunk of 20 entity_ids, placement and sub_type id """
+        mocked_get_active_entity_sets.return_value = [
+            {'placement': 'ALL_ON_TWITTER', 'entity_ids': [str(i) for i in range(25)],
+             'start_time': '2022-01-01T00:00:00+0000', 'end_time': '2022-01-10T00:00:00+0000'},
+            {'placement': 'PUBLISHER_NETWORK', 'entity_ids': ['1', '2', '3'],
+             'start_time': '2022-01-01T00:00:00+0000', 'end_time': '2022-01-10T00:00:00+0000'}
+        ]
+        report_config = {'name': 'line_items_report', 'entity': 'LINE_ITEM', 'segment': 'LOCATIONS',
+                         'granularity': 'DAY'}
+
+        report_plan = plan.plan_report(None, {}, {}, self.get_start_date(30), report_config, ACCOUNT_ID,
+                                       self.timezone, ['country_1', 'country_2'], [])
+
+        self.assertEqual(mocked_get_resource.call_count, report_plan['date_windows'])
+        self.assertEqual(report_plan['async_jobs'], 6 * report_plan['date_windows'])
+        # active_entities, 6 POSTs and 6 downloads, 1 status check by date window
+        self.assertEqual(report_plan['api_calls'], 14 * report_plan['date_windows'])
+
+    def test_organic_tweet_jobs_unknown(self):
+        """ Verify that ORGANIC_TWEET report jobs are unknown """
+        report_config = {'name': 'tweets_report', 'entity': 'ORGANIC_TWEET', 'granularity': 'DAY'}
+
+        report_plan = plan.plan_report(None, {}, {}, self.get_start_date(30), report_config, ACCOUNT_ID,
+                                       self.timezone, [], [])
+
+        self.assertIsNone(report_plan['async_jobs'])
+        self.assertIsNone(report_plan['api_calls'])
+        self.assertEqual(report_plan['job_status_calls'], report_plan['date_windows'])
@@ -0,0 +1,63 @@
+import os
+import time
+import pstats
+import tempfile
+import unittest
+from tap_twitter_ads.profiling import StreamProfiler, get_stream_profiler
+
+
+def busy_loop(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        sum(range(100))
+
+
+class TestStreamProfiler(unittest.TestCase):
+    """
+    Test the profiles of selected streams
+    """
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+
+    def test_cprofile(self):
+        """ Verify that a pstats file is written for a profiled stream """
+        profiler = StreamProfiler(['campaigns'], self.profile_dir)
+        with profiler.profile('campaigns', 'acc'):
+            busy_loop(0.01)
+
+        files = os.listdir(self.profile_dir)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].startswith('campaigns_acc_') and files[0].endswith('.pstats'))
+        stats = pstats.Stats(os.path.join(self.profile_dir, files[0]))
+        self.assertTrue(any(func[2] == 'busy_loop' for func in stats.stats))
+
+    def test_sampling(self):
+        """ Verify that the sampling profiler writes collapsed stacks """
+        profiler = StreamProfiler(['all'], self.profile_dir, 'sampling', interval=0.001)
+        with profiler.profile('line_items_report', 'acc'):
+            busy_loop(0.1)
+
+        files = os.listdir(self.profile_dir)
+        self.assertTrue(files[0].endswith('.collapsed'))
+        with open(os.path.join(self.profile_dir, files[0])) as file:
+            lines = file.read().splitlines()
+        self.assertTrue(any('busy_loop (test_profiling.py)' in line for line in lines))
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+
+    def test_not_profiled(self):
+        """ Verify that only the selected streams (or their parents) are profiled """
+        profiler = StreamProfiler(['targeting_criteria'], self.profile_dir)
+        with profiler.profile('campaigns', 'acc'):
+            pass
+        self.assertEqual(os.listdir(self.profile_dir), [])
+        self.assertTrue(profiler.is_profiled(['line_items', 'targeting_criteria']))
+
+    def test_get_stream_profiler(self):
+        """ Verify the profiler config """
+        self.assertIsNone(get_stream_profiler({}))
+        profiler = get_stream_profiler({'profile_streams': 'campaigns, tweets', 'profiler': 'sampling'})
+        self.assertEqual(profiler.streams, {'campaigns', 'tweets'})
+        self.assertEqual(profiler.profile_dir, 'profiles')
+        with self.assertRaises(RuntimeError):
+            get_stream_profiler({'profile_streams': 'campaigns', 'profiler': 'perf'})
@@ -0,0 +1,152 @@
+import sys
+import time
+import subprocess
+import unittest
+from unittest import mock
+from requests_oauthlib import OAuth1Session
+import twitter_ads.http
+from tap_twitter_ads.rate_limits import RateLimitRegistry, RateLimitOAuth1Session, SleepRecordingTime, \
+    get_endpoint_family, install_sdk_hooks, uninstall_sdk_hooks, record_backoff
+
+HEADERS = {
+    'x-rate-limit-limit': '2000',
+    'x-rate-limit-remaining': '1500',
+    'x-rate-limit-reset': '1700000000'
+}
+
+
+class TestEndpointFamily(unittest.TestCase):
+    """
+    Test the endpoint families of request urls
+    """
+
+    def test_endpoint_family(self):
+        """ Verify that the API version, account ids and numeric ids are removed """
+        test_cases = [
+            ('https://ads-api.twitter.com/11/accounts/18ce54d4x5t/line_items?count=1000', \
+                'accounts/:account_id/line_items'),
+            ('https://ads-api.twitter.com/11/accounts/18ce54d4x5t', 'accounts/:account_id'),
+            ('https://ads-api.twitter.com/11/stats/jobs/accounts/18ce54d4x5t', 'stats/jobs/accounts/:account_id'),
+            ('https://ads-api.twitter.com/11/targeting_criteria/locations', 'targeting_criteria/locations'),
+            ('https://ton.twimg.com/advertiser-api-async-analytics/1480000000.json.gz', 'async_results')
+        ]
+        for url, family in test_cases:
+            with self.subTest(url=url):
+                self.assertEqual(get_endpoint_family(url), family)
+
+
+class TestRateLimitRegistry(unittest.TestCase):
+    """
+    Test the rate limit telemetry by endpoint family
+    """
+
+    def test_record_response(self):
+        """ Verify calls, rate limited responses and min remaining calls by endpoint family """
+        registry = RateLimitRegistry()
+        url = 'https://ads-api.twitter.com/11/accounts/acc/campaigns'
+        registry.record_response(url, 200, HEADERS)
+        registry.record_response(url, 429, dict(HEADERS, **{'x-rate-limit-remaining': '0'}))
+        registry.record_response(url, 200, dict(HEADERS, **{'x-rate-limit-remaining': '1999'}))
+
+        stats = registry.get_summary()['accounts/:account_id/campaigns']
+        self.assertEqual((stats['calls'], stats['errors'], stats['rate_limited']), (3, 1, 1))
+        self.assertEqual((stats['limit'], stats['remaining'], stats['min_remaining']), (2000, 1999, 0))
+
+    def test_account_rate_limit_headers(self):
+        """ Verify that account level rate limit headers are used when present """
+        registry = RateLimitRegistry()
+        headers = dict(HEADERS, **{'x-account-rate-limit-limit': '250', 'x-account-rate-limit-remaining': '10'})
+        registry.record_response('https://ads-api.twitter.com/11/stats/accounts/acc', 200, headers)
+
+        stats = registry.get_summary()['stats/accounts/:account_id']
+        self.assertEqual((stats['limit'], stats['remaining']), (250, 10))
+
+    def test_record_sleep(self):
+        """ Verify that sleeps are attributed to the last endpoint family requested by the thread """
+        registry = RateLimitRegistry()
+        registry.record_sleep(3)
+        registry.record_response('https://ads-api.twitter.com/11/accounts/acc/tweets', 429, HEADERS)
+        registry.record_sleep(905)
+        registry.record_sleep(60, 'backoff_seconds')
+
+        summary = registry.get_summary()
+        self.assertEqual(summary['unknown']['reset_sleep_seconds'], 3)
+        self.assertEqual(summary['accounts/:account_id/tweets']['reset_sleep_seconds'], 905)
+        self.assertEqual(summary['accounts/:account_id/tweets']['backoff_seconds'], 60)
+
+    def test_metric_points(self):
+        """ Verify the METRIC points of an endpoint family """
+        registry = RateLimitRegistry()
+        registry.record_response('https://ads-api.twitter.com/11/accounts/acc/tweets', 200, HEADERS)
+
+        points = {point.metric: point for point in registry.get_metric_points()}
+        self.assertEqual(points['api_calls'].value, 1)
+        self.assertEqual(points['rate_limit_remaining'].value, 1500)
+        self.assertEqual(points['rate_limit_remaining'].tags, {'endpoint': 'accounts/:account_id/tweets', \
+            'limit': 2000})
+        self.assertEqual(points['backoff_sleep'].value, 0)
+
+    def test_sdk_sleep_kind(self):
+        """ Verify that SDK sleeps after a 429 are rate limit reset waits, other SDK sleeps are retry delays """
+        registry = RateLimitRegistry()
+        url = 'https://ads-api.twitter.com/11/accounts/acc/tweets'
+        registry.record_response(url, 429, HEADERS)
+        self.assertEqual(registry.get_sdk_sleep_kind(), 'reset_sleep_seconds')
+        registry.record_response(url, 503, HEADERS)
+        self.assertEqual(registry.get_sdk_sleep_kind(), 'retry_sleep_seconds')
+        # Timeout: request w/o a response
+        registry.record_response(url, 429, HEADERS)
+        registry.start_request(url)
+        self.assertEqual(registry.get_sdk_sleep_kind(), 'retry_sleep_seconds')
+
+    @mock.patch('time.sleep')
+    def test_sdk_and_backoff_sleeps(self, mocked_sleep):
+        """ Verify that SDK reset waits, SDK retry delays and tap backoff waits are recorded separately """
+        registry = RateLimitRegistry()
+        url = 'https://ads-api.twitter.com/11/accounts/acc/tweets'
+        with mock.patch('tap_twitter_ads.rate_limits.RATE_LIMITS', registry):
+            registry.record_response(url, 429, HEADERS)
+            SleepRecordingTime().sleep(65)
+            registry.record_response(url, 503, HEADERS)
+            SleepRecordingTime().sleep(1.5)
+            record_backoff({'wait': 60, 'tries': 1})
+
+        mocked_sleep.assert_has_calls([mock.call(65), mock.call(1.5)])
+        stats = registry.get_summary()['accounts/:account_id/tweets']
+        self.assertEqual((stats['reset_sleep_seconds'], stats['retry_sleep_seconds'], stats['backoff_seconds']), \
+            (65, 1.5, 60))
+
+
+class TestSdkHooks(unittest.TestCase):
+    """
+    Test that the SDK hooks are installed by sync, not when the streams are imported
+    """
+
+    def test_not_installed_on_import(self):
+        """ Verify that importing the streams does not patch the SDK http module """
+        output = subprocess.check_output([sys.executable, '-c', \
+            'import tap_twitter_ads.streams, twitter_ads.http; print(twitter_ads.http.time.__class__.__name__)'])
+        self.assertEqual(output.decode('utf-8').strip(), 'module')
+
+    def tearDown(self):
+        uninstall_sdk_hooks()
+
+    def test_install_sdk_hooks(self):
+        """ Verify that the SDK session and sleeps are patched, and restored by uninstall_sdk_hooks """
+        install_sdk_hooks()
+        self.assertIs(twitter_ads.http.OAuth1Session, RateLimitOAuth1Session)
+        self.assertIsInstance(twitter_ads.http.time, SleepRecordingTime)
+
+        uninstall_sdk_hooks()
+        self.assertIs(twitter_ads.http.OAuth1Session, OAuth1Session)
+        self.assertIs(twitter_ads.http.time, time)
+
+    def test_install_sdk_hooks_once(self):
+        """ Verify that installing the hooks again does not replace the recorded originals """
+        install_sdk_hooks()
+        sleep_recording_time = twitter_ads.http.time
+        install_sdk_hooks()
+
+        self.assertIs(twitter_ads.http.time, sleep_recording_time)
+        uninstall_sdk_hooks()
+        self.assertIs(twitter_ads.http.time, time)
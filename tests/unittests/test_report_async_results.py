@@ -0,0 +1,82 @@
+import time
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from tap_twitter_ads.streams import Reports
+
+REPORT_NAME = 'line_items_daily_report'
+ACCOUNT_ID = 'dummy_account_id'
+URLS = ['https://ton.twimg.com/advertiser-api-async-analytics/{}.json.gz'.format(i) for i in range(6)]
+
+
+def get_async_data(report_name, client, url):
+    """Return an async result with one entity named after the URL; earlier URLs download slower"""
+    url_index = URLS.index(url)
+    time.sleep(0.02 * (len(URLS) - url_index))
+    return {
+        'time_series_length': 2,
+        'request': {
+            'params': {
+                'entity': 'LINE_ITEM',
+                'granularity': 'DAY',
+                'placement': 'ALL_ON_TWITTER',
+                'start_time': '2022-01-01T00:00:00Z',
+                'end_time': '2022-01-03T00:00:00Z'
+            }
+        },
+        'data': [{'id': str(url_index), 'id_data': [{'segment': None, 'metrics': {'impressions': [url_index, None]}}]}]
+    }
+
+
+@mock.patch('tap_twitter_ads.streams.Reports.get_async_data', side_effect=get_async_data)
+class TestGetAsyncResults(unittest.TestCase):
+    """
+    Test that async results downloaded/transformed concurrently are returned in URL order
+    """
+    reports_obj = Reports()
+
+    def get_results(self, download_workers, transform_processes):
+        return list(self.reports_obj.get_async_results(None, REPORT_NAME, ACCOUNT_ID, URLS, False, \
+            download_workers, transform_processes))
+
+    def test_serial_results(self, mocked_get_async_data):
+        """ Verify results for the default single download worker """
+        results = self.get_results(1, 0)
+
+        self.assertEqual([result[0] for result in results], URLS)
+        self.assertEqual([result[1] for result in results], [(2, 2)] * len(URLS))
+        self.assertEqual([result[3][0]['dimensions']['entity_id'] for result in results], [str(i) for i in range(6)])
+
+    def test_concurrent_downloads_in_url_order(self, mocked_get_async_data):
+        """ Verify that concurrent downloads return the same results, in URL order """
+        serial_results = self.get_results(1, 0)
+        concurrent_results = self.get_results(4, 0)
+
+        self.assertEqual([result[0] for result in concurrent_results], URLS)
+        self.assertEqual([result[3] for result in concurrent_results], [result[3] for result in serial_results])
+        self.assertEqual(mocked_get_async_data.call_count, 2 * len(URLS))
+
+    def test_transform_process_pool(self, mocked_get_async_data):
+        """ Verify that transform_report in a process pool returns the same records, in URL order """
+        serial_results = self.get_results(1, 0)
+        process_results = self.get_results(2, 2)
+
+        self.assertEqual([result[0] for result in process_results], URLS)
+        self.assertEqual([result[3] for result in process_results], [result[3] for result in serial_results])
+
+    def test_transforms_overlap(self, mocked_get_async_data):
+        """ Verify that transforms are submitted as downloads complete, not one at a time per download thread """
+        barrier = threading.Barrier(2, timeout=5)
+        def transform_report(report_name, async_data, account_id, drop_zero_rows):
+            # Each transform waits for another transform to run at the same time
+            barrier.wait()
+            return async_data['data']
+
+        with ThreadPoolExecutor(max_workers=2) as transform_pool, \
+            mock.patch('tap_twitter_ads.streams.transform_report', side_effect=transform_report):
+            results = list(self.reports_obj.get_async_results(None, REPORT_NAME, ACCOUNT_ID, URLS[:4], False, \
+                1, 2, transform_pool))
+
+        self.assertEqual([result[0] for result in results], URLS[:4])
+        self.assertEqual([result[3][0]['id'] for result in results], [str(i) for i in range(4)])
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+import pytz
+from singer import metadata
+from tap_twitter_ads.columnar import ColumnarWriter, get_output_format
+from tap_twitter_ads.schema import get_schemas
+from tap_twitter_ads.transform import transform_report
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+REPORT_NAME = 'line_items_daily_report'
+ACCOUNT_ID = 'dummy_account_id'
+REPORT_DATA = {
+    'time_series_length': 2,
+    'request': {
+        'params': {
+            'entity': 'LINE_ITEM',
+            'granularity': 'DAY',
+            'placement': 'ALL_ON_TWITTER',
+            'start_time': '2022-01-01T00:00:00Z',
+            'end_time': '2022-01-03T00:00:00Z'
+        }
+    },
+    'data': [
+        {
+            'id': 'abc1',
+            'id_data': [
+                {
+                    'segment': None,
+                    'metrics': {
+                        'impressions': [10, 20],
+                        'billed_charge_local_micro': [100, None],
+                        'conversion_purchases': {'metric': [None, 1]}
+                    }
+                }
+            ]
+        }
+    ]
+}
+
+
+class TestOutputFormat(unittest.TestCase):
+    """
+    Test the report_output_format config
+    """
+
+    def test_output_format(self):
+        """ Verify the default output format and that invalid formats raise an error """
+        self.assertEqual(get_output_format({}), 'singer')
+        self.assertEqual(get_output_format({'report_output_format': 'Parquet'}), 'parquet')
+        with self.assertRaises(RuntimeError):
+            get_output_format({'report_output_format': 'csv'})
+
+
+@unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+class TestColumnarWriter(unittest.TestCase):
+    """
+    Test report rows written to Arrow IPC and Parquet files
+    """
+
+    def setUp(self):
+        reports = [{'name': REPORT_NAME, 'entity': 'LINE_ITEM', 'segment': 'NO_SEGMENT', 'granularity': 'DAY'}]
+        schemas, field_metadata = get_schemas(reports)
+        self.schema = schemas[REPORT_NAME]
+        mdata = metadata.to_map(field_metadata[REPORT_NAME])
+        mdata = metadata.write(mdata, ('properties', 'video'), 'selected', False)
+        self.stream_metadata = mdata
+        self.output_dir = tempfile.mkdtemp()
+        self.window_start = datetime(2022, 1, 1, tzinfo=pytz.utc)
+        self.window_end = datetime(2022, 1, 3, tzinfo=pytz.utc)
+
+    def write_file(self, output_format):
+        writer = ColumnarWriter(output_format, self.output_dir, REPORT_NAME, ACCOUNT_ID, self.window_start, \
+            self.window_end, self.schema, self.stream_metadata)
+        writer.write_records(transform_report(REPORT_NAME, REPORT_DATA, ACCOUNT_ID))
+        return writer.close()
+
+    def test_parquet_file(self):
+        """ Verify the Parquet file rows, column types and the manifest record """
+        manifest_record = self.write_file('parquet')
+
+        self.assertEqual(manifest_record['record_count'], 2)
+        self.assertEqual(manifest_record['window_start'], '2022-01-01T00:00:00.000000Z')
+        self.assertTrue(manifest_record['file_path'].endswith(
+            os.path.join(REPORT_NAME, 'dummy_account_id_20220101T000000_20220103T000000.parquet')))
+        self.assertFalse(os.path.exists('{}.tmp'.format(manifest_record['file_path'])))
+
+        table = pyarrow.parquet.read_table(manifest_record['file_path'])
+        self.assertNotIn('video', table.column_names)
+        self.assertEqual(table.schema.field('end_time').type, pyarrow.timestamp('us', tz='UTC'))
+        rows = table.to_pylist()
+        self.assertEqual(rows[0]['engagement']['impressions'], 10)
+        self.assertEqual(rows[1]['web_conversion']['conversion_purchases']['metric'], 1)
+        self.assertEqual(rows[1]['end_time'], datetime(2022, 1, 3, tzinfo=pytz.utc))
+        self.assertEqual(rows[1]['dimensions']['entity_id'], 'abc1')
+
+    def test_arrow_file(self):
+        """ Verify the Arrow IPC file rows """
+        manifest_record = self.write_file('arrow')
+
+        with pyarrow.memory_map(manifest_record['file_path']) as source:
+            table = pyarrow.ipc.open_file(source).read_all()
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column('__sdc_dimensions_hash_key').to_pylist()[0], \
+            transform_report(REPORT_NAME, REPORT_DATA, ACCOUNT_ID)[0]['__sdc_dimensions_hash_key'])
+
+    def test_no_records(self):
+        """ Verify that no file or manifest record is written without records """
+        writer = ColumnarWriter('parquet', self.output_dir, REPORT_NAME, ACCOUNT_ID, self.window_start, \
+            self.window_end, self.schema, self.stream_metadata)
+        writer.write_records([])
+
+        self.assertIsNone(writer.close())
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, REPORT_NAME)))
@@ -0,0 +1,78 @@
+import unittest
+from tap_twitter_ads.streams import Reports
+
+REPORT_NAME = 'line_items_report'
+ACCOUNT_ID = 'dummy_account_id'
+
+
+class TestReportDateWindowSize(unittest.TestCase):
+    """
+    Test the adaptive date window size of report streams
+    """
+    reports_obj = Reports()
+
+    def get_window_size(self, state, granularity, segment, config=None):
+        return self.reports_obj.get_date_window_size(state, REPORT_NAME, ACCOUNT_ID, granularity, segment, config or {})
+
+    def test_max_window_size(self):
+        """ Verify the max window size for DAY and TOTAL reports, 42 days segmented and 85 days not segmented """
+        self.assertEqual(self.get_window_size({}, 'DAY', None), 85)
+        self.assertEqual(self.get_window_size({}, 'DAY', 'GENDER'), 42)
+        self.assertEqual(self.get_window_size({}, 'TOTAL', 'POSTAL_CODES'), 42)
+
+    def test_hourly_segmented_window_size(self):
+        """ Verify that an HOURLY report with a high-cardinality segment gets a small window """
+        # 250000 rows / (24 hours * 200 metros * 20 entities)
+        self.assertEqual(self.get_window_size({}, 'HOUR', 'METROS'), 2)
+        # Never less than 1 day
+        self.assertEqual(self.get_window_size({}, 'HOUR', 'POSTAL_CODES'), 1)
+
+    def test_target_job_rows_config(self):
+        """ Verify that the window size is based on report_target_job_rows from the config """
+        config = {'report_target_job_rows': 960000}
+        self.assertEqual(self.get_window_size({}, 'HOUR', 'METROS', config), 10)
+
+    def test_window_size_from_observed_result_size(self):
+        """ Verify that the observed result size and entity count in the state replace the estimates """
+        state = {'report_windows': {REPORT_NAME: {ACCOUNT_ID: {'rows_per_entity_day': 1000, 'entity_count': 5}}}}
+        # 250000 rows / (1000 rows * 5 entities)
+        self.assertEqual(self.get_window_size(state, 'HOUR', 'METROS'), 42)
+
+        state = {'report_windows': {REPORT_NAME: {ACCOUNT_ID: {'rows_per_entity_day': 5000, 'entity_count': 5}}}}
+        self.assertEqual(self.get_window_size(state, 'HOUR', 'METROS'), 10)
+
+    def test_window_size_from_job_duration(self):
+        """ Verify that the window size keeps the async jobs within report_target_job_seconds """
+        state = {'report_windows': {REPORT_NAME: {ACCOUNT_ID: {'rows_per_entity_day': 1, 'job_seconds_per_day': 60}}}}
+        self.assertEqual(self.get_window_size(state, 'DAY', None), 15)
+
+
+class TestReportWindowStats(unittest.TestCase):
+    """
+    Test the observed result size of reports stored in the state
+    """
+    reports_obj = Reports()
+
+    def test_update_report_window_stats(self):
+        """ Verify that observed result sizes are stored by report and account, averaged with the previous window """
+        state = {}
+        self.reports_obj.update_report_window_stats(state, REPORT_NAME, ACCOUNT_ID, 10, 5, 1000, 50, 100)
+        self.assertEqual(state['report_windows'][REPORT_NAME][ACCOUNT_ID],
+                         {'rows_per_entity_day': 20, 'job_seconds_per_day': 20, 'entity_count': 10})
+
+        self.reports_obj.update_report_window_stats(state, REPORT_NAME, ACCOUNT_ID, 4, 5, 4000, 100, 200)
+        self.assertEqual(state['report_windows'][REPORT_NAME][ACCOUNT_ID],
+                         {'rows_per_entity_day': 30, 'job_seconds_per_day': 30, 'entity_count': 4})
+
+    def test_get_result_size(self):
+        """ Verify rows and entity days of an async job result """
+        async_data = {
+            'time_series_length': 24,
+            'request': {'params': {'start_time': '2022-01-01T00:00:00Z', 'end_time': '2022-01-02T00:00:00Z'}},
+            'data': [
+                {'id': '1', 'id_data': [{'metrics': {}}, {'metrics': {}}]},
+                {'id': '2', 'id_data': [{'metrics': {}}]}
+            ]
+        }
+
+        self.assertEqual(self.reports_obj.get_result_size(async_data), (72, 2))
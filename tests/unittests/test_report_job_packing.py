@@ -0,0 +1,143 @@
+import unittest
+from datetime import datetime, timedelta
+import pytz
+from tap_twitter_ads.streams import Reports
+
+TIMEZONE = pytz.timezone('UTC')
+WINDOW_START = datetime(2022, 1, 1, tzinfo=pytz.utc)
+WINDOW_END = datetime(2022, 3, 1, tzinfo=pytz.utc)
+START_TIME = WINDOW_START.strftime('%Y-%m-%dT%H:%M:%S%z')
+END_TIME = WINDOW_END.strftime('%Y-%m-%dT%H:%M:%S%z')
+
+
+def get_entity_windows(short_entities, long_entities):
+    """Return activity windows: short entities active for 2 days, long entities for the whole window"""
+    entity_windows = {}
+    for i in range(short_entities):
+        entity_start = WINDOW_START + timedelta(days=10 + (i % 3))
+        entity_windows['short_{}'.format(i)] = (entity_start, entity_start + timedelta(days=2))
+    for i in range(long_entities):
+        entity_windows['long_{}'.format(i)] = (WINDOW_START, WINDOW_END)
+    return entity_windows
+
+
+class TestReportJobPacking(unittest.TestCase):
+    """
+    Test that entity_ids are packed into async jobs by activity window
+    """
+    reports_obj = Reports()
+
+    def test_chunks_without_entity_windows(self):
+        """ Verify that entity_ids without activity windows are split in API order with the set start/end time """
+        entity_ids = [str(i) for i in range(45)]
+
+        job_chunks = self.reports_obj.pack_entity_id_chunks(entity_ids, None, 'DAY', TIMEZONE, START_TIME, END_TIME)
+
+        self.assertEqual([len(job_chunk['entity_ids']) for job_chunk in job_chunks], [20, 20, 5])
+        self.assertEqual(job_chunks[0]['entity_ids'], entity_ids[:20])
+        for job_chunk in job_chunks:
+            self.assertEqual(job_chunk['start_time'], START_TIME)
+            self.assertEqual(job_chunk['end_time'], END_TIME)
+
+    def test_duplicate_entity_ids_are_removed(self):
+        """ Verify that a duplicate entity_id does not add a ragged chunk """
+        entity_ids = [str(i) for i in range(20)] + ['0', '1']
+
+        job_chunks = self.reports_obj.pack_entity_id_chunks(entity_ids, None, 'DAY', TIMEZONE, START_TIME, END_TIME)
+
+        self.assertEqual(len(job_chunks), 1)
+
+    def test_chunks_narrowed_to_activity_window(self):
+        """ Verify that short-lived entities are grouped together and their job only requests their activity """
+        entity_windows = get_entity_windows(short_entities=35, long_entities=5)
+        # Short and long running entities interleaved, as returned by active_entities
+        entity_ids = sorted(entity_windows.keys(), key=lambda entity_id: entity_id.split('_')[1])
+
+        job_chunks = self.reports_obj.pack_entity_id_chunks(entity_ids, entity_windows, 'DAY', TIMEZONE, START_TIME, END_TIME)
+
+        self.assertEqual([len(job_chunk['entity_ids']) for job_chunk in job_chunks], [20, 20])
+        short_chunk = job_chunks[1]
+        self.assertTrue(all(entity_id.startswith('short_') for entity_id in short_chunk['entity_ids']))
+        # Activity from Jan 12 to Jan 15, rounded by a day for DAY granularity
+        self.assertEqual(short_chunk['start_time'], '2022-01-11T00:00:00+0000')
+        self.assertEqual(short_chunk['end_time'], '2022-01-16T00:00:00+0000')
+
+    def test_chunks_limited_to_set_start_end(self):
+        """ Verify that rounding never widens a job beyond the entity_id_set start/end time """
+        entity_windows = get_entity_windows(short_entities=0, long_entities=3)
+
+        job_chunks = self.reports_obj.pack_entity_id_chunks(list(entity_windows.keys()), entity_windows, 'HOUR', \
+            TIMEZONE, START_TIME, END_TIME)
+
+        self.assertEqual(job_chunks[0]['start_time'], START_TIME)
+        self.assertEqual(job_chunks[0]['end_time'], END_TIME)
+
+    def test_long_running_entities_packed_together(self):
+        """ Verify that a few long running entities do not force the short-lived entities to the full window """
+        entity_windows = get_entity_windows(short_entities=20, long_entities=5)
+        entity_ids = sorted(entity_windows.keys(), key=lambda entity_id: entity_id.split('_')[1])
+
+        job_chunks = self.reports_obj.pack_entity_id_chunks(entity_ids, entity_windows, 'DAY', TIMEZONE, START_TIME, END_TIME)
+
+        self.assertEqual(len(job_chunks), 2)
+        short_chunk = next(job_chunk for job_chunk in job_chunks if len(job_chunk['entity_ids']) == 20)
+        self.assertTrue(all(entity_id.startswith('short_') for entity_id in short_chunk['entity_ids']))
+        self.assertEqual(short_chunk['start_time'], '2022-01-10T00:00:00+0000')
+        self.assertEqual(short_chunk['end_time'], '2022-01-16T00:00:00+0000')
+
+
+class TestReportJobCost(unittest.TestCase):
+    """
+    Test the async job cost model
+    """
+    reports_obj = Reports()
+
+    def test_job_cost_slots(self):
+        """ Verify requested, active and zero-metric slots for DAY and HOUR granularity """
+        entity_windows = {'1': (WINDOW_START, WINDOW_START + timedelta(days=2)), '2': (WINDOW_START, WINDOW_END)}
+        job_chunks = [{'entity_ids': ['1', '2'], 'start_time': START_TIME, 'end_time': END_TIME}]
+
+        day_cost = self.reports_obj.get_job_cost(job_chunks, entity_windows, 'DAY')
+        hour_cost = self.reports_obj.get_job_cost(job_chunks, entity_windows, 'HOUR')
+
+        self.assertEqual(day_cost, {'jobs': 1, 'requested_hours': 59 * 24, 'requested_slots': 2 * 59,
+                                    'active_slots': 2 + 59, 'zero_slots': 57})
+        self.assertEqual(hour_cost['requested_slots'], 2 * 59 * 24)
+        self.assertEqual(hour_cost['zero_slots'], 57 * 24)
+
+    def test_packing_reduces_zero_slots(self):
+        """ Verify that packed jobs request fewer zero-metric slots than one window for all entity_ids """
+        entity_windows = get_entity_windows(short_entities=50, long_entities=3)
+        entity_ids = list(entity_windows.keys())
+
+        job_chunks = self.reports_obj.pack_entity_id_chunks(entity_ids, entity_windows, 'HOUR', TIMEZONE, START_TIME, END_TIME)
+        unpacked_cost, packed_cost = self.reports_obj.log_job_cost('report', 'ALL_ON_TWITTER', entity_ids, entity_windows, \
+            'HOUR', START_TIME, END_TIME, job_chunks)
+
+        self.assertEqual(unpacked_cost['jobs'], packed_cost['jobs'])
+        self.assertEqual(unpacked_cost['active_slots'], packed_cost['active_slots'])
+        self.assertLess(packed_cost['zero_slots'], unpacked_cost['zero_slots'] / 2)
+
+
+class TestEntityIdSetLog(unittest.TestCase):
+    """
+    Test the entity id set logged for each placement
+    """
+    reports_obj = Reports()
+
+    def test_entity_windows_not_logged(self):
+        """ Verify that only the number of entity windows is logged, not their datetimes """
+        entity_windows = get_entity_windows(2, 1)
+        entity_id_set = {
+            'placement': 'ALL_ON_TWITTER',
+            'entity_ids': list(entity_windows),
+            'start_time': START_TIME,
+            'end_time': END_TIME,
+            'entity_windows': entity_windows
+        }
+
+        entity_id_set_log = self.reports_obj.get_entity_id_set_log(entity_id_set)
+
+        self.assertEqual(entity_id_set_log['entity_windows'], 3)
+        self.assertEqual(entity_id_set_log['entity_ids'], ['short_0', 'short_1', 'long_0'])
+        self.assertNotIn('datetime', str(entity_id_set_log))
@@ -0,0 +1,29 @@
+import unittest
+from tap_twitter_ads.streams import Reports
+
+
+class TestReportMetricGroups(unittest.TestCase):
+    """
+    Test the metric groups requested by report async jobs
+    """
+    reports_obj = Reports()
+
+    def test_all_metric_groups_without_selection(self):
+        """ Verify that all allowed metric groups are requested without selected properties """
+        self.assertEqual(self.reports_obj.get_entity_metric_groups('FUNDING_INSTRUMENT', None), ['ENGAGEMENT', 'BILLING'])
+        self.assertEqual(len(self.reports_obj.get_entity_metric_groups('LINE_ITEM', None)), 7)
+
+    def test_metric_groups_for_selected_properties(self):
+        """ Verify that only metric groups of the selected report properties are requested """
+        selected_properties = ['__sdc_dimensions_hash_key', 'start_time', 'end_time', 'dimensions', 'billing', \
+            'mobile_conversion']
+
+        self.assertEqual(self.reports_obj.get_entity_metric_groups('LINE_ITEM', None, selected_properties), \
+            ['BILLING', 'MOBILE_CONVERSION', 'LIFE_TIME_VALUE_MOBILE_CONVERSION'])
+        self.assertEqual(self.reports_obj.get_entity_metric_groups('ORGANIC_TWEET', None, selected_properties), \
+            ['ENGAGEMENT'])
+
+    def test_conversion_tags_segment(self):
+        """ Verify that the CONVERSION_TAGS segment only requests WEB_CONVERSION """
+        self.assertEqual(self.reports_obj.get_entity_metric_groups('CAMPAIGN', 'CONVERSION_TAGS', ['engagement']), \
+            ['WEB_CONVERSION'])
@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from tap_twitter_ads import cache, schema
+
+
+class TestEndpointSchemaBundle(unittest.TestCase):
+    """
+    Test the endpoint schema bundle, cached in a file of the user's cache directory keyed by the package hash
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.patcher = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.temp_dir})
+        self.patcher.start()
+        schema.get_endpoint_bundle.cache_clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+        schema.get_endpoint_bundle.cache_clear()
+        shutil.rmtree(self.temp_dir)
+
+    def test_bundle_written_and_reused(self):
+        """ Verify that the bundle is built once, written to a file and read by the next discovery """
+        bundle_path = schema.get_bundle_path(schema.get_package_hash())
+        schemas, field_metadata = schema.get_endpoint_schemas()
+        self.assertEqual(os.path.dirname(bundle_path), os.path.join(self.temp_dir, 'tap-twitter-ads'))
+        self.assertEqual(os.stat(bundle_path).st_mode & 0o777, 0o600)
+
+        schema.get_endpoint_bundle.cache_clear()
+        with mock.patch.object(schema, 'build_endpoint_bundle') as mocked_build:
+            cached_schemas, cached_metadata = schema.get_endpoint_schemas()
+
+        self.assertEqual(mocked_build.call_count, 0)
+        self.assertEqual(cached_schemas, schemas)
+        self.assertEqual(cached_metadata, field_metadata)
+
+    def test_bundle_matches_built_schemas(self):
+        """ Verify that the bundle has the built schemas and metadata, w/ tuple breadcrumbs """
+        bundle = schema.build_endpoint_bundle()
+        schemas, field_metadata = schema.get_endpoint_schemas()
+
+        self.assertEqual(schemas, bundle['schemas'])
+        self.assertEqual(field_metadata, bundle['metadata'])
+        self.assertEqual(field_metadata['campaigns'][0]['breadcrumb'], ())
+
+    def test_invalid_bundle_rebuilt(self):
+        """ Verify that an invalid bundle file is rebuilt """
+        bundle_path = schema.get_bundle_path(schema.get_package_hash())
+        cache.write_cache_file(bundle_path, '{"schemas": ')
+
+        schemas, _ = schema.get_endpoint_schemas()
+
+        self.assertIn('campaigns', schemas)
+        with open(bundle_path) as file:
+            self.assertNotEqual(file.read(), '{"schemas": ')
+
+    def test_bundle_not_private_ignored(self):
+        """ Verify that a bundle file readable or writable by others is not read """
+        bundle_path = schema.get_bundle_path(schema.get_package_hash())
+        cache.write_cache_file(bundle_path, '{"schemas": {}, "metadata": {}}')
+        os.chmod(bundle_path, 0o666)
+
+        schemas, _ = schema.get_endpoint_schemas()
+
+        self.assertIn('campaigns', schemas)
+
+    def test_package_hash_changes_with_schema(self):
+        """ Verify that the package hash changes w/ the size or mtime of a schema file, w/o reading the files """
+        campaigns_path = schema.get_abs_path('schemas/campaigns.json')
+        self.assertIn(campaigns_path, schema.get_bundle_source_paths())
+        with mock.patch('builtins.open', side_effect=AssertionError('file read')):
+            package_hash = schema.get_package_hash()
+
+        original_stat = os.stat
+        def changed_stat(path, *args, **kwargs):
+            file_stat = original_stat(path, *args, **kwargs)
+            if path == campaigns_path:
+                return os.stat_result((file_stat.st_mode, file_stat.st_ino, file_stat.st_dev, file_stat.st_nlink,
+                                       file_stat.st_uid, file_stat.st_gid, file_stat.st_size + 1,
+                                       file_stat.st_atime, file_stat.st_mtime, file_stat.st_ctime))
+            return file_stat
+
+        with mock.patch('os.stat', side_effect=changed_stat):
+            self.assertNotEqual(schema.get_package_hash(), package_hash)
+
+    def test_package_hash_changes_with_singer_version(self):
+        """ Verify that the package hash changes w/ the singer-python version """
+        package_hash = schema.get_package_hash()
+        with mock.patch.object(schema, 'get_distribution_version', return_value='0.0.0'):
+            self.assertNotEqual(schema.get_package_hash(), package_hash)
+
+    def test_new_objects(self):
+        """ Verify that each call returns new schema objects """
+        schemas, _ = schema.get_endpoint_schemas()
+        schemas['campaigns']['properties'].clear()
+
+        schemas, _ = schema.get_endpoint_schemas()
+        self.assertNotEqual(schemas['campaigns']['properties'], {})
+
+
+class TestReportSchemaMemo(unittest.TestCase):
+    """
+    Test that report schemas are resolved once by entity and segment
+    """
+
+    def setUp(self):
+        schema.get_resolved_report_schema.cache_clear()
+
+    def test_resolved_once_by_entity_and_segment(self):
+        """ Verify that reports w/ the same entity and segment share the resolved schema """
+        reports = [
+            {'name': 'report_1', 'entity': 'CAMPAIGN', 'segment': 'GENDER', 'granularity': 'DAY'},
+            {'name': 'report_2', 'entity': 'CAMPAIGN', 'segment': 'GENDER', 'granularity': 'HOUR'},
+            {'name': 'report_3', 'entity': 'CAMPAIGN', 'segment': 'NO_SEGMENT', 'granularity': 'DAY'}
+        ]
+
+        schemas, field_metadata = schema.get_schemas(reports)
+
+        cache_info = schema.get_resolved_report_schema.cache_info()
+        self.assertEqual(cache_info.misses, 2)
+        self.assertEqual(cache_info.hits, 1)
+        self.assertEqual(schemas['report_1'], schemas['report_2'])
+        self.assertEqual(field_metadata['report_1'], field_metadata['report_2'])
+        self.assertNotIn('segment_name', schemas['report_3']['properties']['dimensions'])
+
+    def test_report_schema_copies(self):
+        """ Verify that a modified report schema does not change the memoized schema """
+        report_schema, mdata = schema.get_report_schema('LINE_ITEM', 'AGE')
+        report_schema['properties'].clear()
+        mdata.clear()
+
+        report_schema, mdata = schema.get_report_schema('LINE_ITEM', 'AGE')
+        self.assertIn('dimensions', report_schema['properties'])
+        self.assertNotEqual(mdata, [])
@@ -0,0 +1,52 @@
+import copy
+import unittest
+from singer import metadata, Transformer
+from tap_twitter_ads.schema import get_schemas
+from tap_twitter_ads.transform import get_projection, project_record
+
+
+class TestSelectedFieldProjection(unittest.TestCase):
+    """
+    Test the projection of raw records to the selected fields
+    """
+
+    def setUp(self):
+        schemas, field_metadata = get_schemas([])
+        self.schema = schemas['campaigns']
+        mdata = metadata.to_map(field_metadata['campaigns'])
+        for field in self.schema['properties']:
+            mdata = metadata.write(mdata, ('properties', field), 'selected', field in ('name', 'servable'))
+        self.stream_metadata = mdata
+
+    def test_projection(self):
+        """ Verify that the projection has selected, automatic and required fields only """
+        projection = get_projection(self.schema, self.stream_metadata, ['id', 'updated_at'])
+
+        self.assertEqual(projection, frozenset(['id', 'updated_at', 'name', 'servable']))
+
+    def test_same_transformed_record(self):
+        """ Verify that the Transformer returns the same record with and without the projection """
+        record = {
+            'id': 'abc1',
+            'name': 'Campaign 1',
+            'servable': True,
+            'updated_at': '2022-01-01T00:00:00Z',
+            'currency': 'USD',
+            'total_budget_amount_local_micro': 1000,
+            'not_in_schema': {'nested': [1, 2, 3]}
+        }
+        projection = get_projection(self.schema, self.stream_metadata, ['id', 'updated_at'])
+        projected_record = project_record(record, projection)
+
+        self.assertNotIn('currency', projected_record)
+        self.assertNotIn('not_in_schema', projected_record)
+        with Transformer() as transformer:
+            expected_record = transformer.transform(copy.deepcopy(record), self.schema, self.stream_metadata)
+        with Transformer() as transformer:
+            self.assertEqual(transformer.transform(projected_record, self.schema, self.stream_metadata), expected_record)
+
+    def test_schema_without_properties(self):
+        """ Verify that all fields are kept for a schema without properties """
+        record = {'id': 'abc1', 'name': 'Campaign 1'}
+
+        self.assertIs(project_record(record, get_projection({}, {})), record)
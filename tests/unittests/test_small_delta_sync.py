@@ -0,0 +1,86 @@
+import unittest
+from unittest import mock
+from tap_twitter_ads.streams import ProbeCursor, TwitterAds, can_probe
+
+
+class MockResponse:
+    def __init__(self, body):
+        self.body = body
+
+
+def get_pages(total_records):
+    """Return a Request side_effect paging through total_records records w/ the requested count"""
+    def perform(*args, **kwargs):
+        params = kwargs.get('params')
+        start = int(params.get('cursor') or 0)
+        end = min(start + params.get('count'), total_records)
+        body = {'data': [{'id': str(i)} for i in range(start, end)]}
+        if end < total_records:
+            body['next_cursor'] = str(end)
+        request = mock.Mock()
+        request.perform.return_value = MockResponse(body)
+        return request
+    return perform
+
+
+@mock.patch('tap_twitter_ads.streams.Request')
+class TestProbeCursor(unittest.TestCase):
+    """
+    Test the small-delta sync cursor
+    """
+
+    def test_count_grows_for_each_page(self, mocked_request):
+        """ Verify that the count grows geometrically up to max_count, reading all records """
+        mocked_request.side_effect = get_pages(3000)
+        cursor = ProbeCursor('client', '/11/accounts/a1/campaigns', {'count': 1000}, 20, 1000)
+
+        records = list(cursor)
+
+        self.assertEqual(len(records), 3000)
+        self.assertEqual([call[1]['params']['count'] for call in mocked_request.call_args_list], \
+            [20, 80, 320, 1000, 1000, 1000])
+
+    def test_stop_at_first_old_record(self, mocked_request):
+        """ Verify that only the first page is requested when the caller stops within it """
+        mocked_request.side_effect = get_pages(3000)
+        cursor = ProbeCursor('client', '/11/accounts/a1/campaigns', {'count': 1000}, 20, 1000)
+
+        for i, record in enumerate(cursor):
+            if i == 5:
+                break
+
+        self.assertEqual(cursor.pages, 1)
+        self.assertEqual(mocked_request.call_args[1]['params']['count'], 20)
+
+    def test_get_resource_probe_count(self, mocked_request):
+        """ Verify that get_resource returns a ProbeCursor for a probe_count """
+        mocked_request.side_effect = get_pages(10)
+
+        cursor = TwitterAds().get_resource('campaigns', 'client', 'accounts/a1/campaigns', {'count': 1000}, 20)
+
+        self.assertIsInstance(cursor, ProbeCursor)
+        self.assertEqual(len(list(cursor)), 10)
+
+
+class TestCanProbe(unittest.TestCase):
+    """
+    Test the small-delta sync eligibility of a request
+    """
+
+    params = {'count': 1000, 'sort_by': ['updated_at-desc']}
+
+    def test_eligible(self):
+        self.assertTrue(can_probe('updated_at', self.params, False, None, False))
+
+    def test_not_eligible(self):
+        cases = {
+            'no bookmark': (None, self.params, False, None, False),
+            'no count': ('updated_at', {'sort_by': ['updated_at-desc']}, False, None, False),
+            'not sorted by the bookmark desc': ('updated_at', {'count': 1000}, False, None, False),
+            'first sync': ('updated_at', self.params, True, None, False),
+            'scheduled tweets': ('updated_at', self.params, False, 'SCHEDULED', False),
+            'selected children': ('updated_at', self.params, False, None, True)
+        }
+        for name, args in cases.items():
+            with self.subTest(name):
+                self.assertFalse(can_probe(*args))
@@ -0,0 +1,61 @@
+import os
+import json
+import tempfile
+import unittest
+from tap_twitter_ads.instrumentation import StageTimer, get_stage_timer, NULL_SPAN
+from tap_twitter_ads.streams import TwitterAds
+
+
+class TestStageTimer(unittest.TestCase):
+    """
+    Test the per-stage timing spans
+    """
+
+    def test_aggregated_spans(self):
+        """ Verify that spans are aggregated per stage, account and stream """
+        timer = StageTimer()
+        timer.add('download', 'acc', 'report', 1.0, 1.5)
+        timer.add('download', 'acc', 'report', 2.0, 2.25)
+        timer.add('write', 'acc', 'report', 3.0, 3.125)
+
+        summary = timer.get_summary()
+        self.assertEqual([row['stage'] for row in summary], ['download', 'write'])
+        self.assertEqual(summary[0]['count'], 2)
+        self.assertEqual(summary[0]['total_seconds'], 0.75)
+        self.assertEqual(summary[0]['max_ms'], 500.0)
+
+    def test_timed_iter(self):
+        """ Verify that each next() of a timed iterator (and the final one) is a span """
+        timer = StageTimer()
+        self.assertEqual(list(timer.timed_iter([1, 2, 3], 'pagination', 'acc', 'campaigns')), [1, 2, 3])
+        self.assertEqual(timer.get_summary()[0]['count'], 4)
+
+    def test_chrome_trace(self):
+        """ Verify that the trace file has Chrome trace events, w/o per-record stages """
+        path = os.path.join(tempfile.mkdtemp(), 'trace.json')
+        timer = StageTimer(path, 'chrome')
+        with timer.span('job_post', 'acc', 'report'):
+            pass
+        with timer.span('write', 'acc', 'report'):
+            pass
+        timer.close()
+
+        with open(path) as file:
+            events = json.load(file)['traceEvents']
+        self.assertEqual([event['name'] for event in events], ['job_post'])
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(events[0]['args'], {'account_id': 'acc', 'stream': 'report'})
+
+    def test_get_stage_timer(self):
+        """ Verify that stage timing is only enabled w/ stage_timing in the config """
+        self.assertIsNone(get_stage_timer({}))
+        self.assertIsInstance(get_stage_timer({'stage_timing': 'true'}), StageTimer)
+        with self.assertRaises(RuntimeError):
+            get_stage_timer({'stage_timing': 'true', 'stage_timing_format': 'xml'})
+
+    def test_disabled_span(self):
+        """ Verify that stream spans are no-ops when stage timing is disabled """
+        stream_obj = TwitterAds()
+        self.assertIs(stream_obj.span('write'), NULL_SPAN)
+        records = [1, 2]
+        self.assertIs(stream_obj.timed_iter(records, 'pagination'), records)
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+from tap_twitter_ads.streams import TwitterAds
+from tap_twitter_ads.sync import sync
+
+CONFIG = {'account_ids': 'acc_1', 'start_date': '2022-01-01T00:00:00Z'}
+
+
+@mock.patch('tap_twitter_ads.sync.RATE_LIMITS')
+@mock.patch('tap_twitter_ads.sync.install_sdk_hooks')
+@mock.patch('tap_twitter_ads.sync.get_memory_tracker')
+@mock.patch('tap_twitter_ads.sync.get_stage_timer')
+@mock.patch('tap_twitter_ads.sync.get_batch_writer')
+@mock.patch('tap_twitter_ads.sync.get_sync_streams', return_value=(['campaigns'], ['campaigns'], [], []))
+@mock.patch('tap_twitter_ads.streams.TwitterAds.get_selected_fields', return_value=[])
+@mock.patch('tap_twitter_ads.streams.TwitterAds.write_schema')
+@mock.patch('tap_twitter_ads.streams.TwitterAds.sync_endpoint', side_effect=Exception('sync error'))
+class TestSyncCleanup(unittest.TestCase):
+    """
+    Test that the sync helpers are closed and their summaries written when the sync fails
+    """
+
+    def test_helpers_closed_on_error(self, mocked_sync_endpoint, mocked_write_schema, mocked_selected_fields,
+                                     mocked_sync_streams, mocked_batch_writer, mocked_stage_timer,
+                                     mocked_memory_tracker, mocked_install_hooks, mocked_rate_limits):
+        """ Verify that batches are flushed, the trace and summaries are written despite the sync error """
+        with self.assertRaises(Exception) as e:
+            sync(mock.Mock(), CONFIG, mock.Mock(), {})
+
+        self.assertEqual(str(e.exception), 'sync error')
+        mocked_batch_writer.return_value.flush.assert_called()
+        mocked_stage_timer.return_value.close.assert_called_once()
+        mocked_memory_tracker.return_value.close.assert_called_once()
+        mocked_rate_limits.log_summary.assert_called_once()
+
+    def test_helpers_reset(self, mocked_sync_endpoint, mocked_write_schema, mocked_selected_fields,
+                           mocked_sync_streams, mocked_batch_writer, mocked_stage_timer,
+                           mocked_memory_tracker, mocked_install_hooks, mocked_rate_limits):
+        """ Verify that the helpers of the sync are not left on the stream classes """
+        with self.assertRaises(Exception):
+            sync(mock.Mock(), CONFIG, mock.Mock(), {})
+
+        for helper in ['batch_writer', 'fingerprint_index', 'stage_timer', 'memory_tracker']:
+            self.assertIsNone(getattr(TwitterAds, helper))
@@ -0,0 +1,174 @@
+import unittest
+from datetime import timedelta
+from tap_twitter_ads.transform import transform_report, get_active_time_indices, get_time_slots, get_record_template, \
+    END_TIME_EPOCH_KEY
+
+REPORT_NAME = 'line_items_daily_report'
+ACCOUNT_ID = 'dummy_account_id'
+
+
+def get_report_data(metrics, time_series_length=4, granularity='DAY', segment=None):
+    """Return an async job result with one entity and one datum"""
+    return {
+        'time_series_length': time_series_length,
+        'request': {
+            'params': {
+                'entity': 'LINE_ITEM',
+                'granularity': granularity,
+                'placement': 'ALL_ON_TWITTER',
+                'segmentation_type': None,
+                'country': None,
+                'platform': None,
+                'start_time': '2022-01-01T00:00:00Z',
+                'end_time': '2022-01-05T00:00:00Z'
+            }
+        },
+        'data': [
+            {
+                'id': 'abc1',
+                'id_data': [
+                    {
+                        'segment': segment,
+                        'metrics': metrics
+                    }
+                ]
+            }
+        ]
+    }
+
+
+class TestActiveTimeIndices(unittest.TestCase):
+    """
+    Test the pre-scan of metric arrays for time indices with data
+    """
+
+    def test_null_only_indices_skipped(self):
+        """ Verify that time indices where all metrics are null are not returned """
+        metrics = {
+            'impressions': [None, 10, None, None],
+            'billed_charge_local_micro': [None, None, None, 500],
+            'conversion_purchases': {'metric': [None, None, 1, None], 'order_quantity': [None, None, None, None]},
+            'video_total_views': None
+        }
+
+        self.assertEqual(get_active_time_indices(metrics, 4), [1, 2, 3])
+
+    def test_zero_indices_skipped_with_option(self):
+        """ Verify that all-zero time indices are only skipped with drop_zero_rows """
+        metrics = {
+            'impressions': [0, 10, None, 0],
+            'clicks': [0, 0, 0, 1]
+        }
+
+        self.assertEqual(get_active_time_indices(metrics, 4), [0, 1, 2, 3])
+        self.assertEqual(get_active_time_indices(metrics, 4, drop_zero_rows=True), [1, 3])
+
+    def test_indices_limited_to_time_series_length(self):
+        """ Verify that values past time_series_length are ignored """
+        self.assertEqual(get_active_time_indices({'impressions': [None, None, 5]}, 2), [])
+
+
+class TestTransformReport(unittest.TestCase):
+    """
+    Test transform_report records
+    """
+
+    def test_records_for_time_slots_with_data(self):
+        """ Verify that records are only created for time slots with data, with the slot start/end times """
+        metrics = {
+            'impressions': [None, 10, None, 3],
+            'billed_charge_local_micro': [None, 100, None, None],
+            'conversion_purchases': {'metric': [None, 1, None, None]}
+        }
+
+        records = transform_report(REPORT_NAME, get_report_data(metrics), ACCOUNT_ID)
+
+        self.assertEqual([record['start_time'] for record in records], ['2022-01-02T00:00:00.000000Z', '2022-01-04T00:00:00.000000Z'])
+        self.assertEqual([record['end_time'] for record in records], ['2022-01-03T00:00:00.000000Z', '2022-01-05T00:00:00.000000Z'])
+        self.assertEqual(records[0]['engagement'], {'impressions': 10})
+        self.assertEqual(records[0]['billing'], {'billed_charge_local_micro': 100})
+        self.assertEqual(records[0]['web_conversion'], {'conversion_purchases': {'metric': 1}})
+        self.assertEqual(records[1]['engagement'], {'impressions': 3})
+        self.assertEqual(records[1]['billing'], {'billed_charge_local_micro': None})
+        self.assertEqual(records[1]['dimensions']['entity_id'], 'abc1')
+        self.assertNotEqual(records[0]['__sdc_dimensions_hash_key'], records[1]['__sdc_dimensions_hash_key'])
+
+    def test_all_zero_records_dropped_with_option(self):
+        """ Verify that all-zero records are only dropped with drop_zero_rows """
+        metrics = {'impressions': [0, 10, 0, 0], 'clicks': [0, 1, 0, None]}
+
+        records = transform_report(REPORT_NAME, get_report_data(metrics), ACCOUNT_ID)
+        non_zero_records = transform_report(REPORT_NAME, get_report_data(metrics), ACCOUNT_ID, drop_zero_rows=True)
+
+        self.assertEqual(len(records), 4)
+        self.assertEqual(len(non_zero_records), 1)
+        self.assertEqual(non_zero_records[0]['engagement'], {'impressions': 10, 'clicks': 1})
+
+    def test_total_granularity(self):
+        """ Verify that a TOTAL report returns one record with the same start and end time """
+        records = transform_report(REPORT_NAME, get_report_data({'impressions': [42]}, 1, 'TOTAL'), ACCOUNT_ID)
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['start_time'], records[0]['end_time'])
+        self.assertEqual(records[0]['engagement'], {'impressions': 42})
+
+    def test_segment_dimensions(self):
+        """ Verify that segment name and value are added to the dimensions """
+        segment = {'segment_name': 'Female', 'segment_value': 'f'}
+        records = transform_report(REPORT_NAME, get_report_data({'impressions': [1, None, None, None]}, segment=segment), ACCOUNT_ID)
+
+        self.assertEqual(records[0]['dimensions']['segment_name'], 'Female')
+        self.assertEqual(records[0]['dimensions']['segment_value'], 'f')
+
+    def test_end_time_epoch(self):
+        """ Verify that each record carries its end_time as epoch seconds """
+        records = transform_report(REPORT_NAME, get_report_data({'impressions': [1, None, None, 2]}), ACCOUNT_ID)
+
+        # 2022-01-02T00:00:00Z and 2022-01-05T00:00:00Z
+        self.assertEqual([record[END_TIME_EPOCH_KEY] for record in records], [1641081600, 1641340800])
+
+
+class TestTimeSlots(unittest.TestCase):
+    """
+    Test the time slot table of a report job
+    """
+
+    def test_hour_time_slots(self):
+        """ Verify start, end and end epoch for each HOUR time index """
+        time_slots = get_time_slots('2022-01-01T22:00:00Z', timedelta(hours=1), 3)
+
+        self.assertEqual(time_slots, [
+            ('2022-01-01T22:00:00.000000Z', '2022-01-01T23:00:00.000000Z', 1641078000),
+            ('2022-01-01T23:00:00.000000Z', '2022-01-02T00:00:00.000000Z', 1641081600),
+            ('2022-01-02T00:00:00.000000Z', '2022-01-02T01:00:00.000000Z', 1641085200)
+        ])
+
+    def test_total_time_slot(self):
+        """ Verify that the TOTAL time slot starts and ends at the job start_time """
+        time_slots = get_time_slots('2022-01-01T00:00:00Z', timedelta(days=0), 1)
+
+        self.assertEqual(time_slots, [('2022-01-01T00:00:00.000000Z', '2022-01-01T00:00:00.000000Z', 1640995200)])
+
+
+class TestRecordTemplate(unittest.TestCase):
+    """
+    Test the metric group classification of report metric keys
+    """
+
+    def test_record_template(self):
+        """ Verify record groups in order of first metric key, and the group of each metric key """
+        metric_groups = {}
+        metric_keys = ('impressions', 'billed_engagements', 'media_views', 'video_total_views', 'conversion_purchases',
+                       'mobile_conversion_installs', 'clicks')
+
+        record_groups, metric_key_groups = get_record_template(metric_keys, metric_groups)
+
+        self.assertEqual(record_groups, ('engagement', 'billing', 'media', 'video', 'web_conversion', 'mobile_conversion'))
+        self.assertEqual(metric_key_groups[-1], ('engagement', 'clicks'))
+        self.assertEqual(metric_groups['mobile_conversion_installs'], 'mobile_conversion')
+
+    def test_groups_created_for_metrics_without_values(self):
+        """ Verify that a group node is created for a metric key even when its value is null """
+        records = transform_report(REPORT_NAME, get_report_data({'impressions': [1], 'video_total_views': None}, 1), ACCOUNT_ID)
+
+        self.assertEqual(records[0]['video'], {})